@@ -6,6 +6,7 @@ from sqlalchemy import engine_from_config, pool
 # >>> NAJWAŻNIEJSZE <<<
 from smart_common.core.config import settings
 from smart_common.core.db import Base
+from smart_common.repositories.measurement_partitions import include_name
 
 # Alembic Config
 config = context.config
@@ -34,6 +35,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         compare_type=True,
         compare_server_default=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -55,6 +57,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,44 @@
+"""Add provider_backfill_checkpoints table.
+
+Revision ID: a5d3e9f7c214
+Revises: f2b6d8a41c07
+Create Date: 2026-02-23 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a5d3e9f7c214"
+down_revision: Union[str, Sequence[str], None] = "f2b6d8a41c07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_backfill_checkpoints",
+        sa.Column("provider_id", sa.Integer(), nullable=False),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_until", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["provider_id"],
+            ["providers.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("provider_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("provider_backfill_checkpoints")
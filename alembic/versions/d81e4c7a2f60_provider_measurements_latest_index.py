@@ -0,0 +1,46 @@
+"""Composite (provider_id, measured_at DESC) index on provider_measurements.
+
+Revision ID: d81e4c7a2f60
+Revises: c3f1b291c123
+Create Date: 2026-02-02 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d81e4c7a2f60"
+down_revision: Union[str, Sequence[str], None] = "c3f1b291c123"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace the provider_id index with (provider_id, measured_at DESC)."""
+    op.create_index(
+        "ix_provider_measurements_provider_measured_at",
+        "provider_measurements",
+        ["provider_id", sa.text("measured_at DESC")],
+        unique=False,
+    )
+    # The composite index has provider_id as its prefix.
+    op.drop_index(
+        op.f("ix_provider_measurements_provider_id"),
+        table_name="provider_measurements",
+    )
+
+
+def downgrade() -> None:
+    """Restore the single-column provider_id index."""
+    op.create_index(
+        op.f("ix_provider_measurements_provider_id"),
+        "provider_measurements",
+        ["provider_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_provider_measurements_provider_measured_at",
+        table_name="provider_measurements",
+    )
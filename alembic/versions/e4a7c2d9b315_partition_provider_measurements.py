@@ -0,0 +1,168 @@
+"""Partition provider_measurements by month on measured_at.
+
+Revision ID: e4a7c2d9b315
+Revises: d81e4c7a2f60
+Create Date: 2026-02-09 00:00:00.000000
+
+The existing table is renamed, a RANGE-partitioned table with primary key
+(id, measured_at) takes its place, monthly partitions are created from the
+oldest row up to three months ahead, and the rows are copied over. The copy
+runs inside the migration transaction; schedule it accordingly on large
+tables. Later partitions are created by
+scripts/maintain_measurement_partitions.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7c2d9b315"
+down_revision: Union[str, Sequence[str], None] = "d81e4c7a2f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, provider_id, measured_at, measured_value, measured_unit, metadata"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE provider_measurements RENAME TO provider_measurements_legacy")
+    op.execute(
+        "ALTER TABLE provider_measurements_legacy "
+        "DROP CONSTRAINT provider_measurements_provider_id_fkey"
+    )
+    op.execute(
+        "ALTER TABLE provider_measurements_legacy "
+        "DROP CONSTRAINT provider_measurements_pkey"
+    )
+    op.drop_index(
+        "ix_provider_measurements_provider_measured_at",
+        table_name="provider_measurements_legacy",
+    )
+    op.drop_index(
+        op.f("ix_provider_measurements_measured_at"),
+        table_name="provider_measurements_legacy",
+    )
+    # Keep the id sequence (and its position) for the new table.
+    op.execute("ALTER SEQUENCE provider_measurements_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE provider_measurements_id_seq AS BIGINT")
+
+    op.execute(
+        """
+        CREATE TABLE provider_measurements (
+            id BIGINT NOT NULL DEFAULT nextval('provider_measurements_id_seq'),
+            provider_id INTEGER NOT NULL
+                REFERENCES providers (id) ON DELETE CASCADE,
+            measured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            measured_value DOUBLE PRECISION,
+            measured_unit VARCHAR(16),
+            metadata JSON NOT NULL,
+            CONSTRAINT provider_measurements_pkey PRIMARY KEY (id, measured_at)
+        ) PARTITION BY RANGE (measured_at)
+        """
+    )
+    op.execute(
+        "ALTER SEQUENCE provider_measurements_id_seq OWNED BY provider_measurements.id"
+    )
+    op.execute(
+        "CREATE TABLE provider_measurements_default "
+        "PARTITION OF provider_measurements DEFAULT"
+    )
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            first_month date;
+            part_month date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(measured_at), now()) AT TIME ZONE 'UTC')::date
+              INTO first_month
+              FROM provider_measurements_legacy;
+
+            FOR part_month IN
+                SELECT generate_series(
+                    first_month,
+                    (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date,
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF provider_measurements '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'provider_measurements_y' || to_char(part_month, 'YYYY') || 'm' || to_char(part_month, 'MM'),
+                    part_month::timestamp AT TIME ZONE 'UTC',
+                    (part_month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute(
+        f"INSERT INTO provider_measurements ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM provider_measurements_legacy"
+    )
+    op.execute("DROP TABLE provider_measurements_legacy")
+
+    # Indexes on the parent cascade to every partition.
+    op.execute(
+        "CREATE INDEX ix_provider_measurements_provider_measured_at "
+        "ON provider_measurements (provider_id, measured_at DESC)"
+    )
+    op.execute(
+        "CREATE INDEX ix_provider_measurements_measured_at_brin "
+        "ON provider_measurements USING brin (measured_at)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        CREATE TABLE provider_measurements_plain (
+            id INTEGER NOT NULL,
+            provider_id INTEGER NOT NULL,
+            measured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            measured_value NUMERIC(12, 4),
+            measured_unit VARCHAR(16),
+            metadata JSON NOT NULL
+        )
+        """
+    )
+    op.execute(
+        f"INSERT INTO provider_measurements_plain ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM provider_measurements"
+    )
+    op.execute("ALTER SEQUENCE provider_measurements_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE provider_measurements CASCADE")
+    op.execute("ALTER TABLE provider_measurements_plain RENAME TO provider_measurements")
+    op.execute("ALTER SEQUENCE provider_measurements_id_seq AS INTEGER")
+    op.execute(
+        "ALTER TABLE provider_measurements ALTER COLUMN id "
+        "SET DEFAULT nextval('provider_measurements_id_seq')"
+    )
+    op.execute(
+        "ALTER SEQUENCE provider_measurements_id_seq OWNED BY provider_measurements.id"
+    )
+    op.execute(
+        "ALTER TABLE provider_measurements "
+        "ADD CONSTRAINT provider_measurements_pkey PRIMARY KEY (id)"
+    )
+    op.execute(
+        "ALTER TABLE provider_measurements "
+        "ADD CONSTRAINT provider_measurements_provider_id_fkey "
+        "FOREIGN KEY (provider_id) REFERENCES providers (id) ON DELETE CASCADE"
+    )
+    op.create_index(
+        "ix_provider_measurements_provider_measured_at",
+        "provider_measurements",
+        ["provider_id", sa.text("measured_at DESC")],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_provider_measurements_measured_at"),
+        "provider_measurements",
+        ["measured_at"],
+        unique=False,
+    )
@@ -0,0 +1,50 @@
+"""Add provider_measurement_rollups table.
+
+Revision ID: f2b6d8a41c07
+Revises: e4a7c2d9b315
+Create Date: 2026-02-16 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b6d8a41c07"
+down_revision: Union[str, Sequence[str], None] = "e4a7c2d9b315"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+rollup_resolution_enum = sa.Enum("1m", "15m", "1h", "1d", name="rollup_resolution_enum")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_measurement_rollups",
+        sa.Column("provider_id", sa.Integer(), nullable=False),
+        sa.Column("resolution", rollup_resolution_enum, nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("min_value", sa.Double(), nullable=True),
+        sa.Column("max_value", sa.Double(), nullable=True),
+        sa.Column("sum_value", sa.Double(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("last_value", sa.Double(), nullable=True),
+        sa.Column("first_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("energy", sa.Double(), nullable=False),
+        sa.Column("unit", sa.String(length=16), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["provider_id"],
+            ["providers.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("provider_id", "resolution", "bucket_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("provider_measurement_rollups")
+    rollup_resolution_enum.drop(op.get_bind(), checkfirst=True)
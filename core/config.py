@@ -32,6 +32,19 @@ class CommonSettings(BaseSettings):
 
     DATABASE_URL_OVERRIDE: str | None = None
 
+    # provider_measurements monthly partitions: months created ahead and
+    # full months kept before the current one (0 = keep everything).
+    MEASUREMENT_PARTITIONS_AHEAD: int = 3
+    MEASUREMENT_RETENTION_MONTHS: int = 0
+    # Rollups are updated on every save; samples further apart than the
+    # max gap are not integrated into energy.
+    MEASUREMENT_ROLLUPS_ENABLED: bool = True
+    MEASUREMENT_ROLLUP_MAX_GAP_SECONDS: int = 900
+    # Days of 1m / 15m rollup buckets kept (0 = keep everything); 1h and 1d
+    # buckets are never deleted.
+    MEASUREMENT_ROLLUP_1M_RETENTION_DAYS: int = 31
+    MEASUREMENT_ROLLUP_15M_RETENTION_DAYS: int = 366
+
     # ------------------------------------------------------------------
     # Messaging / Cache
     # ------------------------------------------------------------------
@@ -39,6 +52,17 @@ class CommonSettings(BaseSettings):
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     STREAM_NAME: str = "device_communications.events"
+    # JetStream drops re-published messages with a seen Nats-Msg-Id
+    # within this window.
+    NATS_DUPLICATE_WINDOW_SECONDS: int = 120
+    # Events stream limits (0 / -1 = unlimited); compression: "none" | "s2".
+    NATS_STREAM_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    NATS_STREAM_MAX_BYTES: int = -1
+    NATS_STREAM_MAX_MSGS_PER_SUBJECT: int = 1000
+    NATS_STREAM_REPLICAS: int = 1
+    NATS_STREAM_COMPRESSION: str = "s2"
+    # Directory for the local event outbox; empty disables it.
+    NATS_OUTBOX_DIR: str | None = None
 
     # ------------------------------------------------------------------
     # Security (REQUIRED)
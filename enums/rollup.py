@@ -0,0 +1,21 @@
+# smart_common/enums/rollup.py
+from enum import Enum
+
+
+class RollupResolution(str, Enum):
+    MINUTE = "1m"
+    QUARTER_HOUR = "15m"
+    HOUR = "1h"
+    DAY = "1d"
+
+    @property
+    def seconds(self) -> int:
+        return _RESOLUTION_SECONDS[self]
+
+
+_RESOLUTION_SECONDS = {
+    RollupResolution.MINUTE: 60,
+    RollupResolution.QUARTER_HOUR: 15 * 60,
+    RollupResolution.HOUR: 3600,
+    RollupResolution.DAY: 86400,
+}
@@ -17,9 +17,12 @@ class EventDispatcher:
         self.publisher = publisher
         self.default_source = default_source
 
-    def _serialize_data(self, data: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    def _serialize_data(
+        self, data: Union[BaseModel, Dict[str, Any]]
+    ) -> Union[BaseModel, Dict[str, Any]]:
+        # Models are left intact; the subject's codec serializes them directly.
         if isinstance(data, BaseModel):
-            return data.model_dump(mode="json")
+            return data
         return dict(data)
 
     def _event_type_value(self, event_type: Union[EventType, str]) -> str:
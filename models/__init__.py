@@ -11,3 +11,9 @@ from smart_common.models.microcontroller_sensor_capability import (  # noqa: F40
 from smart_common.models.user import User  # noqa: F401
 from smart_common.models.user_profile import UserProfile  # noqa: F401
 from smart_common.models.provider_measurement import ProviderMeasurement  # noqa: F401
+from smart_common.models.provider_measurement_rollup import (  # noqa: F401
+    ProviderMeasurementRollup,
+)
+from smart_common.models.provider_backfill_checkpoint import (  # noqa: F401
+    ProviderBackfillCheckpoint,
+)
@@ -144,6 +144,10 @@ class Provider(Base):
 
     @property
     def last_value(self) -> ProviderMeasurement | None:
+        # Set for whole lists by MeasurementRepository.preload_last_values.
+        if "_last_value" in self.__dict__:
+            return self.__dict__["_last_value"]
+
         session = object_session(self)
         if session is None or self.id is None:
             return None
@@ -157,6 +161,9 @@ class Provider(Base):
 
         return session.execute(stmt).scalars().first()
 
+    def set_last_value(self, measurement: ProviderMeasurement | None) -> None:
+        self.__dict__["_last_value"] = measurement
+
 
 class ProviderCredential(Base):
     __tablename__ = "provider_credentials"
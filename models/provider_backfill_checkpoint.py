@@ -0,0 +1,33 @@
+# smart_common/models/provider_backfill_checkpoint.py
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from smart_common.core.db import Base
+
+
+class ProviderBackfillCheckpoint(Base):
+    """Progress of a provider's historical backfill.
+
+    History in [`start_at`, `completed_until`) has been loaded into
+    `provider_measurements`; an interrupted backfill resumes from
+    `completed_until`.
+    """
+
+    __tablename__ = "provider_backfill_checkpoints"
+
+    provider_id: Mapped[int] = mapped_column(
+        ForeignKey("providers.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    start_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    completed_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -4,28 +4,38 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Numeric, String
+from sqlalchemy import JSON, BigInteger, DateTime, Double, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from smart_common.core.db import Base
 
 
 class ProviderMeasurement(Base):
+    """Time series of provider values.
+
+    Range-partitioned by month on `measured_at` (see
+    `repositories.measurement_partitions` for partition maintenance), so the
+    partition key is part of the primary key.
+    """
+
     __tablename__ = "provider_measurements"
+    __table_args__ = {"postgresql_partition_by": "RANGE (measured_at)"}
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
     provider_id: Mapped[int] = mapped_column(
         ForeignKey("providers.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     measured_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        nullable=False,
-        index=True,
+        primary_key=True,
     )
     measured_value: Mapped[float | None] = mapped_column(
-        Numeric(12, 2),
+        Double,
         nullable=True,
     )
     measured_unit: Mapped[str | None] = mapped_column(
@@ -43,3 +53,20 @@ class ProviderMeasurement(Base):
         "Provider",
         back_populates="measurements",
     )
+
+
+# Serves "latest measurement per provider" (ORDER BY ... LIMIT 1) and
+# per-provider range scans; also covers plain provider_id lookups.
+Index(
+    "ix_provider_measurements_provider_measured_at",
+    ProviderMeasurement.provider_id,
+    ProviderMeasurement.measured_at.desc(),
+)
+
+# Rows arrive roughly in time order, so a BRIN index gives cheap time-range
+# pruning inside a partition at a fraction of a B-tree's size.
+Index(
+    "ix_provider_measurements_measured_at_brin",
+    ProviderMeasurement.measured_at,
+    postgresql_using="brin",
+)
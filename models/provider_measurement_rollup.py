@@ -0,0 +1,54 @@
+# smart_common/models/provider_measurement_rollup.py
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Double, Enum, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from smart_common.core.db import Base
+from smart_common.enums.rollup import RollupResolution
+
+
+class ProviderMeasurementRollup(Base):
+    """Per-provider aggregates of `provider_measurements` for one time bucket.
+
+    `energy` is the trapezoidal integral of the value over time in
+    `unit`-hours (W → Wh, kW → kWh); intervals longer than
+    MEASUREMENT_ROLLUP_MAX_GAP_SECONDS are treated as gaps.
+    """
+
+    __tablename__ = "provider_measurement_rollups"
+
+    provider_id: Mapped[int] = mapped_column(
+        ForeignKey("providers.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    resolution: Mapped[RollupResolution] = mapped_column(
+        Enum(
+            RollupResolution,
+            name="rollup_resolution_enum",
+            values_callable=lambda enum: [member.value for member in enum],
+        ),
+        primary_key=True,
+    )
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+
+    min_value: Mapped[float | None] = mapped_column(Double, nullable=True)
+    max_value: Mapped[float | None] = mapped_column(Double, nullable=True)
+    sum_value: Mapped[float] = mapped_column(Double, nullable=False, default=0.0)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_value: Mapped[float | None] = mapped_column(Double, nullable=True)
+    first_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    energy: Mapped[float] = mapped_column(Double, nullable=False, default=0.0)
+    unit: Mapped[str | None] = mapped_column(String(length=16), nullable=True)
+
+    @property
+    def avg_value(self) -> float | None:
+        if not self.sample_count:
+            return None
+        return self.sum_value / self.sample_count
@@ -1,19 +1,82 @@
+from smart_common.nats.ack_router import AckRouter
 from smart_common.nats.client import NATSClient, nats_client
+from smart_common.nats.commands import (
+    CommandChannel,
+    CommandError,
+    CommandResult,
+    CommandTimeoutError,
+)
+from smart_common.nats.codecs import (
+    CodecRegistry,
+    EventCodec,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    codec_registry,
+)
+from smart_common.nats.consumer import (
+    ConsumerGroup,
+    ConsumerRegistry,
+    DedupCache,
+    MessageContext,
+    NakMessage,
+    PullConsumer,
+    TermMessage,
+)
 from smart_common.nats.listener import NatsListener
+from smart_common.nats.metrics import NatsMetrics, nats_metrics, render_prometheus
 from smart_common.nats.module import NatsModule, nats_module
+from smart_common.nats.outbox import EventOutbox, FileOutboxStore, OutboxStore
 from smart_common.nats.publisher import NatsPublisher
-from smart_common.nats.streams import DEVICE_COMM_STREAM
+from smart_common.nats.provisioning import (
+    ConsumerSpec,
+    Provisioner,
+    StreamSpec,
+    reconcile_consumer,
+    reconcile_stream,
+)
+from smart_common.nats.streams import DEVICE_COMM_STREAM, device_events_stream
 from smart_common.nats.subjects import INVERTER_UPDATE, RASPBERRY_EVENTS, RASPBERRY_HEARTBEAT
 
 __all__ = [
+    "AckRouter",
     "NATSClient",
     "nats_client",
+    "CommandChannel",
+    "CommandError",
+    "CommandResult",
+    "CommandTimeoutError",
+    "CodecRegistry",
+    "EventCodec",
+    "JsonCodec",
+    "MsgpackCodec",
+    "OrjsonCodec",
+    "codec_registry",
+    "ConsumerGroup",
+    "ConsumerRegistry",
+    "DedupCache",
+    "MessageContext",
+    "NakMessage",
+    "PullConsumer",
+    "TermMessage",
     "NatsListener",
+    "NatsMetrics",
+    "nats_metrics",
+    "render_prometheus",
     "NatsPublisher",
     "NatsModule",
+    "EventOutbox",
+    "FileOutboxStore",
+    "OutboxStore",
     "nats_module",
     "INVERTER_UPDATE",
     "RASPBERRY_EVENTS",
     "RASPBERRY_HEARTBEAT",
+    "ConsumerSpec",
+    "Provisioner",
+    "StreamSpec",
+    "reconcile_consumer",
+    "reconcile_stream",
     "DEVICE_COMM_STREAM",
+    "device_events_stream",
 ]
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from smart_common.nats.codecs import codec_registry, subject_matches
+from smart_common.nats.event_helpers import stream_name
+from smart_common.nats.metrics import NatsMetrics, nats_metrics
+
+logger = logging.getLogger(__name__)
+
+AckPredicate = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass(eq=False)
+class AckWaiter:
+    ack_subject: str
+    future: asyncio.Future
+    event_id: str | None = None
+    predicate: AckPredicate | None = None
+
+
+class AckRouter:
+    """Routes acknowledgements from one long-lived subscription to waiters.
+
+    By default a single `<stream>.*.ack` subscription covers every entity. Acks
+    carrying the `event_id` of a pending publish on that waiter's ack subject
+    resolve it directly (after its predicate, if one was given); any other ack
+    is matched against the predicates of waiters registered on the same ack
+    subject. Ack subjects outside the shared pattern get their own
+    subscription, dropped once their last waiter is gone.
+    """
+
+    def __init__(self, client, *, subject_pattern: str | None = None) -> None:
+        self.client = client
+        self._subject_pattern = subject_pattern
+        self._subscriptions: Dict[str, Any] = {}
+        self._subscribed_nc = None
+        self._lock = asyncio.Lock()
+        self._by_event_id: Dict[str, AckWaiter] = {}
+        self._by_subject: Dict[str, List[AckWaiter]] = {}
+        self._releases: set[asyncio.Task] = set()
+
+    @property
+    def subject_pattern(self) -> str:
+        return self._subject_pattern or f"{stream_name()}.*.ack"
+
+    @property
+    def metrics(self) -> NatsMetrics:
+        return getattr(self.client, "metrics", None) or nats_metrics
+
+    @property
+    def pending(self) -> int:
+        return sum(len(waiters) for waiters in self._by_subject.values())
+
+    async def start(self) -> None:
+        await self._ensure_subscription(self.subject_pattern)
+
+    async def expect(
+        self,
+        ack_subject: str,
+        *,
+        event_id: str | None = None,
+        predicate: AckPredicate | None = None,
+    ) -> AckWaiter:
+        """Register interest in an ack *before* the message is published."""
+        if event_id is None and predicate is None:
+            raise ValueError("expect() requires an event_id or a predicate")
+
+        if subject_matches(self.subject_pattern, ack_subject):
+            await self._ensure_subscription(self.subject_pattern)
+        else:
+            await self._ensure_subscription(ack_subject)
+
+        waiter = AckWaiter(
+            ack_subject=ack_subject,
+            future=asyncio.get_running_loop().create_future(),
+            event_id=event_id,
+            predicate=predicate,
+        )
+        if event_id is not None:
+            self._by_event_id[event_id] = waiter
+        self._by_subject.setdefault(ack_subject, []).append(waiter)
+        return waiter
+
+    async def wait(self, waiter: AckWaiter, timeout: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise Exception("Timeout waiting for ACK")
+        finally:
+            self.discard(waiter)
+            self.metrics.observe(
+                "nats_ack_wait_seconds",
+                time.perf_counter() - started,
+                subject=waiter.ack_subject,
+                outcome=outcome,
+            )
+
+    def discard(self, waiter: AckWaiter) -> None:
+        if waiter.event_id is not None:
+            if self._by_event_id.get(waiter.event_id) is waiter:
+                del self._by_event_id[waiter.event_id]
+
+        waiters = self._by_subject.get(waiter.ack_subject)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._by_subject[waiter.ack_subject]
+                self._release_later(waiter.ack_subject)
+
+        if not waiter.future.done():
+            waiter.future.cancel()
+
+    async def close(self) -> None:
+        async with self._lock:
+            for sub in self._subscriptions.values():
+                try:
+                    await sub.unsubscribe()
+                except Exception:
+                    pass
+            self._subscriptions.clear()
+            self._subscribed_nc = None
+
+        for waiters in list(self._by_subject.values()):
+            for waiter in list(waiters):
+                self.discard(waiter)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _ensure_subscription(self, subject: str) -> None:
+        nc = self.client.nc
+        if nc is self._subscribed_nc and subject in self._subscriptions:
+            return
+
+        async with self._lock:
+            await self.client.ensure_connected()
+            nc = self.client.nc
+
+            if nc is not self._subscribed_nc:
+                # Connection was reset: the old subscriptions died with it.
+                self._subscriptions.clear()
+                self._subscribed_nc = nc
+
+            if subject in self._subscriptions:
+                return
+
+            self._subscriptions[subject] = await nc.subscribe(subject, cb=self._handle)
+            logger.info("[NATS] Ack router subscribed", extra={"subject": subject})
+
+    def _release_later(self, subject: str) -> None:
+        # Only ack subjects outside the shared pattern have their own subscription.
+        if subject == self.subject_pattern or subject not in self._subscriptions:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._release(subject))
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _release(self, subject: str) -> None:
+        async with self._lock:
+            # A new waiter may have reused the subscription in the meantime.
+            if subject in self._by_subject:
+                return
+            sub = self._subscriptions.pop(subject, None)
+            if sub is None:
+                return
+            try:
+                await sub.unsubscribe()
+            except Exception:
+                pass
+            logger.debug("[NATS] Ack router unsubscribed", extra={"subject": subject})
+
+    async def _handle(self, msg) -> None:
+        codecs = getattr(self.client, "codecs", None) or codec_registry
+        try:
+            payload = codecs.decode(msg.data, msg.headers)
+        except Exception as exc:
+            logger.warning(
+                "[NATS] Undecodable ack dropped",
+                extra={"subject": msg.subject, "error": str(exc)},
+            )
+            return
+
+        if not isinstance(payload, dict):
+            return
+
+        tried = None
+        event_id = payload.get("event_id")
+        if event_id is not None:
+            waiter = self._by_event_id.get(str(event_id))
+            if waiter is not None and waiter.ack_subject == msg.subject:
+                if waiter.predicate is None:
+                    if not waiter.future.done():
+                        waiter.future.set_result(payload)
+                    return
+                if self._offer(waiter, payload):
+                    return
+                tried = waiter
+
+        for waiter in list(self._by_subject.get(msg.subject, ())):
+            if waiter.predicate is None or waiter is tried:
+                continue
+            self._offer(waiter, payload)
+
+    @staticmethod
+    def _offer(waiter: AckWaiter, payload: Dict[str, Any]) -> bool:
+        """Resolve `waiter` with `payload` if its predicate accepts it."""
+        if waiter.future.done():
+            return False
+        try:
+            matched = waiter.predicate(payload)
+        except Exception as exc:
+            waiter.future.set_exception(exc)
+            return False
+        if matched:
+            waiter.future.set_result(payload)
+        return bool(matched)
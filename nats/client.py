@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-import json
 import logging
+import time
+from typing import Any
 
 import nats
 from nats.js import JetStreamContext
 
 from smart_common.core.config import settings
+from smart_common.nats.codecs import CodecRegistry, codec_registry
+from smart_common.nats.event_helpers import with_msg_id
+from smart_common.nats.metrics import NatsMetrics, nats_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +19,14 @@ class NATSClient:
     DEFAULT_RECONNECT_TIME_WAIT = 1.0
     DEFAULT_MAX_RECONNECT_ATTEMPTS = 2
 
-    def __init__(self):
+    def __init__(
+        self,
+        codecs: CodecRegistry | None = None,
+        metrics: NatsMetrics | None = None,
+    ):
         self.nc = None
+        self.codecs = codecs or codec_registry
+        self.metrics = metrics or nats_metrics
         self.js: JetStreamContext | None = None
         self.connected_once = False
         self.reconnect_time_wait = self.DEFAULT_RECONNECT_TIME_WAIT
@@ -38,9 +48,11 @@ class NATSClient:
 
         async def disconnected_cb():
             logger.warning("[NATS] Disconnected")
+            self.metrics.inc("nats_disconnects_total")
 
         async def reconnected_cb():
             logger.warning("[NATS] Reconnected — restoring JetStream context")
+            self.metrics.inc("nats_reconnects_total")
             self.js = self.nc.jetstream()
 
         async def error_cb(e):
@@ -112,19 +124,29 @@ class NATSClient:
             return True
         return False
 
-    async def publish(self, subject: str, payload: dict):
+    async def publish(self, subject: str, payload: Any):
         """Simple fire-and-forget publish"""
         await self.ensure_connected()
-        data = json.dumps(payload).encode("utf-8")
-        return await self.nc.publish(subject, data)
+        data, headers = self.codecs.encode(subject, payload)
+        self.metrics.inc("nats_payload_bytes_total", len(data), subject=subject, direction="out")
+        return await self.nc.publish(subject, data, headers=headers)
 
-    async def js_publish(self, subject: str, payload: dict, timeout=2.0):
+    async def js_publish(self, subject: str, payload: Any, timeout=2.0):
         """JetStream publish with durability."""
         await self.ensure_connected()
         if not self.js:
             self.js = self.nc.jetstream()
-        data = json.dumps(payload).encode("utf-8")
-        ack = await self.js.publish(subject, data, timeout=timeout)
+        data, headers = self.codecs.encode(subject, payload)
+        with_msg_id(headers, payload)
+        started = time.perf_counter()
+        try:
+            ack = await self.js.publish(subject, data, timeout=timeout, headers=headers)
+        except Exception:
+            self.metrics.inc("nats_published_total", subject=subject, outcome="error")
+            raise
+        self.metrics.observe("nats_publish_latency_seconds", time.perf_counter() - started, subject=subject)
+        self.metrics.inc("nats_published_total", subject=subject, outcome="ok")
+        self.metrics.inc("nats_payload_bytes_total", len(data), subject=subject, direction="out")
         logger.debug(f"[NATS] JS Published {subject} seq={ack.seq}")
         return ack
 
@@ -167,6 +189,7 @@ class NATSClient:
         if drain:
             try:
                 logger.info("[NATS] Draining...")
+                self.metrics.inc("nats_drain_events_total", source="client_close")
                 await self.nc.drain()
             except Exception:
                 pass
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Mapping, Tuple
+
+import pydantic_core
+
+try:  # optional fast JSON backend
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional binary backend
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+CONTENT_TYPE_HEADER = "Content-Type"
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+def _to_jsonable(value: Any) -> Any:
+    return pydantic_core.to_jsonable_python(value, by_alias=False)
+
+
+class EventCodec(ABC):
+    """Encodes/decodes NATS message bodies.
+
+    Codecs accept Pydantic models anywhere in the value (including inside the
+    event envelope) and serialize them without an intermediate `model_dump`.
+    Models are written by field name, as `model_dump(mode="json")` did.
+    """
+
+    content_type: str
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        ...
+
+
+class JsonCodec(EventCodec):
+    """JSON through pydantic-core's Rust serializer (no extra dependency)."""
+
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, value: Any) -> bytes:
+        return pydantic_core.to_json(value, by_alias=False)
+
+    def decode(self, data: bytes) -> Any:
+        return pydantic_core.from_json(data)
+
+
+class OrjsonCodec(EventCodec):
+    content_type = JSON_CONTENT_TYPE
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_to_jsonable)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(EventCodec):
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(
+            value,
+            default=_to_jsonable,
+            use_bin_type=True,
+        )
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+def subject_matches(pattern: str, subject: str) -> bool:
+    """NATS wildcard match (`*` = one token, `>` = one or more tokens)."""
+    pattern_tokens = pattern.split(".")
+    subject_tokens = subject.split(".")
+
+    for index, token in enumerate(pattern_tokens):
+        if token == ">":
+            return len(subject_tokens) > index
+        if index >= len(subject_tokens):
+            return False
+        if token != "*" and token != subject_tokens[index]:
+            return False
+
+    return len(pattern_tokens) == len(subject_tokens)
+
+
+class CodecRegistry:
+    """Resolves the codec for outgoing subjects and incoming content types.
+
+    Subject rules are NATS wildcard patterns; the most recently registered
+    matching rule wins. A stream-wide codec is a `<stream>.>` rule.
+    """
+
+    SUBJECT_CACHE_SIZE = 4096
+
+    def __init__(self, default: EventCodec | None = None) -> None:
+        self.default = default or JsonCodec()
+        self._subject_rules: list[Tuple[str, EventCodec]] = []
+        # Messages without a Content-Type header predate codecs and are JSON.
+        self._by_content_type: Dict[str, EventCodec] = {
+            JSON_CONTENT_TYPE: JsonCodec(),
+            self.default.content_type: self.default,
+        }
+        self._subject_cache: Dict[str, EventCodec] = {}
+
+        if msgpack is not None:
+            self.register(MsgpackCodec())
+
+    def register(self, codec: EventCodec) -> None:
+        """Make `codec` available for decoding its content type."""
+        self._by_content_type.setdefault(codec.content_type, codec)
+
+    def set_for_subject(self, pattern: str, codec: EventCodec) -> None:
+        self._by_content_type[codec.content_type] = codec
+        self._subject_rules.append((pattern, codec))
+        self._subject_cache.clear()
+
+    def set_for_stream(self, stream: str, codec: EventCodec) -> None:
+        self.set_for_subject(f"{stream}.>", codec)
+
+    def for_subject(self, subject: str) -> EventCodec:
+        codec = self._subject_cache.get(subject)
+        if codec is not None:
+            return codec
+
+        codec = self.default
+        for pattern, candidate in reversed(self._subject_rules):
+            if subject_matches(pattern, subject):
+                codec = candidate
+                break
+
+        if len(self._subject_cache) >= self.SUBJECT_CACHE_SIZE:
+            self._subject_cache.clear()
+        self._subject_cache[subject] = codec
+        return codec
+
+    def for_content_type(self, content_type: str | None) -> EventCodec:
+        if not content_type:
+            return self._by_content_type[JSON_CONTENT_TYPE]
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        codec = self._by_content_type.get(media_type)
+        if codec is None:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        return codec
+
+    def encode(self, subject: str, value: Any) -> Tuple[bytes, Dict[str, str]]:
+        codec = self.for_subject(subject)
+        return codec.encode(value), {CONTENT_TYPE_HEADER: codec.content_type}
+
+    def decode(self, data: bytes, headers: Mapping[str, str] | None = None) -> Any:
+        content_type = (headers or {}).get(CONTENT_TYPE_HEADER)
+        return self.for_content_type(content_type).decode(data)
+
+
+codec_registry = CodecRegistry()
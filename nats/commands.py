@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Union
+
+from nats.errors import NoRespondersError
+from nats.errors import TimeoutError as NatsTimeoutError
+from pydantic import BaseModel
+
+from smart_common.enums.event import EventType
+from smart_common.nats.codecs import CodecRegistry, codec_registry
+from smart_common.nats.event_helpers import build_event_payload, command_subject_for_entity
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "Smart-Deadline"
+EVENT_ID_HEADER = "Smart-Event-Id"
+
+CommandHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any] | None]]
+
+
+class CommandError(Exception):
+    """Raised when a command is rejected or cannot be delivered."""
+
+
+class CommandTimeoutError(CommandError):
+    """Raised when no reply arrives before the command deadline."""
+
+
+@dataclass
+class CommandResult:
+    entity_id: str
+    reply: Dict[str, Any] | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _EntityLimiter:
+    """Per-entity semaphores that are dropped once nobody holds them."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self._slots: Dict[str, list] = {}
+
+    async def acquire(self, entity_id: str, timeout: float) -> None:
+        slot = self._slots.setdefault(entity_id, [asyncio.Semaphore(self.limit), 0])
+        slot[1] += 1
+        try:
+            await asyncio.wait_for(slot[0].acquire(), timeout=timeout)
+        except BaseException:
+            self._forget(entity_id, slot)
+            raise
+
+    def release(self, entity_id: str) -> None:
+        slot = self._slots.get(entity_id)
+        if slot is None:
+            return
+        slot[0].release()
+        self._forget(entity_id, slot)
+
+    def _forget(self, entity_id: str, slot: list) -> None:
+        slot[1] -= 1
+        if slot[1] <= 0 and self._slots.get(entity_id) is slot:
+            del self._slots[entity_id]
+
+
+class CommandChannel:
+    """Request/reply commands for microcontrollers, correlated by `event_id`.
+
+    Every command carries its absolute deadline (epoch ms) in the
+    `Smart-Deadline` header so responders can drop work the caller has
+    already given up on.
+    """
+
+    DEFAULT_TIMEOUT = 5.0
+    DEFAULT_MAX_IN_FLIGHT_PER_ENTITY = 1
+    DEFAULT_FAN_OUT_CONCURRENCY = 100
+
+    def __init__(
+        self,
+        client,
+        *,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        max_in_flight_per_entity: int = DEFAULT_MAX_IN_FLIGHT_PER_ENTITY,
+        default_source: str | None = None,
+    ) -> None:
+        self.client = client
+        self.default_timeout = default_timeout
+        self.default_source = default_source
+        self._limiter = _EntityLimiter(max_in_flight_per_entity)
+
+    @property
+    def codecs(self) -> CodecRegistry:
+        return getattr(self.client, "codecs", None) or codec_registry
+
+    async def send(
+        self,
+        entity_id: str,
+        *,
+        event_type: Union[EventType, str],
+        data: Union[BaseModel, Dict[str, Any]],
+        entity_type: str = "microcontroller",
+        timeout: float | None = None,
+        deadline: float | None = None,
+        subject: str | None = None,
+        source: str | None = None,
+    ) -> Dict[str, Any]:
+        """Send one command and return the responder's reply payload.
+
+        `deadline` is an absolute epoch timestamp (seconds); when omitted it
+        is derived from `timeout`.
+        """
+        entity_id = str(entity_id)
+        deadline = deadline or time.time() + (timeout or self.default_timeout)
+        payload = build_event_payload(
+            event_type=event_type.value if isinstance(event_type, EventType) else str(event_type),
+            entity_type=entity_type,
+            entity_id=entity_id,
+            data=data if isinstance(data, BaseModel) else dict(data),
+            source=source or self.default_source,
+        )
+        event_id = payload["event_id"]
+        resolved_subject = subject or command_subject_for_entity(entity_id)
+
+        try:
+            await self._limiter.acquire(entity_id, self._remaining(deadline, event_id))
+        except asyncio.TimeoutError as exc:
+            raise CommandTimeoutError(
+                f"Command {event_id} queued past its deadline for {entity_id}"
+            ) from exc
+
+        try:
+            await self.client.ensure_connected()
+            body, headers = self.codecs.encode(resolved_subject, payload)
+            headers[DEADLINE_HEADER] = str(int(deadline * 1000))
+            headers[EVENT_ID_HEADER] = event_id
+
+            try:
+                msg = await self.client.nc.request(
+                    resolved_subject,
+                    body,
+                    timeout=self._remaining(deadline, event_id),
+                    headers=headers,
+                )
+            except NatsTimeoutError as exc:
+                raise CommandTimeoutError(
+                    f"No reply to command {event_id} from {entity_id}"
+                ) from exc
+            except NoRespondersError as exc:
+                raise CommandError(f"No responders for {resolved_subject}") from exc
+        finally:
+            self._limiter.release(entity_id)
+
+        reply = self.codecs.decode(msg.data, msg.headers)
+        if not isinstance(reply, dict):
+            raise CommandError(f"Malformed reply to command {event_id}")
+
+        reply_event_id = reply.get("event_id")
+        if reply_event_id is not None and reply_event_id != event_id:
+            raise CommandError(
+                f"Reply correlated to {reply_event_id}, expected {event_id}"
+            )
+
+        if reply.get("ok") is False:
+            raise CommandError(reply.get("error") or f"Command {event_id} rejected")
+
+        return reply
+
+    async def fan_out(
+        self,
+        entity_ids: Iterable[str],
+        *,
+        event_type: Union[EventType, str],
+        data: Union[BaseModel, Dict[str, Any]],
+        entity_type: str = "microcontroller",
+        timeout: float | None = None,
+        max_concurrency: int = DEFAULT_FAN_OUT_CONCURRENCY,
+        source: str | None = None,
+    ) -> Dict[str, CommandResult]:
+        """Send the same command to many entities under one shared deadline."""
+        deadline = time.time() + (timeout or self.default_timeout)
+        gate = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _one(entity_id: str) -> CommandResult:
+            async with gate:
+                try:
+                    reply = await self.send(
+                        entity_id,
+                        event_type=event_type,
+                        data=data,
+                        entity_type=entity_type,
+                        deadline=deadline,
+                        source=source,
+                    )
+                except Exception as exc:
+                    return CommandResult(entity_id=entity_id, error=exc)
+                return CommandResult(entity_id=entity_id, reply=reply)
+
+        unique_ids = list(dict.fromkeys(str(entity_id) for entity_id in entity_ids))
+        results = await asyncio.gather(*(_one(entity_id) for entity_id in unique_ids))
+
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(
+            "[NATS] Command fan-out finished",
+            extra={
+                "event_type": str(event_type),
+                "targets": len(results),
+                "failed": failed,
+            },
+        )
+        return {result.entity_id: result for result in results}
+
+    async def serve(self, entity_id: str, handler: CommandHandler):
+        """Responder side: run `handler` for each command addressed to the entity.
+
+        The handler receives the event envelope and returns reply data; raising
+        produces an `ok: false` reply, as does a payload or deadline header
+        that cannot be parsed. Commands past their deadline are dropped.
+        """
+        await self.client.ensure_connected()
+        subject = command_subject_for_entity(entity_id)
+
+        async def _on_request(msg) -> None:
+            headers = msg.headers or {}
+            # Falls back to the header so even undecodable commands get a reply.
+            event_id = headers.get(EVENT_ID_HEADER)
+            try:
+                raw_deadline = headers.get(DEADLINE_HEADER)
+                if raw_deadline and int(raw_deadline) / 1000 < time.time():
+                    logger.warning(
+                        "[NATS] Dropping expired command",
+                        extra={"subject": msg.subject, "event_id": event_id},
+                    )
+                    return
+
+                envelope = self.codecs.decode(msg.data, msg.headers)
+                if not isinstance(envelope, dict):
+                    raise ValueError(
+                        f"Command payload must be an object, got {type(envelope).__name__}"
+                    )
+                event_id = envelope.get("event_id", event_id)
+                result = await handler(envelope)
+                reply = {"event_id": event_id, "ok": True, "data": result}
+            except Exception as exc:
+                logger.exception("[NATS] Command handler failed")
+                reply = {"event_id": event_id, "ok": False, "error": str(exc)}
+
+            if not msg.reply:
+                return
+            body, reply_headers = self.codecs.encode(msg.reply, reply)
+            await self.client.nc.publish(msg.reply, body, headers=reply_headers)
+
+        sub = await self.client.nc.subscribe(subject, cb=_on_request)
+        logger.info("[NATS] Serving commands", extra={"subject": subject})
+        return sub
+
+    @staticmethod
+    def _remaining(deadline: float, event_id: str) -> float:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise CommandTimeoutError(f"Deadline passed before command {event_id} was sent")
+        return remaining
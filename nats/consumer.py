@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Mapping
+
+from nats.errors import TimeoutError as NatsTimeoutError
+from nats.js.api import DeliverPolicy
+
+from smart_common.nats.codecs import codec_registry
+from smart_common.nats.event_helpers import MSG_ID_HEADER, event_id_of, stream_name
+from smart_common.nats.metrics import NatsMetrics, nats_metrics
+from smart_common.nats.provisioning import ConsumerSpec, reconcile_consumer
+
+logger = logging.getLogger(__name__)
+
+
+class NakMessage(Exception):
+    """Raise from a handler to redeliver the message after `delay` seconds."""
+
+    def __init__(self, delay: float | None = None, reason: str | None = None) -> None:
+        super().__init__(reason or "nak requested")
+        self.delay = delay
+
+
+class TermMessage(Exception):
+    """Raise from a handler to stop redelivery of a message for good."""
+
+
+class MessageContext:
+    """A fetched JetStream message plus its decoded payload.
+
+    Handlers may settle the message explicitly; anything left unsettled
+    is acked once the handler returns.
+    """
+
+    def __init__(self, msg, data: Any, key: str) -> None:
+        self.msg = msg
+        self.data = data
+        self.key = key
+        # "ack", "nak" or "term" once settled.
+        self.disposition: str | None = None
+
+    @property
+    def subject(self) -> str:
+        return self.msg.subject
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self.msg.headers or {}
+
+    @property
+    def num_delivered(self) -> int:
+        try:
+            return self.msg.metadata.num_delivered
+        except Exception:
+            return 1
+
+    @property
+    def settled(self) -> bool:
+        return self.disposition is not None
+
+    async def ack(self) -> None:
+        if not self.settled:
+            self.disposition = "ack"
+            await self.msg.ack()
+
+    async def nak(self, delay: float | None = None) -> None:
+        if not self.settled:
+            self.disposition = "nak"
+            await self.msg.nak(delay=delay)
+
+    async def term(self) -> None:
+        if not self.settled:
+            self.disposition = "term"
+            await self.msg.term()
+
+    @property
+    def message_id(self) -> str | None:
+        """`Nats-Msg-Id` header, falling back to the envelope `event_id`."""
+        return self.headers.get(MSG_ID_HEADER) or event_id_of(self.data)
+
+    async def in_progress(self) -> None:
+        """Extend the ack deadline for long-running handlers."""
+        if not self.settled:
+            await self.msg.in_progress()
+
+
+class DedupCache:
+    """Bounded LRU of recently handled message ids with a TTL.
+
+    Catches what the stream-level duplicate window cannot: redeliveries
+    of a message whose handler succeeded but whose ack was lost.
+    """
+
+    DEFAULT_MAX_SIZE = 100_000
+    DEFAULT_TTL = 600.0
+
+    def __init__(self, *, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL) -> None:
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def seen(self, message_id: str) -> bool:
+        expires_at = self._entries.get(message_id)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._entries[message_id]
+            return False
+        self._entries.move_to_end(message_id)
+        return True
+
+    def add(self, message_id: str) -> None:
+        self._entries[message_id] = time.monotonic() + self.ttl
+        self._entries.move_to_end(message_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+MessageHandler = Callable[[MessageContext], Awaitable[None]]
+KeyFunc = Callable[[str, Any], str]
+
+
+def entity_key(subject: str, data: Any) -> str:
+    """Ordering key: the envelope `entity_id`, falling back to the subject."""
+    if isinstance(data, dict) and data.get("entity_id") is not None:
+        return str(data["entity_id"])
+    return subject
+
+
+@dataclass
+class ConsumerRoute:
+    subject: str
+    handler: MessageHandler
+    durable: str
+    stream: str | None = None
+    batch_size: int = 64
+    workers: int = 8
+    queue_size: int = 256
+    fetch_timeout: float = 1.0
+    ack_wait: float = 10.0
+    max_deliver: int = -1
+    retry_delay: float | None = 1.0
+    deliver_policy: DeliverPolicy = DeliverPolicy.NEW
+    key: KeyFunc = entity_key
+    dedup: DedupCache | None = None
+
+    def consumer_spec(self) -> ConsumerSpec:
+        return ConsumerSpec(
+            durable=self.durable,
+            filter_subject=self.subject,
+            deliver_policy=getattr(self.deliver_policy, "value", self.deliver_policy),
+            ack_wait=self.ack_wait,
+            max_deliver=self.max_deliver,
+            # Never let the server hand out more than the lanes can hold.
+            max_ack_pending=max(self.queue_size, self.batch_size) + max(1, self.workers),
+        )
+
+
+class ConsumerRegistry:
+    """Maps subjects to handlers; each route becomes one pull consumer."""
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, ConsumerRoute] = {}
+
+    @property
+    def routes(self) -> List[ConsumerRoute]:
+        return list(self._routes.values())
+
+    def register(self, subject: str, handler: MessageHandler, *, durable: str, **options) -> ConsumerRoute:
+        if durable in self._routes:
+            raise ValueError(f"Consumer {durable} is already registered")
+        route = ConsumerRoute(subject=subject, handler=handler, durable=durable, **options)
+        self._routes[durable] = route
+        return route
+
+    def route(self, subject: str, *, durable: str, **options):
+        """Decorator form of `register`."""
+
+        def decorator(handler: MessageHandler) -> MessageHandler:
+            self.register(subject, handler, durable=durable, **options)
+            return handler
+
+        return decorator
+
+
+@dataclass
+class _Lane:
+    queue: asyncio.Queue
+    task: asyncio.Task | None = None
+
+
+class PullConsumer:
+    """Fetches batches for one route and fans them out to ordered lanes.
+
+    Messages are assigned to a lane by hashing their key, so all messages
+    for one entity are handled in order by a single worker. Lane queues
+    are bounded: when they fill up the fetch loop blocks, which is what
+    keeps unacked messages on the server instead of in memory.
+    """
+
+    def __init__(self, client, route: ConsumerRoute) -> None:
+        self.client = client
+        self.route = route
+        self._sub = None
+        self._subscribed_nc = None
+        self._fetch_task: asyncio.Task | None = None
+        self._lanes: List[_Lane] = []
+        self._stopping = False
+        self._reconciled = False
+
+    @property
+    def codecs(self):
+        return getattr(self.client, "codecs", None) or codec_registry
+
+    @property
+    def metrics(self) -> NatsMetrics:
+        return getattr(self.client, "metrics", None) or nats_metrics
+
+    async def start(self) -> None:
+        if self._fetch_task is not None:
+            return
+
+        self._stopping = False
+        workers = max(1, self.route.workers)
+        lane_size = max(1, self.route.queue_size // workers)
+        self._lanes = [_Lane(queue=asyncio.Queue(maxsize=lane_size)) for _ in range(workers)]
+        for lane in self._lanes:
+            lane.task = asyncio.create_task(self._worker(lane))
+
+        await self._subscribe()
+        self._fetch_task = asyncio.create_task(self._fetch_loop())
+
+        logger.info(
+            "[NATS] Pull consumer started",
+            extra={
+                "subject": self.route.subject,
+                "durable": self.route.durable,
+                "batch_size": self.route.batch_size,
+                "workers": workers,
+            },
+        )
+
+    async def stop(self) -> None:
+        """Stop fetching, let lanes finish what they hold, then unsubscribe."""
+        self._stopping = True
+        if self._fetch_task is not None:
+            self._fetch_task.cancel()
+            await asyncio.gather(self._fetch_task, return_exceptions=True)
+            self._fetch_task = None
+
+        for lane in self._lanes:
+            await lane.queue.join()
+            if lane.task is not None:
+                lane.task.cancel()
+        await asyncio.gather(
+            *(lane.task for lane in self._lanes if lane.task is not None),
+            return_exceptions=True,
+        )
+        self._lanes = []
+
+        if self._sub is not None:
+            try:
+                await self._sub.unsubscribe()
+            except Exception:
+                pass
+            self._sub = None
+            self._subscribed_nc = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _subscribe(self) -> None:
+        await self.client.ensure_connected()
+        js = self.client.js
+        if js is None:
+            raise RuntimeError("JetStream not initialized — did you call connect()?")
+
+        route = self.route
+        stream = route.stream or stream_name()
+        if not self._reconciled:
+            # pull_subscribe only creates missing durables; bring existing
+            # ones in line with the route (ack_wait, max_ack_pending, ...).
+            await reconcile_consumer(js, stream, route.consumer_spec())
+            self._reconciled = True
+        self._sub = await js.pull_subscribe(
+            route.subject,
+            durable=route.durable,
+            stream=stream,
+            config=route.consumer_spec().to_config(),
+        )
+        self._subscribed_nc = self.client.nc
+
+    async def _fetch_loop(self) -> None:
+        route = self.route
+        while not self._stopping:
+            try:
+                if self._sub is None or self.client.nc is not self._subscribed_nc:
+                    await self._subscribe()
+                messages = await self._sub.fetch(route.batch_size, timeout=route.fetch_timeout)
+            except NatsTimeoutError:
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "[NATS] Fetch failed, retrying",
+                    extra={"durable": route.durable, "error": str(exc)},
+                )
+                self._sub = None
+                await asyncio.sleep(route.fetch_timeout)
+                continue
+
+            for msg in messages:
+                await self._dispatch(msg)
+
+    async def _dispatch(self, msg) -> None:
+        self.metrics.inc("nats_payload_bytes_total", len(msg.data), subject=msg.subject, direction="in")
+        try:
+            data = self.codecs.decode(msg.data, msg.headers)
+        except Exception as exc:
+            logger.error(
+                "[NATS] Undecodable message terminated",
+                extra={"subject": msg.subject, "error": str(exc)},
+            )
+            await msg.term()
+            return
+
+        key = self.route.key(msg.subject, data)
+        lane = self._lanes[zlib.crc32(key.encode()) % len(self._lanes)]
+        await lane.queue.put(MessageContext(msg, data, key))
+
+    async def _worker(self, lane: _Lane) -> None:
+        while True:
+            ctx = await lane.queue.get()
+            try:
+                await self._handle(ctx)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(
+                    "[NATS] Failed to settle message",
+                    extra={"subject": ctx.subject, "error": str(exc)},
+                )
+            finally:
+                lane.queue.task_done()
+
+    async def _handle(self, ctx: MessageContext) -> None:
+        route = self.route
+        started = time.perf_counter()
+        outcome = "ok"
+        message_id = ctx.message_id if route.dedup is not None else None
+        try:
+            if message_id and route.dedup.seen(message_id):
+                outcome = "duplicate"
+                await ctx.ack()
+                return
+            await route.handler(ctx)
+            if message_id and ctx.disposition in (None, "ack"):
+                route.dedup.add(message_id)
+            await ctx.ack()
+        except NakMessage as exc:
+            outcome = "nak"
+            await ctx.nak(exc.delay)
+        except TermMessage as exc:
+            outcome = "term"
+            logger.warning(
+                "[NATS] Message terminated by handler",
+                extra={"subject": ctx.subject, "reason": str(exc)},
+            )
+            await ctx.term()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            outcome = "error"
+            logger.exception(
+                "[NATS] Handler failed",
+                extra={
+                    "subject": ctx.subject,
+                    "durable": route.durable,
+                    "num_delivered": ctx.num_delivered,
+                },
+            )
+            await ctx.nak(route.retry_delay)
+        finally:
+            labels = {"subject": ctx.subject, "durable": route.durable}
+            self.metrics.observe(
+                "nats_consume_duration_seconds", time.perf_counter() - started, **labels
+            )
+            self.metrics.inc("nats_consumed_total", outcome=outcome, **labels)
+
+
+class ConsumerGroup:
+    """Runs one pull consumer per registered route."""
+
+    def __init__(self, client, registry: ConsumerRegistry | None = None) -> None:
+        self.client = client
+        self.registry = registry or ConsumerRegistry()
+        self._consumers: Dict[str, PullConsumer] = {}
+
+    async def start(self) -> None:
+        for route in self.registry.routes:
+            if route.durable in self._consumers:
+                continue
+            consumer = PullConsumer(self.client, route)
+            await consumer.start()
+            self._consumers[route.durable] = consumer
+
+    async def stop(self) -> None:
+        consumers = list(self._consumers.values())
+        self._consumers.clear()
+        await asyncio.gather(*(consumer.stop() for consumer in consumers), return_exceptions=True)
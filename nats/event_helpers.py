@@ -8,6 +8,8 @@ from smart_common.core.config import settings
 
 EVENT_DATA_VERSION = "1"
 DEFAULT_EVENT_SOURCE = "smart-common"
+COMMAND_SUBJECT_PREFIX = "commands"
+MSG_ID_HEADER = "Nats-Msg-Id"
 
 
 def stream_name() -> str:
@@ -25,12 +27,22 @@ def ack_subject_for_entity(entity_id: str) -> str:
     return f"{subject_for_entity(entity_id)}.ack"
 
 
+def command_subject_for_entity(entity_id: str) -> str:
+    """Request/reply subject for commands sent to the given entity.
+
+    Kept outside `<stream>.>` so JetStream does not capture (and ack) the
+    request in place of the entity.
+    """
+    normalized_id = _normalize_entity_id(entity_id)
+    return f"{COMMAND_SUBJECT_PREFIX}.{stream_name()}.{normalized_id}"
+
+
 def build_event_payload(
     *,
     event_type: str,
     entity_type: str,
     entity_id: str,
-    data: Dict[str, Any],
+    data: Any,
     source: str | None = None,
     event_id: str | None = None,
     timestamp: str | None = None,
@@ -54,6 +66,23 @@ def build_event_payload(
     }
 
 
+def event_id_of(payload: Any) -> str | None:
+    """Return the envelope `event_id` of a dict or model payload, if any."""
+    if isinstance(payload, dict):
+        event_id = payload.get("event_id")
+    else:
+        event_id = getattr(payload, "event_id", None)
+    return str(event_id) if event_id else None
+
+
+def with_msg_id(headers: Dict[str, str], payload: Any) -> Dict[str, str]:
+    """Add `Nats-Msg-Id` from the envelope so JetStream drops re-published copies."""
+    event_id = event_id_of(payload)
+    if event_id:
+        headers.setdefault(MSG_ID_HEADER, event_id)
+    return headers
+
+
 def _normalize_entity_id(entity_id: str | Any) -> str:
     if isinstance(entity_id, str):
         return entity_id
@@ -1,4 +1,3 @@
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Type
@@ -6,6 +5,7 @@ from typing import Any, Dict, Optional, Type
 from pydantic import BaseModel, Field, ValidationError
 
 from .client import nats_client
+from .codecs import codec_registry
 from .publisher import publisher
 
 logger = logging.getLogger(__name__)
@@ -96,14 +96,18 @@ EVENT_REGISTRY: Dict[str, Type[Event]] = {
 }
 
 
-def decode_event(raw_json: bytes) -> Event:
+def decode_event(raw_json: bytes, content_type: str | None = None) -> Event:
     """
     Automatyczne odczytywanie eventów wg event_type.
+    Format rozpoznawany po nagłówku Content-Type (domyślnie JSON).
     """
     try:
-        data = json.loads(raw_json.decode("utf-8"))
+        data = codec_registry.for_content_type(content_type).decode(raw_json)
     except Exception as e:
-        raise ValueError(f"Invalid JSON event: {e}")
+        raise ValueError(f"Invalid event payload: {e}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Event payload must be an object")
 
     event_type = data.get("event_type")
     if not event_type:
@@ -135,7 +139,7 @@ async def publish_event(subject: str, event: Event):
         await publish_event("device_communication.inverter.123.update", event)
     """
     try:
-        await nats_client.js_publish(subject, event.model_dump(mode="json"))
+        await nats_client.js_publish(subject, event)
         logger.info(f"[EVENT] Published event_type={event.event_type} subject={subject}")
     except Exception as e:
         logger.error(f"[EVENT] Failed to publish event: {e}")
@@ -1,44 +1,57 @@
-import json
 import logging
 
-from nats.js.api import DeliverPolicy
-
 from smart_common.nats.client import nats_client
+from smart_common.nats.consumer import (
+    ConsumerGroup,
+    ConsumerRegistry,
+    DedupCache,
+    MessageContext,
+)
 from smart_common.nats.event_helpers import stream_name
+from smart_common.nats.provisioning import remove_consumer
 
 logger = logging.getLogger(__name__)
 
 
 class NatsListener:
+    """Durable pull consumer over the whole device stream.
+
+    Extra handlers can be added to `registry` before `subscribe()`; each one
+    gets its own durable pull consumer and worker pool.
+    """
 
-    def __init__(self, client=nats_client):
+    # Pull consumers cannot reuse the name of the old push consumer.
+    DEFAULT_CONSUMER_NAME = "device_communication_worker"
+    # Durables of earlier releases; deleted so they stop piling up messages.
+    RETIRED_CONSUMER_NAMES = ("device_communication_listener",)
+
+    def __init__(self, client=nats_client, registry: ConsumerRegistry | None = None):
         self.client = client
-        self.consumer_name = "device_communication_listener"
+        self.consumer_name = self.DEFAULT_CONSUMER_NAME
+        self.registry = registry or ConsumerRegistry()
+        self.consumers = ConsumerGroup(self.client, self.registry)
+
+    async def handle(self, ctx: MessageContext) -> None:
+        logger.debug(f"[NATS] Received subject={ctx.subject} data={ctx.data}")
 
     async def subscribe(self):
         if not self.client.js:
             raise RuntimeError("JetStream not initialized — did you call connect()?")
 
-        async def handler(msg):
-            try:
-                subject = msg.subject
-                data = json.loads(msg.data.decode("utf-8"))
-
-                logger.info(f"[NATS] Received subject={subject} data={data}")
-
-                await msg.ack()
-            except Exception as e:
-                logger.exception(f"[NATS] Failed to process message: {e}")
-
-        sub = await self.client.js.subscribe(
-            subject=f"{stream_name()}.>",
-            durable=self.consumer_name,
-            stream=stream_name(),
-            manual_ack=True,
-            ack_wait=10,
-            deliver_policy=DeliverPolicy.NEW,
-            cb=handler,
-        )
+        if not any(route.durable == self.consumer_name for route in self.registry.routes):
+            self.registry.register(
+                f"{stream_name()}.>",
+                self.handle,
+                durable=self.consumer_name,
+                stream=stream_name(),
+                ack_wait=10,
+                dedup=DedupCache(),
+            )
+
+        for durable in self.RETIRED_CONSUMER_NAMES:
+            await remove_consumer(self.client.js, stream_name(), durable)
+
+        await self.consumers.start()
 
         logger.info(
             "[NATS] Listener subscribed to %s.> with durable=%s",
@@ -46,4 +59,7 @@ class NatsListener:
             self.consumer_name,
         )
 
-        return sub
+        return self.consumers
+
+    async def close(self):
+        await self.consumers.stop()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from smart_common.nats.subjects import INVERTER_UPDATE, RASPBERRY_EVENTS, RASPBERRY_HEARTBEAT
+from smart_common.nats.event_helpers import COMMAND_SUBJECT_PREFIX, stream_name
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _log_bounds(lowest: float, highest: float, steps_per_doubling: int) -> List[float]:
+    factor = 2 ** (1 / steps_per_doubling)
+    count = math.ceil(math.log(highest / lowest, factor)) + 1
+    return [float(f"{lowest * factor**index:.4g}") for index in range(count)]
+
+
+class Histogram:
+    """Log-bucketed histogram (HDR-style: constant relative error).
+
+    Buckets grow by 2**(1/4), so quantiles are reported within ~10% of the
+    true value over the whole 50µs–120s range.
+    """
+
+    BOUNDS = _log_bounds(0.00005, 120.0, 4)
+    # Prometheus gets every 4th bound (powers of two) to keep series small.
+    EXPORT_BOUNDS = BOUNDS[::4]
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index == 0 or index == len(self.BOUNDS):
+                    return self.min if index == 0 else self.max
+                # Geometric bucket midpoint halves the worst-case error.
+                estimate = math.sqrt(self.BOUNDS[index - 1] * self.BOUNDS[index])
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[Tuple[float, int]]:
+        result = []
+        index = 0
+        seen = 0
+        for bound in bounds:
+            while index < len(self.BOUNDS) and self.BOUNDS[index] <= bound * (1 + 1e-9):
+                seen += self.counts[index]
+                index += 1
+            result.append((bound, seen))
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": 0.0 if not self.count else self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class SubjectTemplates:
+    """Maps concrete subjects onto low-cardinality templates for labels.
+
+    Known templates come from `nats/subjects.py` and the `<stream>.{entity_id}`
+    layout; anything else has id-like tokens replaced by `{id}`.
+    """
+
+    CACHE_SIZE = 4096
+    _ID_TOKEN = re.compile(r"\d|^[0-9a-f]{8,}$|^[0-9a-f-]{32,}$", re.IGNORECASE)
+
+    def __init__(self, templates: Iterable[str] = ()) -> None:
+        self._templates: List[Tuple[str, List[str | None]]] = []
+        self._cache: Dict[str, str] = {}
+        for template in templates:
+            self.register(template)
+
+    def register(self, template: str) -> None:
+        tokens = [None if token.startswith("{") else token for token in template.split(".")]
+        self._templates.append((template, tokens))
+        self._cache.clear()
+
+    def resolve(self, subject: str) -> str:
+        template = self._cache.get(subject)
+        if template is not None:
+            return template
+
+        template = self._match(subject) or self._fallback(subject)
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[subject] = template
+        return template
+
+    def _match(self, subject: str) -> str | None:
+        subject_tokens = subject.split(".")
+        for template, tokens in self._templates:
+            if len(tokens) != len(subject_tokens):
+                continue
+            if all(token is None or token == actual for token, actual in zip(tokens, subject_tokens)):
+                return template
+        return None
+
+    def _fallback(self, subject: str) -> str:
+        return ".".join(
+            "{id}" if self._ID_TOKEN.search(token) else token for token in subject.split(".")
+        )
+
+
+def default_subject_templates() -> SubjectTemplates:
+    stream = stream_name()
+    return SubjectTemplates(
+        [
+            INVERTER_UPDATE,
+            RASPBERRY_HEARTBEAT,
+            RASPBERRY_EVENTS,
+            f"{stream}.{{entity_id}}",
+            f"{stream}.{{entity_id}}.ack",
+            f"{COMMAND_SUBJECT_PREFIX}.{stream}.{{entity_id}}",
+        ]
+    )
+
+
+class NatsMetrics:
+    """In-process counters and latency histograms for the NATS layer.
+
+    Subject labels are always reduced to their template, so the number of
+    series stays bounded no matter how many devices are connected.
+    """
+
+    def __init__(self, templates: SubjectTemplates | None = None) -> None:
+        self.templates = templates or default_subject_templates()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Dict[str, list]]:
+        """Plain-data copy of every series: counters and histogram summaries."""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {"labels": dict(key), **histogram.summary()}
+                        for key, histogram in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative(Histogram.EXPORT_BOUNDS):
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(key + le)} {count}")
+                    lines.append(f'{name}_bucket{_format_labels(key + (("le", "+Inf"),))} {histogram.count}')
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, labels: Dict[str, str]) -> LabelSet:
+        subject = labels.get("subject")
+        if subject is not None:
+            labels = {**labels, "subject": self.templates.resolve(subject)}
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+nats_metrics = NatsMetrics()
+
+
+def render_prometheus(metrics: NatsMetrics | None = None) -> str:
+    return (metrics or nats_metrics).render_prometheus()
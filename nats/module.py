@@ -5,23 +5,32 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from smart_common.core.config import settings
 from smart_common.events.event_dispatcher import EventDispatcher
 from smart_common.nats.client import NATSClient
+from smart_common.nats.commands import CommandChannel
 from smart_common.nats.listener import NatsListener
+from smart_common.nats.outbox import EventOutbox, FileOutboxStore
+from smart_common.nats.provisioning import Provisioner
+from smart_common.nats.streams import device_events_stream
 from smart_common.nats.publisher import NatsPublisher
-from smart_common.nats.event_helpers import stream_name
 
 logger = logging.getLogger(__name__)
 
 
 class NatsModule:
 
-    def __init__(self, create_stream: bool = False):
+    def __init__(self, create_stream: bool = False, outbox_dir: str | None = None):
         self.client = NATSClient()
         self.publisher = NatsPublisher(self.client)
         self.listener = NatsListener(self.client)
         self.events = EventDispatcher(self.publisher)
+        self.commands = CommandChannel(self.client)
         self.create_stream = create_stream
+        self.outbox_dir = outbox_dir or settings.NATS_OUTBOX_DIR
+        self.outbox: EventOutbox | None = None
+        self.provisioner = Provisioner()
+        self.provisioner.add_stream(device_events_stream())
 
     async def _ensure_stream(self):
         await self.client.ensure_connected()
@@ -29,30 +38,26 @@ class NatsModule:
         if js is None:
             raise RuntimeError("JetStream context unavailable when ensuring stream.")
 
-        try:
-            existing = await js.stream_info(stream_name())
-            logger.info(
-                "[NATS] Stream %s already exists.", stream_name()
-            )
-        except Exception:
-            logger.warning(
-                "[NATS] Stream missing — creating %s...", stream_name()
-            )
-            await js.add_stream(
-                name=stream_name(),
-                subjects=[f"{stream_name()}.>"],
-                storage="file",
-                retention="limits",
-            )
-            logger.info("[NATS] Stream %s created.", stream_name())
+        results = await self.provisioner.reconcile(js)
+        logger.info("[NATS] Streams reconciled: %s", results)
 
     async def ensure_stream(self):
         await self._ensure_stream()
 
+    def enable_outbox(self, directory: str) -> EventOutbox:
+        if self.outbox is None:
+            self.outbox = EventOutbox(self.client, FileOutboxStore(directory))
+            self.publisher.outbox = self.outbox
+        self.outbox.start()
+        return self.outbox
+
     def init_app(self, app: FastAPI):
 
         @asynccontextmanager
         async def lifespan(app: FastAPI):
+            if self.outbox_dir:
+                self.enable_outbox(self.outbox_dir)
+
             logger.info("[NATS] Connecting...")
 
             await self.client.connect()
@@ -69,6 +74,12 @@ class NatsModule:
             yield
 
             logger.info("[NATS] Closing...")
+            await self.listener.close()
+            # Flushes queued publishes, then stops the outbox, the ack router
+            # and the client, in that order.
+            await self.publisher.close()
+            if self.outbox is not None:
+                self.outbox.store.close()
             await self.client.close()
 
         app.router.lifespan_context = lifespan
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from smart_common.nats.event_helpers import MSG_ID_HEADER
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxRecord:
+    seq: int
+    subject: str
+    data: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Opaque store position just past this record.
+    position: Any = None
+
+
+class OutboxStore(ABC):
+    """Ordered, durable queue of encoded messages waiting for the broker."""
+
+    @abstractmethod
+    def append(self, subject: str, data: bytes, headers: Dict[str, str]) -> int:
+        """Persist one message and return its sequence number."""
+
+    @abstractmethod
+    def read(self, limit: int) -> List[OutboxRecord]:
+        """Return up to `limit` uncommitted records, oldest first."""
+
+    @abstractmethod
+    def commit(self, record: OutboxRecord) -> None:
+        """Mark `record` and everything before it as delivered."""
+
+    @property
+    @abstractmethod
+    def pending(self) -> int:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class FileOutboxStore(OutboxStore):
+    """Append-only JSON-lines segments plus a cursor file.
+
+    Each line is one message (payload base64-encoded). The cursor holds the
+    last delivered sequence and is replaced atomically; segments are removed
+    once every record in them is behind the cursor. A torn last line left by
+    a crash is skipped on startup.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".log"
+    CURSOR_FILE = "cursor"
+    DEFAULT_SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        *,
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+        fsync: bool = True,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._segments: List[Tuple[int, Path]] = []
+        self._writer = None
+        self._writer_size = 0
+        self._cursor = 0
+        self._last_seq = 0
+        # (segment index, byte offset) of the first uncommitted record.
+        self._read_pos: Tuple[int, int] = (0, 0)
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # OutboxStore
+    # ------------------------------------------------------------------
+
+    @property
+    def pending(self) -> int:
+        return self._last_seq - self._cursor
+
+    def append(self, subject: str, data: bytes, headers: Dict[str, str]) -> int:
+        with self._lock:
+            seq = self._last_seq + 1
+            line = json.dumps(
+                {
+                    "seq": seq,
+                    "subject": subject,
+                    "headers": headers,
+                    "data": base64.b64encode(data).decode("ascii"),
+                },
+                separators=(",", ":"),
+            ).encode("utf-8") + b"\n"
+
+            if self._writer is None or self._writer_size + len(line) > self.segment_max_bytes:
+                self._rotate(seq)
+
+            self._writer.write(line)
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+            self._writer_size += len(line)
+            self._last_seq = seq
+            return seq
+
+    def read(self, limit: int) -> List[OutboxRecord]:
+        with self._lock:
+            records: List[OutboxRecord] = []
+            index, offset = self._read_pos
+
+            while index < len(self._segments) and len(records) < limit:
+                start, path = self._segments[index]
+                with path.open("rb") as handle:
+                    handle.seek(offset)
+                    for raw in handle:
+                        offset += len(raw)
+                        record = self._parse(raw)
+                        if record is None or record.seq <= self._cursor:
+                            continue
+                        record.position = (start, offset)
+                        records.append(record)
+                        if len(records) >= limit:
+                            break
+                if len(records) < limit:
+                    index, offset = index + 1, 0
+
+            return records
+
+    def commit(self, record: OutboxRecord) -> None:
+        with self._lock:
+            if record.seq <= self._cursor:
+                return
+            self._cursor = record.seq
+            self._write_cursor()
+
+            start, offset = record.position
+            index = next(
+                (i for i, (segment_start, _) in enumerate(self._segments) if segment_start == start),
+                0,
+            )
+            if index > 0:
+                # Every segment before the current read segment is delivered.
+                for _, path in self._segments[:index]:
+                    path.unlink(missing_ok=True)
+                self._segments = self._segments[index:]
+                index = 0
+            self._read_pos = (index, offset)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, start_seq: int) -> Path:
+        return self.directory / f"{self.SEGMENT_PREFIX}{start_seq:020d}{self.SEGMENT_SUFFIX}"
+
+    def _rotate(self, start_seq: int) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        path = self._segment_path(start_seq)
+        self._writer = path.open("ab")
+        self._writer_size = path.stat().st_size
+        # The segment may survive from a crash right after a rotation.
+        if not self._segments or self._segments[-1][0] != start_seq:
+            self._segments.append((start_seq, path))
+
+    def _write_cursor(self) -> None:
+        path = self.directory / self.CURSOR_FILE
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as handle:
+            handle.write(str(self._cursor))
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        os.replace(tmp, path)
+
+    def _recover(self) -> None:
+        cursor_path = self.directory / self.CURSOR_FILE
+        if cursor_path.exists():
+            raw = cursor_path.read_text(encoding="utf-8").strip()
+            self._cursor = int(raw or 0)
+
+        for path in sorted(self.directory.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}")):
+            start = int(path.name[len(self.SEGMENT_PREFIX) : -len(self.SEGMENT_SUFFIX)])
+            self._segments.append((start, path))
+
+        # Drop segments that were fully delivered before the last shutdown.
+        while len(self._segments) > 1 and self._segments[1][0] <= self._cursor + 1:
+            self._segments.pop(0)[1].unlink(missing_ok=True)
+
+        self._last_seq = self._cursor
+        if self._segments:
+            # A segment is named after its first seq, so everything before
+            # the newest one is at least start - 1 even when that segment is
+            # empty or torn (crash right after a rotation).
+            self._last_seq = max(self._last_seq, self._segments[-1][0] - 1)
+            for _, path in reversed(self._segments):
+                last = self._max_seq(path)
+                if last is not None:
+                    self._last_seq = max(self._last_seq, last)
+                    break
+            # New appends always start a fresh segment after a restart, so a
+            # torn tail line never ends up glued to the next record.
+            self._writer = None
+
+        if self.pending:
+            logger.warning(
+                "[NATS] Outbox recovered undelivered messages",
+                extra={"directory": str(self.directory), "pending": self.pending},
+            )
+
+    def _max_seq(self, path: Path) -> int | None:
+        last = None
+        with path.open("rb") as handle:
+            for raw in handle:
+                record = self._parse(raw)
+                if record is not None:
+                    last = record.seq if last is None else max(last, record.seq)
+        return last
+
+    @staticmethod
+    def _parse(raw: bytes) -> OutboxRecord | None:
+        try:
+            entry = json.loads(raw)
+            return OutboxRecord(
+                seq=int(entry["seq"]),
+                subject=entry["subject"],
+                data=base64.b64decode(entry["data"]),
+                headers=dict(entry.get("headers") or {}),
+            )
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+class EventOutbox:
+    """Stores messages the broker could not take and replays them in order.
+
+    Replayed messages carry `Nats-Msg-Id`, so JetStream drops any copy that
+    did reach the stream before the connection failed.
+    """
+
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_RETRY_INTERVAL = 1.0
+    MAX_RETRY_INTERVAL = 30.0
+
+    def __init__(
+        self,
+        client,
+        store: OutboxStore,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        retry_interval: float = DEFAULT_RETRY_INTERVAL,
+    ) -> None:
+        self.client = client
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.retry_interval = retry_interval
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> int:
+        return self.store.pending
+
+    async def append(
+        self,
+        subject: str,
+        data: bytes,
+        headers: Dict[str, str] | None = None,
+        *,
+        msg_id: str | None = None,
+    ) -> int:
+        headers = dict(headers or {})
+        if msg_id:
+            headers.setdefault(MSG_ID_HEADER, msg_id)
+        seq = await asyncio.to_thread(self.store.append, subject, data, headers)
+        self._metrics_inc("nats_outbox_appended_total", subject=subject)
+        self._wakeup.set()
+        return seq
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def flush_once(self) -> int:
+        """Replay one batch; returns how many records were delivered."""
+        records = await asyncio.to_thread(self.store.read, self.batch_size)
+        delivered = 0
+        for record in records:
+            await self.client.js.publish(
+                subject=record.subject,
+                payload=record.data,
+                timeout=5.0,
+                headers=record.headers or None,
+            )
+            await asyncio.to_thread(self.store.commit, record)
+            self._metrics_inc("nats_outbox_replayed_total", subject=record.subject)
+            delivered += 1
+        return delivered
+
+    async def _run(self) -> None:
+        delay = self.retry_interval
+        while True:
+            if not self.pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            try:
+                if not self.client.is_ready():
+                    await self.client.ensure_connected()
+                delivered = await self.flush_once()
+                delay = self.retry_interval
+                if delivered:
+                    logger.info(
+                        "[NATS] Outbox replayed messages",
+                        extra={"delivered": delivered, "pending": self.pending},
+                    )
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "[NATS] Outbox replay failed, retrying",
+                    extra={"pending": self.pending, "retry_in": delay, "error": str(exc)},
+                )
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RETRY_INTERVAL)
+
+    def _metrics_inc(self, name: str, **labels: str) -> None:
+        metrics = getattr(self.client, "metrics", None)
+        if metrics is not None:
+            metrics.inc(name, **labels)
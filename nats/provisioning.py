@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from nats.js.api import (
+    AckPolicy,
+    ConsumerConfig,
+    DeliverPolicy,
+    DiscardPolicy,
+    RetentionPolicy,
+    StorageType,
+    StoreCompression,
+    StreamConfig,
+)
+from nats.js.errors import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+Drift = Dict[str, Tuple[Any, Any]]
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _same(current: Any, desired: Any) -> bool:
+    current, desired = _enum_value(current), _enum_value(desired)
+    # The server omits unset optional fields (e.g. compression "none").
+    if current is None and desired in ("none", ""):
+        return True
+    if isinstance(desired, float) or isinstance(current, float):
+        return abs(float(current or 0) - float(desired or 0)) < 1e-3
+    if isinstance(desired, (list, tuple)):
+        return sorted(current or []) == sorted(desired)
+    return current == desired
+
+
+@dataclass(frozen=True)
+class StreamSpec:
+    """Declared JetStream stream. Durations are in seconds; 0/-1 mean unlimited."""
+
+    name: str
+    subjects: Tuple[str, ...]
+    retention: str = "limits"
+    storage: str = "file"
+    discard: str = "old"
+    max_age: float = 0.0
+    max_bytes: int = -1
+    max_msgs: int = -1
+    max_msgs_per_subject: int = -1
+    num_replicas: int = 1
+    duplicate_window: float = 120.0
+    compression: str = "none"
+
+    # The server rejects in-place changes to these.
+    IMMUTABLE = ("storage", "retention")
+    COMPARED = (
+        "subjects",
+        "retention",
+        "storage",
+        "discard",
+        "max_age",
+        "max_bytes",
+        "max_msgs",
+        "max_msgs_per_subject",
+        "num_replicas",
+        "duplicate_window",
+        "compression",
+    )
+
+    def to_config(self) -> StreamConfig:
+        return StreamConfig(
+            name=self.name,
+            subjects=list(self.subjects),
+            retention=RetentionPolicy(self.retention),
+            storage=StorageType(self.storage),
+            discard=DiscardPolicy(self.discard),
+            max_age=self.max_age,
+            max_bytes=self.max_bytes,
+            max_msgs=self.max_msgs,
+            max_msgs_per_subject=self.max_msgs_per_subject,
+            num_replicas=self.num_replicas,
+            duplicate_window=self.duplicate_window,
+            compression=StoreCompression(self.compression),
+        )
+
+    def drift(self, current: StreamConfig) -> Drift:
+        desired = self.to_config()
+        return {
+            name: (getattr(current, name, None), getattr(desired, name))
+            for name in self.COMPARED
+            if not _same(getattr(current, name, None), getattr(desired, name))
+        }
+
+
+@dataclass(frozen=True)
+class ConsumerSpec:
+    """Declared durable pull consumer. `ack_wait` is in seconds."""
+
+    durable: str
+    filter_subject: str | None = None
+    deliver_policy: str = "new"
+    ack_policy: str = "explicit"
+    ack_wait: float = 30.0
+    max_deliver: int = -1
+    max_ack_pending: int = 1000
+    description: str | None = None
+
+    IMMUTABLE = ("deliver_policy", "ack_policy")
+    COMPARED = (
+        "filter_subject",
+        "deliver_policy",
+        "ack_policy",
+        "ack_wait",
+        "max_deliver",
+        "max_ack_pending",
+        "description",
+    )
+
+    def to_config(self) -> ConsumerConfig:
+        return ConsumerConfig(
+            durable_name=self.durable,
+            filter_subject=self.filter_subject,
+            deliver_policy=DeliverPolicy(self.deliver_policy),
+            ack_policy=AckPolicy(self.ack_policy),
+            ack_wait=self.ack_wait,
+            max_deliver=self.max_deliver,
+            max_ack_pending=self.max_ack_pending,
+            description=self.description,
+        )
+
+    def drift(self, current: ConsumerConfig) -> Drift:
+        desired = self.to_config()
+        return {
+            name: (getattr(current, name, None), getattr(desired, name))
+            for name in self.COMPARED
+            if not _same(getattr(current, name, None), getattr(desired, name))
+        }
+
+
+def _split_immutable(drift: Drift, immutable: Iterable[str], context: Dict[str, Any]) -> Drift:
+    blocked = [name for name in immutable if name in drift]
+    if blocked:
+        logger.error(
+            "[NATS] Config drift cannot be applied in place; recreate to change it",
+            extra={
+                **context,
+                "fields": {name: [str(_enum_value(v)) for v in drift[name]] for name in blocked},
+            },
+        )
+    return {name: change for name, change in drift.items() if name not in blocked}
+
+
+async def reconcile_stream(js, spec: StreamSpec) -> str:
+    """Create the stream, or update it in place when its config drifted."""
+    try:
+        info = await js.stream_info(spec.name)
+    except NotFoundError:
+        await js.add_stream(config=spec.to_config())
+        logger.info("[NATS] Stream created", extra={"stream": spec.name})
+        return CREATED
+
+    drift = _split_immutable(
+        spec.drift(info.config), StreamSpec.IMMUTABLE, {"stream": spec.name}
+    )
+    if not drift:
+        logger.info("[NATS] Stream up to date", extra={"stream": spec.name})
+        return UNCHANGED
+
+    config = spec.to_config()
+    # Keep whatever the server has for fields we are not allowed to change.
+    for name in StreamSpec.IMMUTABLE:
+        setattr(config, name, getattr(info.config, name))
+
+    await js.update_stream(config=config)
+    logger.warning(
+        "[NATS] Stream config drift corrected",
+        extra={
+            "stream": spec.name,
+            "changes": {name: [str(_enum_value(v)) for v in change] for name, change in drift.items()},
+        },
+    )
+    return UPDATED
+
+
+async def reconcile_consumer(js, stream: str, spec: ConsumerSpec) -> str:
+    """Create the durable consumer, or update it when its config drifted."""
+    context = {"stream": stream, "durable": spec.durable}
+    try:
+        info = await js.consumer_info(stream, spec.durable)
+    except NotFoundError:
+        await js.add_consumer(stream, config=spec.to_config())
+        logger.info("[NATS] Consumer created", extra=context)
+        return CREATED
+
+    drift = _split_immutable(spec.drift(info.config), ConsumerSpec.IMMUTABLE, context)
+    if not drift:
+        return UNCHANGED
+
+    config = spec.to_config()
+    for name in ConsumerSpec.IMMUTABLE:
+        setattr(config, name, getattr(info.config, name))
+
+    # Adding an existing durable with a new config updates it in place.
+    await js.add_consumer(stream, config=config)
+    logger.warning(
+        "[NATS] Consumer config drift corrected",
+        extra={
+            **context,
+            "changes": {name: [str(_enum_value(v)) for v in change] for name, change in drift.items()},
+        },
+    )
+    return UPDATED
+
+
+async def remove_consumer(js, stream: str, durable: str) -> bool:
+    """Delete a retired durable consumer; False when it does not exist."""
+    try:
+        await js.delete_consumer(stream, durable)
+    except NotFoundError:
+        return False
+    logger.warning("[NATS] Retired consumer deleted", extra={"stream": stream, "durable": durable})
+    return True
+
+
+@dataclass
+class Provisioner:
+    """Reconciles a set of declared streams and their consumers."""
+
+    streams: List[StreamSpec] = field(default_factory=list)
+    consumers: Dict[str, List[ConsumerSpec]] = field(default_factory=dict)
+
+    def add_stream(self, spec: StreamSpec, *consumers: ConsumerSpec) -> None:
+        self.streams.append(spec)
+        self.consumers.setdefault(spec.name, []).extend(consumers)
+
+    async def reconcile(self, js) -> Dict[str, str]:
+        results: Dict[str, str] = {}
+        for spec in self.streams:
+            results[spec.name] = await reconcile_stream(js, spec)
+            for consumer in self.consumers.get(spec.name, ()):
+                results[f"{spec.name}/{consumer.durable}"] = await reconcile_consumer(
+                    js, spec.name, consumer
+                )
+        return results
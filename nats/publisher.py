@@ -1,18 +1,59 @@
 import asyncio
-import json
 import logging
-from typing import Any, Callable, Dict
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
+from smart_common.nats.ack_router import AckRouter
 from smart_common.nats.client import nats_client
+from smart_common.nats.codecs import CodecRegistry, codec_registry
+from smart_common.nats.event_helpers import event_id_of, with_msg_id
+from smart_common.nats.metrics import NatsMetrics, nats_metrics
+from smart_common.nats.outbox import EventOutbox
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _QueuedPublish:
+    subject: str
+    payload: Dict[str, Any]
+    retries: int
+    context: Dict[str, Any]
+    future: asyncio.Future
+
+
 class NatsPublisher:
-    def __init__(self, client):
+    DEFAULT_MAX_IN_FLIGHT = 64
+    DEFAULT_BATCH_SIZE = 128
+    DEFAULT_QUEUE_SIZE = 4096
+
+    def __init__(
+        self,
+        client,
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        outbox: EventOutbox | None = None,
+    ):
         self.client = client
+        # When set, messages the broker cannot take right now are stored
+        # locally and replayed later instead of failing the caller.
+        self.outbox = outbox
         self._closing = False
+        # Guards connection checks/recovery only; JetStream round trips run
+        # concurrently, bounded by `_in_flight`.
         self._publish_lock = asyncio.Lock()
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._delivery_slots = asyncio.Semaphore(self.max_in_flight)
+        self._send_queue: asyncio.Queue[_QueuedPublish] | None = None
+        self._sender_task: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+        self._ack_router: AckRouter | None = None
 
     async def publish(
         self,
@@ -25,76 +66,212 @@ class NatsPublisher:
         if self._closing:
             raise RuntimeError("NATS publisher is shutting down")
 
+        return await self._publish(subject, payload, retries=retries, context=context)
+
+    async def _publish(
+        self,
+        subject: str,
+        payload: Dict[str, Any],
+        *,
+        retries: int,
+        context: Dict[str, Any] | None,
+    ):
         context = context or {}
-        data = json.dumps(payload).encode("utf-8")
+        data, headers = self.codecs.encode(subject, payload)
+        # Retries below reuse the msg-id, so a publish whose ack was lost is
+        # not stored twice.
+        with_msg_id(headers, payload)
         last_error: Exception | None = None
 
+        if self.outbox is not None:
+            # Keep ordering: once anything is waiting in the outbox, newer
+            # messages queue behind it. Never wait on a broker that is down.
+            if self.outbox.pending or not self.client.is_ready():
+                return await self._to_outbox(subject, payload, data, headers, context)
+            retries = 1
+
         for attempt in range(1, retries + 1):
+            if attempt > 1:
+                self.metrics.inc("nats_publish_retries_total", subject=subject)
             if self.client.is_draining():
                 await self._handle_draining_connection(context, subject, attempt)
                 last_error = RuntimeError("NATS connection draining")
                 await asyncio.sleep(self._backoff(attempt))
                 continue
 
-            async with self._publish_lock:
-                if not await self._ensure_ready_for_publish(context, subject, attempt):
-                    last_error = RuntimeError("NATS connection not ready")
-                    await asyncio.sleep(self._backoff(attempt))
-                    continue
+            if not await self._ensure_ready_for_publish(context, subject, attempt):
+                last_error = RuntimeError("NATS connection not ready")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
 
-                try:
-                    logger.info(
-                        "[NATS] Publishing",
-                        extra={
-                            **context,
-                            "subject": subject,
-                            "attempt": attempt,
-                        },
-                    )
-                    js = self.client.js
-                    if not js:
-                        raise RuntimeError("JetStream not initialized")
+            try:
+                logger.info(
+                    "[NATS] Publishing",
+                    extra={
+                        **context,
+                        "subject": subject,
+                        "attempt": attempt,
+                    },
+                )
+                js = self.client.js
+                if not js:
+                    raise RuntimeError("JetStream not initialized")
 
+                async with self._in_flight:
+                    started = time.perf_counter()
                     ack = await js.publish(
                         subject=subject,
                         payload=data,
                         timeout=5.0,
+                        headers=headers,
                     )
+                self._record_publish(subject, data, started)
 
-                    logger.info(
-                        "[NATS] Published",
-                        extra={
-                            **context,
-                            "subject": subject,
-                            "seq": ack.seq,
-                            "payload_bytes": len(data),
-                            "payload": data,
-                        },
-                    )
-                    return ack
-
-                except Exception as exc:
-                    last_error = exc
-                    logger.error(
-                        "[NATS] Publish failed",
-                        extra={
-                            **context,
-                            "subject": subject,
-                            "attempt": attempt,
-                            "error": str(exc),
-                        },
-                    )
-                    if attempt < retries:
-                        await self._recover_connection(exc, context, subject, attempt)
-                        await asyncio.sleep(self._backoff(attempt))
-                    else:
-                        raise
+                logger.info(
+                    "[NATS] Published",
+                    extra={
+                        **context,
+                        "subject": subject,
+                        "seq": ack.seq,
+                        "payload_bytes": len(data),
+                        "payload": data,
+                    },
+                )
+                return ack
+
+            except Exception as exc:
+                last_error = exc
+                self.metrics.inc("nats_published_total", subject=subject, outcome="error")
+                logger.error(
+                    "[NATS] Publish failed",
+                    extra={
+                        **context,
+                        "subject": subject,
+                        "attempt": attempt,
+                        "error": str(exc),
+                    },
+                )
+                if attempt < retries:
+                    await self._recover_connection(exc, context, subject, attempt)
+                    await asyncio.sleep(self._backoff(attempt))
+                elif self.outbox is not None:
+                    return await self._to_outbox(subject, payload, data, headers, context)
+                else:
+                    raise
+
+        if self.outbox is not None:
+            return await self._to_outbox(subject, payload, data, headers, context)
 
         raise Exception(
             f"NATS publish failed after {retries} attempts",
             last_error,
         )
 
+    # ------------------------------------------------------------------
+    # Batched / pipelined publishing
+    # ------------------------------------------------------------------
+
+    async def enqueue(
+        self,
+        subject: str,
+        payload: Dict[str, Any],
+        *,
+        retries: int = 3,
+        context: Dict[str, Any] | None = None,
+    ) -> asyncio.Future:
+        """Queue a message for pipelined publishing.
+
+        Returns a future resolved with the message's own PubAck (or its
+        publish error). Blocks only while the send queue is full.
+        """
+        if self._closing:
+            raise RuntimeError("NATS publisher is shutting down")
+
+        queue = self._ensure_sender()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(
+            _QueuedPublish(
+                subject=subject,
+                payload=payload,
+                retries=retries,
+                context=dict(context or {}),
+                future=future,
+            )
+        )
+        return future
+
+    async def publish_many(
+        self,
+        messages: Iterable[Tuple[str, Dict[str, Any]]],
+        *,
+        retries: int = 3,
+        context: Dict[str, Any] | None = None,
+    ) -> List[Any]:
+        """Publish `(subject, payload)` pairs with up to `max_in_flight`
+        outstanding acks.
+
+        Results keep the input order; each entry is either the PubAck or the
+        exception raised for that message.
+        """
+        futures = [
+            await self.enqueue(subject, payload, retries=retries, context=context)
+            for subject, payload in messages
+        ]
+        return list(await asyncio.gather(*futures, return_exceptions=True))
+
+    async def flush(self) -> None:
+        """Wait until every queued message has been acked or failed."""
+        if self._send_queue is not None:
+            await self._send_queue.join()
+        if self._deliveries:
+            await asyncio.gather(*list(self._deliveries), return_exceptions=True)
+
+    def _ensure_sender(self) -> asyncio.Queue:
+        if self._send_queue is None:
+            self._send_queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.get_running_loop().create_task(
+                self._sender_loop()
+            )
+        return self._send_queue
+
+    async def _sender_loop(self) -> None:
+        queue = self._send_queue
+        assert queue is not None
+
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            for item in batch:
+                await self._delivery_slots.acquire()
+                task = asyncio.get_running_loop().create_task(self._deliver(item))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, item: _QueuedPublish) -> None:
+        try:
+            ack = await self._publish(
+                item.subject,
+                item.payload,
+                retries=item.retries,
+                context=item.context,
+            )
+        except Exception as exc:
+            if not item.future.done():
+                item.future.set_exception(exc)
+        else:
+            if not item.future.done():
+                item.future.set_result(ack)
+        finally:
+            self._delivery_slots.release()
+            if self._send_queue is not None:
+                self._send_queue.task_done()
+
     async def _ensure_ready_for_publish(
         self,
         context: Dict[str, Any],
@@ -104,21 +281,25 @@ class NatsPublisher:
         if self.client.is_ready():
             return True
 
-        try:
-            await self.client.ensure_connected()
-        except Exception as exc:
-            logger.warning(
-                "[NATS] Ensure connected failed",
-                extra={
-                    **context,
-                    "subject": subject,
-                    "attempt": attempt,
-                    "error": str(exc),
-                },
-            )
-            return False
+        async with self._publish_lock:
+            if self.client.is_ready():
+                return True
 
-        return self.client.is_ready()
+            try:
+                await self.client.ensure_connected()
+            except Exception as exc:
+                logger.warning(
+                    "[NATS] Ensure connected failed",
+                    extra={
+                        **context,
+                        "subject": subject,
+                        "attempt": attempt,
+                        "error": str(exc),
+                    },
+                )
+                return False
+
+            return self.client.is_ready()
 
     async def _handle_draining_connection(
         self,
@@ -126,6 +307,7 @@ class NatsPublisher:
         subject: str,
         attempt: int,
     ) -> None:
+        self.metrics.inc("nats_drain_events_total", source="publish")
         logger.warning(
             "[NATS] Connection draining before publish",
             extra={
@@ -148,7 +330,9 @@ class NatsPublisher:
         subject: str,
         attempt: int,
     ) -> None:
-        if self.client.nc and getattr(self.client.nc, "is_closed", False):
+        async with self._publish_lock:
+            if not (self.client.nc and getattr(self.client.nc, "is_closed", False)):
+                return
             try:
                 await self.client.reset_connection()
             except Exception as reset_exc:
@@ -162,14 +346,66 @@ class NatsPublisher:
                     },
                 )
 
+    async def _to_outbox(
+        self,
+        subject: str,
+        payload: Any,
+        data: bytes,
+        headers: Dict[str, str],
+        context: Dict[str, Any],
+    ) -> None:
+        event_id = event_id_of(payload)
+        seq = await self.outbox.append(subject, data, headers, msg_id=event_id)
+        logger.warning(
+            "[NATS] Event stored in outbox",
+            extra={
+                **context,
+                "subject": subject,
+                "event_id": event_id,
+                "outbox_seq": seq,
+                "outbox_pending": self.outbox.pending,
+            },
+        )
+        return None
+
     def _backoff(self, attempt: int) -> float:
         return min(0.3, 0.1 * attempt)
 
+    def _record_publish(self, subject: str, data: bytes, started: float) -> None:
+        metrics = self.metrics
+        metrics.observe("nats_publish_latency_seconds", time.perf_counter() - started, subject=subject)
+        metrics.inc("nats_published_total", subject=subject, outcome="ok")
+        metrics.inc("nats_payload_bytes_total", len(data), subject=subject, direction="out")
+
+    @property
+    def codecs(self) -> CodecRegistry:
+        return getattr(self.client, "codecs", None) or codec_registry
+
+    @property
+    def metrics(self) -> NatsMetrics:
+        return getattr(self.client, "metrics", None) or nats_metrics
+
     async def close(self):
         if self._closing:
             return
         self._closing = True
-        await self.client.close()
+        try:
+            await self.flush()
+        finally:
+            if self._sender_task is not None:
+                self._sender_task.cancel()
+                self._sender_task = None
+            if self.outbox is not None:
+                await self.outbox.stop()
+            if self._ack_router is not None:
+                await self._ack_router.close()
+            await self.client.close()
+
+    @property
+    def ack_router(self) -> AckRouter:
+        if self._ack_router is None:
+            self._ack_router = AckRouter(self.client)
+        return self._ack_router
 
     async def publish_and_wait_for_ack(
         self,
@@ -185,32 +421,27 @@ class NatsPublisher:
         if not js:
             raise RuntimeError("JetStream not initialized")
 
-        data = json.dumps(message).encode("utf-8")
-        future = asyncio.get_event_loop().create_future()
-
-        async def ack_handler(msg):
-            try:
-                payload = json.loads(msg.data.decode())
-
-                if predicate(payload) and not future.done():
-                    future.set_result(payload)
-
-            except Exception as e:
-                if not future.done():
-                    future.set_exception(e)
-
-        sub = await self.client.nc.subscribe(ack_subject, cb=ack_handler)
-
-        await js.publish(subject=subject, payload=data)
+        data, headers = self.codecs.encode(subject, message)
+        with_msg_id(headers, message)
 
+        # Register with the shared ack router before publishing so a fast
+        # ack cannot arrive ahead of its waiter.
+        waiter = await self.ack_router.expect(
+            ack_subject,
+            event_id=message.get("event_id"),
+            predicate=predicate,
+        )
         try:
-            result = await asyncio.wait_for(future, timeout=timeout)
-        except asyncio.TimeoutError:
-            raise Exception("Timeout waiting for ACK")
-        finally:
-            await sub.unsubscribe()
-
-        return result
+            async with self._in_flight:
+                started = time.perf_counter()
+                await js.publish(subject=subject, payload=data, headers=headers)
+        except Exception:
+            self.metrics.inc("nats_published_total", subject=subject, outcome="error")
+            self.ack_router.discard(waiter)
+            raise
+        self._record_publish(subject, data, started)
+
+        return await self.ack_router.wait(waiter, timeout)
 
 
 publisher = NatsPublisher(nats_client)
@@ -1,6 +1,30 @@
-DEVICE_COMM_STREAM = {
-    "name": "device_communication",
-    "subjects": ["device_communication.>"],
-    "retention": "limits",
-    "storage": "file",
-}
+from smart_common.core.config import settings
+from smart_common.nats.event_helpers import stream_name
+from smart_common.nats.provisioning import StreamSpec
+
+# Legacy per-device subjects (see nats/subjects.py). Only the latest few
+# heartbeats/updates per device are worth keeping.
+DEVICE_COMM_STREAM = StreamSpec(
+    name="device_communication",
+    subjects=("device_communication.>",),
+    retention="limits",
+    storage="file",
+    max_age=24 * 3600,
+    max_msgs_per_subject=10,
+)
+
+
+def device_events_stream() -> StreamSpec:
+    """The `<stream>.>` events stream, limits taken from settings."""
+    return StreamSpec(
+        name=stream_name(),
+        subjects=(f"{stream_name()}.>",),
+        retention="limits",
+        storage="file",
+        max_age=settings.NATS_STREAM_MAX_AGE_SECONDS,
+        max_bytes=settings.NATS_STREAM_MAX_BYTES,
+        max_msgs_per_subject=settings.NATS_STREAM_MAX_MSGS_PER_SUBJECT,
+        num_replicas=settings.NATS_STREAM_REPLICAS,
+        duplicate_window=settings.NATS_DUPLICATE_WINDOW_SECONDS,
+        compression=settings.NATS_STREAM_COMPRESSION,
+    )
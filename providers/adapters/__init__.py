@@ -9,6 +9,18 @@ from smart_common.providers.adapters.factory import (
     get_vendor_adapter_factory,
     create_adapter_for_provider,
 )
+from smart_common.providers.adapters.instrumentation import (
+    LabelledMetricsSink,
+    RollingHttpStats,
+    http_instrumentation,
+    http_stats,
+)
+from smart_common.providers.adapters.pool import AdapterPool, adapter_pool
+from smart_common.providers.adapters.resilience import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    circuit_breakers,
+)
 from smart_common.providers.adapters.goodwe import GoodWeProviderAdapter
 from smart_common.providers.adapters.huawei import HuaweiProviderAdapter
 
@@ -17,6 +29,15 @@ __all__ = [
     "BaseProviderAdapter",
     "HuaweiProviderAdapter",
     "GoodWeProviderAdapter",
+    "AdapterPool",
+    "adapter_pool",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "circuit_breakers",
+    "LabelledMetricsSink",
+    "RollingHttpStats",
+    "http_instrumentation",
+    "http_stats",
     "VendorAdapterFactory",
     "get_vendor_adapter_factory",
     "create_adapter_for_provider",
@@ -1,17 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Mapping
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Mapping, Sequence
+from urllib.parse import urlsplit
 
 import requests
 from requests import Session
 
+from smart_common.providers.adapters import transport
+from smart_common.providers.adapters.instrumentation import (
+    HttpCall,
+    http_instrumentation,
+)
+from smart_common.providers.adapters.resilience import (
+    RETRYABLE_STATUSES,
+    CircuitBreaker,
+    backoff_delay,
+    circuit_breakers,
+    retry_after_seconds,
+)
 from smart_common.providers.enums import ProviderKind, ProviderType, ProviderVendor
 from smart_common.providers.exceptions import ProviderFetchError
+from smart_common.providers.metadata_cache import (
+    BaseMetadataCache,
+    account_prefix,
+    get_metadata_cache,
+    metadata_cache_key,
+)
+from smart_common.providers.provider_config.config import provider_settings
+from smart_common.schemas.normalized_measurement import NormalizedMeasurement
 
 logger = logging.getLogger(__name__)
 
+# Connection-level headers requests adds by default; invalid over HTTP/2.
+_HOP_BY_HOP_HEADERS = frozenset({"connection", "keep-alive", "transfer-encoding"})
+
 
 class BaseHttpAdapter:
     """
@@ -21,6 +49,14 @@ class BaseHttpAdapter:
         - base URL construction
         - retries + timeouts
         - connection/session management
+
+    `_request` uses a blocking `requests.Session`; `_arequest` is its async
+    twin on a pooled httpx client (HTTP/2 when available). Both share the
+    session headers and cookie jar, so auth state set by one is seen by the
+    other. Without httpx, `_arequest` runs `_request` in a thread.
+
+    Retries back off exponentially with jitter (or per `Retry-After`), and
+    every endpoint goes through a circuit breaker shared by all adapters.
     """
 
     def __init__(
@@ -45,6 +81,7 @@ class BaseHttpAdapter:
                 **(headers or {}),
             }
         )
+        self._async_client = None
 
     def _request(
         self,
@@ -55,9 +92,27 @@ class BaseHttpAdapter:
         headers: Mapping[str, str] | None = None,
     ) -> requests.Response:
         url = self._url(path)
+        with self._track(method, url) as call:
+            return self._send(method, url, call, json_data=json_data, headers=headers)
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        call: HttpCall,
+        *,
+        json_data: dict | None,
+        headers: Mapping[str, str] | None,
+    ) -> requests.Response:
+        breaker = self._breaker(url)
         last_exc: Exception | None = None
+        delay = 0.0
 
         for attempt in range(1, self.max_retries + 1):
+            if delay:
+                time.sleep(delay)
+            call.attempts = attempt
+            breaker.before_request()
             try:
                 logger.debug(
                     "HTTP request attempt %s/%s",
@@ -73,7 +128,7 @@ class BaseHttpAdapter:
                     if headers
                     else self.session.headers
                 )
-                return self.session.request(
+                response = self.session.request(
                     method,
                     url,
                     json=json_data,
@@ -83,16 +138,30 @@ class BaseHttpAdapter:
 
             except requests.Timeout as exc:
                 last_exc = exc
+                call.last_error = "timeout"
+                breaker.record_failure()
                 logger.warning(
                     "HTTP timeout",
                     extra={"url": url, "attempt": attempt},
                 )
             except requests.RequestException as exc:
                 last_exc = exc
+                call.last_error = "connection"
+                breaker.record_failure()
                 logger.warning(
                     "HTTP request error",
                     extra={"url": url, "attempt": attempt, "error": str(exc)},
                 )
+            else:
+                call.last_error = None
+                call.status_code = response.status_code
+                call.response_bytes = len(response.content)
+                delay = self._settle(breaker, response, url, attempt)
+                if delay is None:
+                    return response
+                continue
+
+            delay = backoff_delay(attempt)
 
         logger.error(
             "HTTP request failed after retries",
@@ -103,11 +172,171 @@ class BaseHttpAdapter:
             details={"error": str(last_exc)},
         )
 
+    async def _arequest(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_data: dict | None = None,
+        headers: Mapping[str, str] | None = None,
+    ):
+        if not transport.async_transport_available():
+            transport.warn_sync_fallback()
+            return await asyncio.to_thread(
+                self._request, method, path, json_data=json_data, headers=headers
+            )
+
+        url = self._url(path)
+        with self._track(method, url) as call:
+            return await self._asend(method, url, call, json_data=json_data, headers=headers)
+
+    async def _asend(
+        self,
+        method: str,
+        url: str,
+        call: HttpCall,
+        *,
+        json_data: dict | None,
+        headers: Mapping[str, str] | None,
+    ):
+        client = self._get_async_client()
+        request_headers = {
+            key: value
+            for key, value in self.session.headers.items()
+            if key.lower() not in _HOP_BY_HOP_HEADERS
+        }
+        request_headers.update(headers or {})
+        breaker = self._breaker(url)
+        last_exc: Exception | None = None
+        delay = 0.0
+
+        for attempt in range(1, self.max_retries + 1):
+            if delay:
+                await asyncio.sleep(delay)
+            call.attempts = attempt
+            breaker.before_request()
+            try:
+                logger.debug(
+                    "HTTP request attempt %s/%s",
+                    attempt,
+                    self.max_retries,
+                    extra={
+                        "method": method,
+                        "url": url,
+                    },
+                )
+                response = await client.request(
+                    method,
+                    url,
+                    json=json_data,
+                    headers=request_headers,
+                )
+
+            except transport.httpx.TimeoutException as exc:
+                last_exc = exc
+                call.last_error = "timeout"
+                breaker.record_failure()
+                logger.warning(
+                    "HTTP timeout",
+                    extra={"url": url, "attempt": attempt},
+                )
+            except transport.httpx.HTTPError as exc:
+                last_exc = exc
+                call.last_error = "connection"
+                breaker.record_failure()
+                logger.warning(
+                    "HTTP request error",
+                    extra={"url": url, "attempt": attempt, "error": str(exc)},
+                )
+            else:
+                call.last_error = None
+                call.status_code = response.status_code
+                call.response_bytes = len(response.content)
+                delay = self._settle(breaker, response, url, attempt)
+                if delay is None:
+                    return response
+                continue
+
+            delay = backoff_delay(attempt)
+
+        logger.error(
+            "HTTP request failed after retries",
+            extra={"url": url, "retries": self.max_retries},
+        )
+        raise ProviderFetchError(
+            "HTTP request failed after retries",
+            details={"error": str(last_exc)},
+        )
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            self._async_client = transport.httpx.AsyncClient(
+                transport=transport.HostRoutingTransport(),
+                cookies=self.session.cookies,
+                timeout=self.timeout,
+            )
+        return self._async_client
+
+    def _track(self, method: str, url: str):
+        vendor = getattr(self, "vendor", None)
+        return http_instrumentation.track(
+            vendor.value if vendor is not None else type(self).__name__,
+            urlsplit(url).path or "/",
+            method,
+        )
+
+    @staticmethod
+    def _breaker(url: str) -> CircuitBreaker:
+        return circuit_breakers.for_url(url)
+
+    def _settle(self, breaker: CircuitBreaker, response, url: str, attempt: int) -> float | None:
+        """Record the outcome; return the delay before retrying, or None
+        when `response` should be returned to the caller."""
+        if response.status_code < 500 and response.status_code != 429:
+            breaker.record_success()
+            return None
+
+        retry_after = retry_after_seconds(response)
+        breaker.record_failure(retry_after)
+        if (
+            response.status_code not in RETRYABLE_STATUSES
+            or attempt >= self.max_retries
+            or (retry_after or 0) > provider_settings.HTTP_RETRY_AFTER_MAX
+        ):
+            return None
+
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        logger.warning(
+            "HTTP retryable status",
+            extra={
+                "url": url,
+                "attempt": attempt,
+                "status_code": response.status_code,
+                "retry_in": round(delay, 3),
+            },
+        )
+        return delay
+
+    @staticmethod
+    def _is_ok(response) -> bool:
+        """`requests.Response.ok` for both requests and httpx responses."""
+        return response.status_code < 400
+
     def _url(self, path: str) -> str:
+        if "://" in path:
+            return path
         return f"{self.base_url}/{path.lstrip('/')}"
 
     def close(self) -> None:
         self.session.close()
+        # The pooled connections are shared; dropping the client is enough.
+        self._async_client = None
+
+    async def aclose(self) -> None:
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+        self.session.close()
 
 
 class BaseProviderAdapter(BaseHttpAdapter, ABC):
@@ -124,6 +353,15 @@ class BaseProviderAdapter(BaseHttpAdapter, ABC):
     vendor: ProviderVendor | None = None
     kind: ProviderKind | None = None
 
+    # Devices a single `fetch_measurements` request may cover; 1 means the
+    # vendor has no multi-device endpoint.
+    measurement_batch_size: int = 1
+
+    # Longest range and most devices one `fetch_history` request may cover;
+    # no window means the vendor has no history endpoint.
+    history_window: timedelta | None = None
+    history_batch_size: int = 1
+
     def __init__(
         self,
         base_url: str,
@@ -150,9 +388,142 @@ class BaseProviderAdapter(BaseHttpAdapter, ABC):
     def get_current_power(self, device_id: str) -> float:
         raise NotImplementedError(f"{self.vendor} does not support power readings")
 
-    def fetch_measurement(self) -> Any:  # type: ignore[override]
+    def fetch_measurement(self) -> NormalizedMeasurement:
         raise NotImplementedError(f"{self.vendor} does not support measurements")
 
+    def fetch_measurements(
+        self, device_ids: Sequence[str]
+    ) -> dict[str, NormalizedMeasurement]:
+        """Measurements for many devices of this account, keyed by device id.
+
+        Devices the vendor returned nothing for are left out.
+        """
+        raise NotImplementedError(f"{self.vendor} does not support batched measurements")
+
+    def fetch_history(
+        self, device_ids: Sequence[str], start: datetime, end: datetime
+    ) -> dict[str, list[NormalizedMeasurement]]:
+        """Historical measurements in [start, end) keyed by device id, oldest
+        first. The range must fit in `history_window`.
+        """
+        raise NotImplementedError(f"{self.vendor} does not support measurement history")
+
+    # ------------------------------------------------------------------
+    # Async capabilities
+    #
+    # Default to running the sync method in a worker thread; adapters
+    # with native async I/O override these.
+    # ------------------------------------------------------------------
+
+    async def alist_stations(self) -> list[Mapping[str, Any]]:
+        return await asyncio.to_thread(self.list_stations)
+
+    async def alist_devices(self, station_code: str) -> list[Mapping[str, Any]]:
+        return await asyncio.to_thread(self.list_devices, station_code)
+
+    async def aget_current_power(self, device_id: str) -> float:
+        return await asyncio.to_thread(self.get_current_power, device_id)
+
+    async def afetch_measurement(self) -> NormalizedMeasurement:
+        return await asyncio.to_thread(self.fetch_measurement)
+
+    async def afetch_measurements(
+        self, device_ids: Sequence[str]
+    ) -> dict[str, NormalizedMeasurement]:
+        return await asyncio.to_thread(self.fetch_measurements, device_ids)
+
+    async def afetch_history(
+        self, device_ids: Sequence[str], start: datetime, end: datetime
+    ) -> dict[str, list[NormalizedMeasurement]]:
+        return await asyncio.to_thread(self.fetch_history, device_ids, start, end)
+
+    # ------------------------------------------------------------------
+    # Metadata cache
+    #
+    # Station/device lists change rarely but cost vendor quota; they are
+    # cached per account and endpoint. Loaders must return JSON data.
+    # ------------------------------------------------------------------
+
+    @property
+    def metadata_cache(self) -> BaseMetadataCache:
+        return getattr(self, "_metadata_cache", None) or get_metadata_cache()
+
+    @metadata_cache.setter
+    def metadata_cache(self, cache: BaseMetadataCache | None) -> None:
+        self._metadata_cache = cache
+
+    def _metadata_account(self) -> str:
+        # The password digest is part of the account: wizard auth steps use
+        # a cached list call as their credential check, so a wrong password
+        # must never hit the entry cached for the right one.
+        return f"{self.base_url}|{getattr(self, 'username', '')}|{self._password_digest()}"
+
+    def _password_digest(self) -> str:
+        password = getattr(self, "password", None) or ""
+        return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+    def _metadata_key(self, endpoint: str, params: Mapping[str, Any] | None) -> str:
+        vendor = self.vendor.value if self.vendor else type(self).__name__
+        return metadata_cache_key(vendor, self._metadata_account(), endpoint, params)
+
+    def _cached_metadata(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any] | None,
+        load: Callable[[], Any],
+    ) -> Any:
+        if not provider_settings.METADATA_CACHE_ENABLED:
+            return load()
+
+        key = self._metadata_key(endpoint, params)
+        cached = self.metadata_cache.get(key)
+        if cached is not None:
+            logger.debug("Metadata cache hit", extra={"endpoint": endpoint})
+            return cached
+
+        value = load()
+        self.metadata_cache.set(key, value, provider_settings.METADATA_CACHE_TTL_SECONDS)
+        return value
+
+    async def _acached_metadata(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any] | None,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if not provider_settings.METADATA_CACHE_ENABLED:
+            return await load()
+
+        cache = self.metadata_cache
+        key = self._metadata_key(endpoint, params)
+        if cache.blocking_io:
+            cached = await asyncio.to_thread(cache.get, key)
+        else:
+            cached = cache.get(key)
+        if cached is not None:
+            logger.debug("Metadata cache hit", extra={"endpoint": endpoint})
+            return cached
+
+        value = await load()
+        ttl = provider_settings.METADATA_CACHE_TTL_SECONDS
+        if cache.blocking_io:
+            await asyncio.to_thread(cache.set, key, value, ttl)
+        else:
+            cache.set(key, value, ttl)
+        return value
+
+    def invalidate_metadata(
+        self,
+        endpoint: str | None = None,
+        params: Mapping[str, Any] | None = None,
+    ) -> int:
+        """Drop cached metadata of this account: one endpoint, or all of it."""
+        if endpoint is not None:
+            self.metadata_cache.delete(self._metadata_key(endpoint, params))
+            return 1
+        vendor = self.vendor.value if self.vendor else type(self).__name__
+        return self.metadata_cache.delete_prefix(account_prefix(vendor, self._metadata_account()))
+
     def normalize_station(self, raw: Mapping[str, Any]) -> Mapping[str, Any]:
         return raw
 
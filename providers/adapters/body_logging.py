@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+from typing import Any, Mapping
+
+from smart_common.providers.provider_config.config import provider_settings
+
+REDACTED = "***"
+
+# Compared lower-case; covers Huawei (systemCode, XSRF-TOKEN) and GoodWe
+# (pwd, token) credentials as well as generic auth headers.
+SECRET_KEYS = frozenset(
+    {
+        "systemcode",
+        "pwd",
+        "password",
+        "token",
+        "access_token",
+        "refresh_token",
+        "xsrf-token",
+        "authorization",
+        "cookie",
+        "set-cookie",
+    }
+)
+
+# Fallback for bodies that are not valid JSON (e.g. already truncated).
+_SECRET_PAIR = re.compile(
+    r'("(?:' + "|".join(re.escape(k) for k in SECRET_KEYS) + r')"\s*:\s*)"[^"]*"',
+    re.IGNORECASE,
+)
+
+
+def redact(value: Any) -> Any:
+    """Copy of `value` with secret-looking keys masked at any depth."""
+    if isinstance(value, Mapping):
+        return {
+            key: REDACTED if str(key).lower() in SECRET_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _render(body: Any, limit: int) -> str:
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode("utf-8", errors="replace")
+    if isinstance(body, str):
+        stripped = body.lstrip()
+        if stripped[:1] in ("{", "["):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                body = _SECRET_PAIR.sub(rf'\1"{REDACTED}"', body)
+    if not isinstance(body, str):
+        body = json.dumps(redact(body), ensure_ascii=False, default=str)
+    if len(body) > limit:
+        return f"{body[:limit]}…(+{len(body) - limit} chars)"
+    return body
+
+
+def render_body(body: Any, limit: int | None = None) -> str:
+    """Redacted and truncated text of a request/response body."""
+    return _render(body, limit or provider_settings.ADAPTER_BODY_LOG_MAX_CHARS)
+
+
+class LazyBody:
+    """Defers redaction, truncation and encoding of a body to the moment a
+    handler actually formats the log record."""
+
+    __slots__ = ("_body", "_limit")
+
+    def __init__(self, body: Any, limit: int | None = None) -> None:
+        self._body = body
+        self._limit = limit
+
+    def __str__(self) -> str:
+        return render_body(self._body, self._limit)
+
+    __repr__ = __str__
+
+
+def body_log_enabled(logger: logging.Logger) -> bool:
+    """Bodies are logged at DEBUG, or for a sampled share of requests."""
+    if logger.isEnabledFor(logging.DEBUG):
+        return True
+    rate = provider_settings.ADAPTER_BODY_LOG_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def body_extra(logger: logging.Logger, **bodies: Any) -> dict[str, Any]:
+    """`extra` entries for the given bodies, or nothing when they should not
+    be logged. Bodies stay unformatted until the record is emitted."""
+    if not bodies or not body_log_enabled(logger):
+        return {}
+    return {name: LazyBody(body) for name, body in bodies.items()}
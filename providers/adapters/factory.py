@@ -2,28 +2,39 @@ from __future__ import annotations
 
 import logging
 from inspect import Parameter, signature
-from typing import Any, Mapping, Tuple
+from typing import TYPE_CHECKING, Any, Mapping
 
 from cryptography.fernet import InvalidToken
 
 from smart_common.core.security import decrypt_secret
-from smart_common.models.provider import Provider
 from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.adapters.pool import (
+    AdapterPool,
+    adapter_pool,
+    credential_fingerprint,
+)
 from smart_common.providers.definitions import registry as _  # ensure definitions register
 from smart_common.providers.definitions.base import ProviderDefinition, ProviderDefinitionRegistry
 from smart_common.providers.enums import ProviderVendor
 from smart_common.providers.exceptions import ProviderConfigError, ProviderNotSupportedError
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:  # models.provider imports providers.enums, which loads this module
+    from smart_common.models.provider import Provider
 
-_ADAPTER_CACHE: dict[Tuple[ProviderVendor, str], BaseProviderAdapter] = {}
+logger = logging.getLogger(__name__)
 
 
 class VendorAdapterFactory:
-    """Creates provider adapters and keeps them cached per session key."""
+    """Creates provider adapters and keeps them pooled per session key."""
 
-    def __init__(self, definitions: Mapping[ProviderVendor, ProviderDefinition]):
+    def __init__(
+        self,
+        definitions: Mapping[ProviderVendor, ProviderDefinition],
+        *,
+        pool: AdapterPool | None = None,
+    ):
         self._definitions = definitions
+        self.pool = pool or adapter_pool
 
     def create(
         self,
@@ -33,19 +44,21 @@ class VendorAdapterFactory:
         cache_key: str,
         overrides: Mapping[str, Any] | None = None,
     ) -> BaseProviderAdapter:
-        cache_id = (vendor, cache_key)
-        cached = _ADAPTER_CACHE.get(cache_id)
-        if cached:
-            logger.debug(
-                "Using cached provider adapter",
-                extra={
-                    "vendor": vendor.value,
-                    "cache_key": cache_key,
-                    "adapter": type(cached).__name__,
-                },
-            )
-            return cached
+        # Changed credentials or overrides yield a new fingerprint, which
+        # replaces (and closes) the adapter built from the old ones.
+        return self.pool.get_or_create(
+            (vendor, cache_key),
+            credential_fingerprint(credentials, overrides),
+            lambda: self._build(vendor, credentials, cache_key, overrides),
+        )
 
+    def _build(
+        self,
+        vendor: ProviderVendor,
+        credentials: Mapping[str, Any],
+        cache_key: str,
+        overrides: Mapping[str, Any] | None,
+    ) -> BaseProviderAdapter:
         definition = self._definitions.get(vendor)
         if not definition or not definition.adapter_cls:
             raise ProviderNotSupportedError(vendor.value)
@@ -74,7 +87,6 @@ class VendorAdapterFactory:
             )
             raise
 
-        _ADAPTER_CACHE[cache_id] = adapter
         logger.info(
             "Created provider adapter instance",
             extra={
@@ -86,8 +98,12 @@ class VendorAdapterFactory:
 
         return adapter
 
+    def adapter_class(self, vendor: ProviderVendor) -> type[BaseProviderAdapter] | None:
+        definition = self._definitions.get(vendor)
+        return definition.adapter_cls if definition else None
+
     def clear_cache(self) -> None:
-        _ADAPTER_CACHE.clear()
+        self.pool.clear()
         logger.warning("Provider adapter cache cleared")
 
     @staticmethod
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import threading
 
-from datetime import datetime, timezone
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any, Mapping
 
 from smart_common.enums.unit import PowerUnit
 from smart_common.providers.adapters.utils import _parse_watt
 from smart_common.schemas.normalized_measurement import NormalizedMeasurement
 from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.adapters.body_logging import render_body
 from smart_common.providers.enums import ProviderKind, ProviderType, ProviderVendor
 from smart_common.providers.exceptions import ProviderError, ProviderFetchError
 from smart_common.providers.provider_config.goodwe import goodwe_integration_settings
@@ -18,6 +22,26 @@ logger = logging.getLogger(__name__)
 
 EXTRA_ENERGY_GRID_STATUS = -1
 
+# SEMS codes for a missing or expired login ("No access, please log in",
+# "Authorization has expired").
+AUTH_ERROR_CODES = frozenset({100001, 100002})
+
+
+@dataclass(frozen=True)
+class _SemsSession:
+    token_ctx: dict[str, Any]
+    api_base_url: str
+    expires_at: datetime
+
+    @property
+    def expired(self) -> bool:
+        return datetime.now(timezone.utc) >= self.expires_at
+
+
+# Login tokens shared by every adapter of the same account in this process.
+_SESSIONS: dict[tuple[str, str, str], _SemsSession] = {}
+_SESSIONS_LOCK = threading.Lock()
+
 
 class GoodWeProviderAdapter(BaseProviderAdapter):
     provider_type = ProviderType.API
@@ -45,6 +69,8 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
 
         self._logged_in = False
         self._token_ctx: dict[str, Any] | None = None
+        self._token_expires_at: datetime | None = None
+        self._login_lock: asyncio.Lock | None = None
 
         self._external_id: str | None = None
         self._powerstation_ids: list[str] | None = None
@@ -56,8 +82,38 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
     def authenticate(self) -> None:
         self._authenticate()
 
+    def _ensure_token(self) -> None:
+        if self._needs_login() and not self._adopt_shared_session():
+            self._authenticate()
+
+    async def _aensure_token(self) -> None:
+        if not self._needs_login():
+            return
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            # Another task may have logged in while we waited.
+            if self._needs_login() and not self._adopt_shared_session():
+                await self._aauthenticate()
+
+    def _needs_login(self) -> bool:
+        return (
+            not self._logged_in
+            or self._token_expires_at is None
+            or datetime.now(timezone.utc) >= self._token_expires_at
+        )
+
     def _authenticate(self) -> None:
+        url, headers, body = self._login_request()
+        response = self._request("POST", url, json_data=body, headers=headers)
+        self._handle_login_response(response)
 
+    async def _aauthenticate(self) -> None:
+        url, headers, body = self._login_request()
+        response = await self._arequest("POST", url, json_data=body, headers=headers)
+        self._handle_login_response(response)
+
+    def _login_request(self) -> tuple[str, dict[str, str], dict[str, str]]:
         headers = {
             "Content-Type": "application/json;charset=UTF-8",
             "Accept": "application/json, text/plain, */*",
@@ -77,24 +133,16 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
             "pwd": self.password,
         }
 
-        old_base_url = self.base_url
-        try:
-            self.base_url = self._login_base_url
-            response = self._request(
-                "POST",
-                "/api/v2/Common/CrossLogin",
-                json_data=body,
-                headers=headers,
-            )
-        finally:
-            self.base_url = old_base_url
+        # Absolute URL: login lives on the portal host, not the API host.
+        return f"{self._login_base_url}/api/v2/Common/CrossLogin", headers, body
 
+    def _handle_login_response(self, response) -> None:
         try:
             payload = response.json()
         except ValueError as exc:
             raise ProviderFetchError(
                 message="Invalid JSON from GoodWe login",
-                details={"body": response.text},
+                details={"body": render_body(response.content)},
             ) from exc
 
         if payload.get("code") != 0:
@@ -112,21 +160,62 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
                 details={"response": payload},
             )
 
-        self._api_base_url = api_base.rstrip("/")
-        self.base_url = self._api_base_url
+        session = _SemsSession(
+            token_ctx={
+                "uid": data["uid"],
+                "timestamp": data["timestamp"],
+                "token": data["token"],
+                "client": "web",
+                "language": data.get("language", "zh_CN"),
+                "ver": self.SEMS_VER,
+            },
+            api_base_url=api_base.rstrip("/"),
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(seconds=goodwe_integration_settings.GOODWE_TOKEN_TTL_SECONDS),
+        )
+        self._apply_session(session)
+        with _SESSIONS_LOCK:
+            _SESSIONS[self._session_key()] = session
 
-        self._token_ctx = {
-            "uid": data["uid"],
-            "timestamp": data["timestamp"],
-            "token": data["token"],
-            "client": "web",
-            "language": data.get("language", "zh_CN"),
-            "ver": self.SEMS_VER,
-        }
+        logger.info("[GOODWE LOGIN OK]", extra={"uid": data["uid"]})
 
+    # ------------------------------------------------------------------
+    # SHARED SESSION
+    # ------------------------------------------------------------------
+
+    def _session_key(self) -> tuple[str, str, str]:
+        # The password is part of the key so a changed password never
+        # reuses a token issued for the old one.
+        return self._login_base_url, self.username, self._password_digest()
+
+    def _apply_session(self, session: _SemsSession) -> None:
+        self._api_base_url = session.api_base_url
+        self.base_url = session.api_base_url
+        self._token_ctx = dict(session.token_ctx)
+        self._token_expires_at = session.expires_at
         self._logged_in = True
 
-        logger.info("[GOODWE LOGIN OK]", extra={"uid": data["uid"]})
+    def _adopt_shared_session(self) -> bool:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(self._session_key())
+        if session is None or session.expired:
+            return False
+
+        self._apply_session(session)
+        logger.debug("[GOODWE TOKEN REUSED]", extra={"uid": session.token_ctx.get("uid")})
+        return True
+
+    def _invalidate_token(self) -> None:
+        rejected = self._token_ctx
+        self._logged_in = False
+        self._token_ctx = None
+        self._token_expires_at = None
+
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(self._session_key())
+            # Leave a token that another adapter has already refreshed.
+            if session is not None and session.token_ctx == rejected:
+                del _SESSIONS[self._session_key()]
 
     # ------------------------------------------------------------------
     # TOKEN
@@ -143,25 +232,80 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
     # ------------------------------------------------------------------
 
     def _post(self, path: str, payload: Mapping[str, Any]) -> Any:
-        self._authenticate()
+        self._ensure_token()
 
-        if not self._api_base_url:
-            raise ProviderError(message="GoodWe API base URL not set")
+        response = self._request(
+            "POST",
+            path,
+            json_data=dict(payload),
+            headers=self._api_headers(),
+        )
+        if self._is_auth_error(response):
+            self._log_token_rejected(path, response)
+            self._invalidate_token()
+            self._ensure_token()
+            response = self._request(
+                "POST",
+                path,
+                json_data=dict(payload),
+                headers=self._api_headers(),
+            )
+        return self._parse_api_response(path, response)
 
-        body = dict(payload)
+    async def _apost(self, path: str, payload: Mapping[str, Any]) -> Any:
+        await self._aensure_token()
 
-        response = self._request(
+        response = await self._arequest(
             "POST",
             path,
-            json_data=body,
-            headers={
-                "Content-Type": "application/json;charset=UTF-8",
-                "Accept": "application/json, text/plain, */*",
-                "User-Agent": "Mozilla/5.0",
-                "Token": self._token_header(),
+            json_data=dict(payload),
+            headers=self._api_headers(),
+        )
+        if self._is_auth_error(response):
+            self._log_token_rejected(path, response)
+            self._invalidate_token()
+            await self._aensure_token()
+            response = await self._arequest(
+                "POST",
+                path,
+                json_data=dict(payload),
+                headers=self._api_headers(),
+            )
+        return self._parse_api_response(path, response)
+
+    @staticmethod
+    def _is_auth_error(response) -> bool:
+        try:
+            code = response.json().get("code")
+        except (ValueError, AttributeError):
+            return False
+        try:
+            return int(code) in AUTH_ERROR_CODES
+        except (TypeError, ValueError):
+            return False
+
+    def _log_token_rejected(self, path: str, response) -> None:
+        logger.warning(
+            "[GOODWE TOKEN REJECTED] → re-login",
+            extra={
+                "path": path,
+                "code": response.json().get("code"),
+                "uid": (self._token_ctx or {}).get("uid"),
             },
         )
 
+    def _api_headers(self) -> dict[str, str]:
+        if not self._api_base_url:
+            raise ProviderError(message="GoodWe API base URL not set")
+
+        return {
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json, text/plain, */*",
+            "User-Agent": "Mozilla/5.0",
+            "Token": self._token_header(),
+        }
+
+    def _parse_api_response(self, path: str, response) -> Any:
         data = response.json()
         if data.get("code") not in (0, "0", None):
             raise ProviderError(
@@ -183,28 +327,68 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
         if self._powerstation_ids is not None:
             return self._powerstation_ids
 
-        data = self._post(
-            "/PowerStation/GetPowerStationIdByOwner",
-            {},
+        ids = self._cached_metadata(
+            "GetPowerStationIdByOwner",
+            None,
+            lambda: self._parse_powerstation_ids(
+                self._post("/PowerStation/GetPowerStationIdByOwner", {})
+            ),
         )
+        return self._store_powerstation_ids(ids)
+
+    async def aget_powerstation_ids(self) -> list[str]:
+        if self._powerstation_ids is not None:
+            return self._powerstation_ids
 
+        async def load() -> list[str]:
+            return self._parse_powerstation_ids(
+                await self._apost("/PowerStation/GetPowerStationIdByOwner", {})
+            )
+
+        ids = await self._acached_metadata("GetPowerStationIdByOwner", None, load)
+        return self._store_powerstation_ids(ids)
+
+    def _parse_powerstation_ids(self, data: Any) -> list[str]:
         ids = self._collect_powerstation_ids(data)
         if not ids:
             raise ProviderError(
                 message="No PowerStation IDs returned by GoodWe",
                 details={"data": data},
             )
+        return list(dict.fromkeys(ids))
 
-        self._powerstation_ids = list(dict.fromkeys(ids))
+    def _store_powerstation_ids(self, ids: list[str]) -> list[str]:
+        self._powerstation_ids = ids
         self._external_id = self._powerstation_ids[0]
         return self._powerstation_ids
 
+    def invalidate_metadata(
+        self,
+        endpoint: str | None = None,
+        params: Mapping[str, Any] | None = None,
+    ) -> int:
+        self._powerstation_ids = None
+        return super().invalidate_metadata(endpoint, params)
+
+    def _metadata_account(self) -> str:
+        # base_url switches to the API host after login; key on the portal.
+        return f"{self._login_base_url}|{self.username}|{self._password_digest()}"
+
     def get_current_export_power(self, power_station_id: str) -> float:
         data = self._post(
             "/v2/PowerStation/GetPowerflow",
             {"PowerStationId": power_station_id},
         )
+        return self._parse_export_power(data)
+
+    async def aget_current_export_power(self, power_station_id: str) -> float:
+        data = await self._apost(
+            "/v2/PowerStation/GetPowerflow",
+            {"PowerStationId": power_station_id},
+        )
+        return self._parse_export_power(data)
 
+    def _parse_export_power(self, data: Any) -> float:
         if not isinstance(data, dict):
             return 0.0
 
@@ -230,12 +414,22 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
     def get_current_power(self, device_id: str) -> float:
         return self.get_current_export_power(device_id)
 
+    async def aget_current_power(self, device_id: str) -> float:
+        return await self.aget_current_export_power(device_id)
+
     def fetch_measurement(self) -> NormalizedMeasurement:
         if not self._external_id:
             self.get_powerstation_ids()
 
-        value = self.get_current_power(self._external_id)
+        return self._build_measurement(self.get_current_power(self._external_id))
+
+    async def afetch_measurement(self) -> NormalizedMeasurement:
+        if not self._external_id:
+            await self.aget_powerstation_ids()
 
+        return self._build_measurement(await self.aget_current_power(self._external_id))
+
+    def _build_measurement(self, value: float) -> NormalizedMeasurement:
         return NormalizedMeasurement(
             provider_id=getattr(self, "provider_id", 0),
             value=value,
@@ -254,6 +448,15 @@ class GoodWeProviderAdapter(BaseProviderAdapter):
             for sid in self.get_powerstation_ids()
         ]
 
+    async def alist_stations(self) -> list[Mapping[str, Any]]:
+        return [
+            {"station_id": sid, "external_id": sid}
+            for sid in await self.aget_powerstation_ids()
+        ]
+
+    async def alist_devices(self, station_code: str) -> list[Mapping[str, Any]]:
+        return self.list_devices(station_code)
+
     def list_devices(self, station_code: str) -> list[Mapping[str, Any]]:
         return [{"device_id": station_code, "external_id": station_code}]
 
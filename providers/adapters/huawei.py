@@ -1,13 +1,15 @@
 # smart_common/providers/adapters/huawei.py
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any, Mapping
+from typing import Any, Mapping, Sequence
 
 from smart_common.enums.unit import PowerUnit
 from smart_common.schemas.normalized_measurement import NormalizedMeasurement
 from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.adapters.body_logging import body_extra, render_body
 from smart_common.providers.exceptions import ProviderError, ProviderFetchError
 from smart_common.providers.enums import ProviderKind, ProviderType, ProviderVendor
 from smart_common.providers.provider_config.config import provider_settings
@@ -20,6 +22,12 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
     vendor = ProviderVendor.HUAWEI
     kind = ProviderKind.POWER
 
+    # getDevRealKpi accepts up to 100 comma-separated devIds.
+    measurement_batch_size = 100
+    # getDevHistoryKpi: up to 10 devIds and 3 days per request, 5-minute samples.
+    history_batch_size = 10
+    history_window = timedelta(days=3)
+
     def __init__(
         self,
         username: str,
@@ -40,6 +48,7 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
         self.password = password
         self._logged_in = False
         self._token_expires_at: datetime | None = None
+        self._login_lock: asyncio.Lock | None = None
 
     # ------------------------------------------------------------------
     # Login handling
@@ -51,26 +60,27 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
             and datetime.now(timezone.utc) >= self._token_expires_at
         )
 
+    def _needs_login(self) -> bool:
+        return not self._logged_in or self._is_expired()
+
     def _ensure_login(self) -> None:
-        if not self._logged_in or self._is_expired():
+        if self._needs_login():
             logger.info("Huawei login required", extra=self._log_context())
             self._login()
 
-    def _login(self) -> None:
-        logger.info("Huawei login start", extra=self._log_context())
+    async def _aensure_login(self) -> None:
+        if not self._needs_login():
+            return
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            # Another task may have logged in while we waited.
+            if self._needs_login():
+                logger.info("Huawei login required", extra=self._log_context())
+                await self._alogin()
 
-        payload = {
-            "userName": self.username,
-            "systemCode": self.password,
-        }
-        logger.info(
-            "Huawei login request",
-            extra={
-                **self._log_context(),
-                "endpoint": "login",
-                "payload": payload,
-            },
-        )
+    def _login(self) -> None:
+        payload = self._login_payload()
         try:
             response = self._request(
                 "POST",
@@ -86,22 +96,61 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
                 details={"error": str(exc)},
             ) from exc
 
+        self._handle_login_response(response)
+
+    async def _alogin(self) -> None:
+        payload = self._login_payload()
+        try:
+            response = await self._arequest(
+                "POST",
+                "login",
+                json_data=payload,
+            )
+        except ProviderFetchError:
+            raise
+        except Exception as exc:
+            logger.exception("Huawei login unexpected error")
+            raise ProviderFetchError(
+                "Huawei login failed",
+                details={"error": str(exc)},
+            ) from exc
+
+        self._handle_login_response(response)
+
+    def _login_payload(self) -> dict:
+        logger.info("Huawei login start", extra=self._log_context())
+
+        payload = {
+            "userName": self.username,
+            "systemCode": self.password,
+        }
+        logger.info(
+            "Huawei login request",
+            extra={
+                **self._log_context(),
+                "endpoint": "login",
+                **body_extra(logger, payload=payload),
+            },
+        )
+        return payload
+
+    def _handle_login_response(self, response) -> None:
         logger.info(
             "Huawei login response",
             extra={
                 **self._log_context(),
                 "status_code": response.status_code,
-                "ok": response.ok,
-                "body": response.text,
+                "ok": self._is_ok(response),
+                **body_extra(logger, body=response.content),
             },
         )
 
-        if not response.ok:
+        if not self._is_ok(response):
             raise ProviderError(
                 message="Huawei authentication failed",
                 status_code=response.status_code,
                 code="HUAWEI_AUTH_FAILED",
-                details={"body": response.text},
+                details={"body": render_body(response.content)},
             )
 
         result = response.json()
@@ -136,71 +185,93 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
 
     def _post(self, endpoint: str, payload: dict | None = None) -> dict:
         self._ensure_login()
-        safe_payload = payload or {}
+        safe_payload = self._log_api_request(endpoint, payload)
+
+        response = self._request(
+            "POST",
+            endpoint,
+            json_data=safe_payload,
+        )
+        self._log_api_response("Huawei API response", endpoint, response)
+
+        if response.status_code == 401:
+            logger.warning("Huawei 401 → re-login")
+            self._login()
+            response = self._request("POST", endpoint, json_data=safe_payload)
+            self._log_api_response("Huawei API response (after relogin)", endpoint, response)
+
+        result = response.json()
+
+        if self._must_relogin(result):
+            logger.warning("Huawei USER_MUST_RELOGIN → re-login")
+            self._login()
+            response = self._request("POST", endpoint, json_data=safe_payload)
+            result = response.json()
+            self._log_api_response("Huawei API response (USER_MUST_RELOGIN)", endpoint, response)
+
+        return self._check_result(result)
+
+    async def _apost(self, endpoint: str, payload: dict | None = None) -> dict:
+        await self._aensure_login()
+        safe_payload = self._log_api_request(endpoint, payload)
+
+        response = await self._arequest(
+            "POST",
+            endpoint,
+            json_data=safe_payload,
+        )
+        self._log_api_response("Huawei API response", endpoint, response)
+
+        if response.status_code == 401:
+            logger.warning("Huawei 401 → re-login")
+            await self._alogin()
+            response = await self._arequest("POST", endpoint, json_data=safe_payload)
+            self._log_api_response("Huawei API response (after relogin)", endpoint, response)
+
+        result = response.json()
+
+        if self._must_relogin(result):
+            logger.warning("Huawei USER_MUST_RELOGIN → re-login")
+            await self._alogin()
+            response = await self._arequest("POST", endpoint, json_data=safe_payload)
+            result = response.json()
+            self._log_api_response("Huawei API response (USER_MUST_RELOGIN)", endpoint, response)
+
+        return self._check_result(result)
 
+    def _log_api_request(self, endpoint: str, payload: dict | None) -> dict:
+        safe_payload = payload or {}
         logger.info(
             "Huawei API request",
             extra={
                 **self._log_context(),
                 "endpoint": endpoint,
-                "payload": safe_payload,
+                **body_extra(logger, payload=safe_payload),
             },
         )
+        return safe_payload
 
-        response = self._request(
-            "POST",
-            endpoint,
-            json_data=safe_payload,
-        )
-
+    def _log_api_response(self, message: str, endpoint: str, response) -> None:
         logger.info(
-            "Huawei API response",
+            message,
             extra={
                 **self._log_context(),
                 "endpoint": endpoint,
                 "status_code": response.status_code,
-                "ok": response.ok,
-                "body": response.text,
+                "ok": self._is_ok(response),
+                "bytes": len(response.content),
+                **body_extra(logger, body=response.content),
             },
         )
 
-        if response.status_code == 401:
-            logger.warning("Huawei 401 → re-login")
-            self._login()
-            response = self._request("POST", endpoint, json_data=payload or {})
-
-            logger.info(
-                "Huawei API response (after relogin)",
-                extra={
-                    **self._log_context(),
-                    "endpoint": endpoint,
-                    "status_code": response.status_code,
-                    "ok": response.ok,
-                    "body": response.text,
-                },
-            )
-
-        result = response.json()
-
-        if (
+    @staticmethod
+    def _must_relogin(result: Mapping[str, Any]) -> bool:
+        return (
             result.get("message") == "USER_MUST_RELOGIN"
             or result.get("failCode") == 20010
-        ):
-            logger.warning("Huawei USER_MUST_RELOGIN → re-login")
-            self._login()
-            response = self._request("POST", endpoint, json_data=payload or {})
-            result = response.json()
-
-            logger.info(
-                "Huawei API response (USER_MUST_RELOGIN)",
-                extra={
-                    **self._log_context(),
-                    "endpoint": endpoint,
-                    "status_code": response.status_code,
-                    "body": response.text,
-                },
-            )
+        )
 
+    def _check_result(self, result: dict) -> dict:
         if not result.get("success", False):
             raise ProviderError(
                 message="Huawei API error",
@@ -221,8 +292,21 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
 
     def list_stations(self) -> list[Mapping[str, Any]]:
         logger.info("Huawei → list stations", extra=self._log_context())
+        return self._cached_metadata(
+            "getStationList",
+            None,
+            lambda: self._parse_stations(self._post("getStationList")),
+        )
+
+    async def alist_stations(self) -> list[Mapping[str, Any]]:
+        logger.info("Huawei → list stations", extra=self._log_context())
+
+        async def load() -> list[Mapping[str, Any]]:
+            return self._parse_stations(await self._apost("getStationList"))
+
+        return await self._acached_metadata("getStationList", None, load)
 
-        result = self._post("getStationList")
+    def _parse_stations(self, result: Mapping[str, Any]) -> list[Mapping[str, Any]]:
         stations = result.get("data", [])
 
         logger.info(
@@ -239,7 +323,28 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
         )
 
         payload = {"stationCodes": station_code}
-        result = self._post("getDevList", payload)
+        return self._cached_metadata(
+            "getDevList",
+            payload,
+            lambda: self._parse_devices(station_code, self._post("getDevList", payload)),
+        )
+
+    async def alist_devices(self, station_code: str) -> list[Mapping[str, Any]]:
+        logger.info(
+            "Huawei → list devices",
+            extra={**self._log_context(), "station_code": station_code},
+        )
+
+        payload = {"stationCodes": station_code}
+
+        async def load() -> list[Mapping[str, Any]]:
+            return self._parse_devices(station_code, await self._apost("getDevList", payload))
+
+        return await self._acached_metadata("getDevList", payload, load)
+
+    def _parse_devices(
+        self, station_code: str, result: Mapping[str, Any]
+    ) -> list[Mapping[str, Any]]:
         devices = result.get("data", [])
 
         inverters = [d for d in devices if d.get("devTypeId") == 1]
@@ -256,22 +361,22 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
         return [self._normalize_device(d) for d in inverters]
 
     def get_production(self, device_id: str) -> dict:
+        payload = self._production_payload(device_id)
+        return self._parse_production(self._post("getDevRealKpi", payload))
+
+    async def aget_production(self, device_id: str) -> dict:
+        payload = self._production_payload(device_id)
+        return self._parse_production(await self._apost("getDevRealKpi", payload))
+
+    def _production_payload(self, device_id: str) -> dict:
         payload = {"devTypeId": "1", "devIds": device_id}
         logger.info(
             "Huawei → get production",
-            extra={**self._log_context(), "payload": payload},
+            extra={**self._log_context(), **body_extra(logger, payload=payload)},
         )
+        return payload
 
-        result = self._post("getDevRealKpi", payload)
-        logger.info(
-            "Huawei API response",
-            extra={
-                **self._log_context(),
-                "endpoint": "getDevRealKpi",
-                "status_code": result.get("status_code"),
-                "body": result.get("body"),
-            },
-        )
+    def _parse_production(self, result: Mapping[str, Any]) -> dict:
         return result.get("data", [])
 
     def get_current_power(self, device_id: str) -> float:
@@ -279,7 +384,16 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
             "Huawei fetch current power start",
             extra=self._log_context(device_id=device_id),
         )
-        payload = self.get_production(device_id)
+        return self._parse_current_power(device_id, self.get_production(device_id))
+
+    async def aget_current_power(self, device_id: str) -> float:
+        logger.info(
+            "Huawei fetch current power start",
+            extra=self._log_context(device_id=device_id),
+        )
+        return self._parse_current_power(device_id, await self.aget_production(device_id))
+
+    def _parse_current_power(self, device_id: str, payload: Any) -> float:
         data = payload[0] if isinstance(payload, list) and payload else payload
         if not isinstance(data, Mapping):
             raise ProviderError(
@@ -346,6 +460,145 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
         }
 
     def fetch_measurement(self) -> NormalizedMeasurement:
+        device_id = self._measurement_device_id()
+        return self._build_measurement(device_id, self.get_current_power(device_id))
+
+    async def afetch_measurement(self) -> NormalizedMeasurement:
+        device_id = self._measurement_device_id()
+        return self._build_measurement(device_id, await self.aget_current_power(device_id))
+
+    def fetch_measurements(
+        self, device_ids: Sequence[str]
+    ) -> dict[str, NormalizedMeasurement]:
+        measurements: dict[str, NormalizedMeasurement] = {}
+        for chunk in self._device_chunks(device_ids):
+            payload = self._production_payload(",".join(chunk))
+            rows = self._parse_production(self._post("getDevRealKpi", payload))
+            measurements.update(self._build_measurements(chunk, rows))
+        return measurements
+
+    async def afetch_measurements(
+        self, device_ids: Sequence[str]
+    ) -> dict[str, NormalizedMeasurement]:
+        # Chunks go out one after another: the quota is per account.
+        measurements: dict[str, NormalizedMeasurement] = {}
+        for chunk in self._device_chunks(device_ids):
+            payload = self._production_payload(",".join(chunk))
+            rows = self._parse_production(await self._apost("getDevRealKpi", payload))
+            measurements.update(self._build_measurements(chunk, rows))
+        return measurements
+
+    def fetch_history(
+        self, device_ids: Sequence[str], start: datetime, end: datetime
+    ) -> dict[str, list[NormalizedMeasurement]]:
+        payload = self._history_payload(device_ids, start, end)
+        result = self._post("getDevHistoryKpi", payload)
+        return self._build_history(device_ids, start, end, result)
+
+    async def afetch_history(
+        self, device_ids: Sequence[str], start: datetime, end: datetime
+    ) -> dict[str, list[NormalizedMeasurement]]:
+        payload = self._history_payload(device_ids, start, end)
+        result = await self._apost("getDevHistoryKpi", payload)
+        return self._build_history(device_ids, start, end, result)
+
+    def _history_payload(
+        self, device_ids: Sequence[str], start: datetime, end: datetime
+    ) -> dict:
+        if len(device_ids) > self.history_batch_size or end - start > self.history_window:
+            raise ProviderError(
+                message="Huawei history request exceeds vendor limits",
+                details={
+                    "devices": len(device_ids),
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                },
+            )
+        return {
+            "devTypeId": "1",
+            "devIds": ",".join(device_ids),
+            "startTime": int(start.timestamp() * 1000),
+            "endTime": int(end.timestamp() * 1000),
+        }
+
+    def _build_history(
+        self,
+        device_ids: Sequence[str],
+        start: datetime,
+        end: datetime,
+        result: Mapping[str, Any],
+    ) -> dict[str, list[NormalizedMeasurement]]:
+        requested = set(device_ids)
+        provider_id = getattr(self, "provider_id", 0)
+        history: dict[str, list[NormalizedMeasurement]] = {}
+
+        rows = result.get("data")
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, Mapping) or row.get("collectTime") is None:
+                continue
+            device_id = str(row.get("devId"))
+            value = self._extract_power_value(row)
+            try:
+                measured_at = datetime.fromtimestamp(
+                    int(row["collectTime"]) / 1000, tz=timezone.utc
+                )
+            except (TypeError, ValueError, OverflowError):
+                continue
+            # endTime is inclusive on the vendor side.
+            if device_id not in requested or value is None or not start <= measured_at < end:
+                continue
+            history.setdefault(device_id, []).append(
+                NormalizedMeasurement(
+                    provider_id=provider_id,
+                    value=value,
+                    unit=PowerUnit.WATT.value,
+                    measured_at=measured_at,
+                    metadata={"device_id": device_id, "source": "history"},
+                )
+            )
+
+        for samples in history.values():
+            samples.sort(key=lambda measurement: measurement.measured_at)
+        logger.info(
+            "Huawei history fetched",
+            extra={
+                **self._log_context(),
+                "devices": len(requested),
+                "samples": sum(len(samples) for samples in history.values()),
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+            },
+        )
+        return history
+
+    def _device_chunks(self, device_ids: Sequence[str]) -> list[list[str]]:
+        unique = list(dict.fromkeys(str(device_id) for device_id in device_ids if device_id))
+        size = self.measurement_batch_size
+        return [unique[i : i + size] for i in range(0, len(unique), size)]
+
+    def _build_measurements(
+        self, chunk: Sequence[str], rows: Any
+    ) -> dict[str, NormalizedMeasurement]:
+        requested = set(chunk)
+        measurements: dict[str, NormalizedMeasurement] = {}
+
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, Mapping):
+                continue
+            device_id = str(row.get("devId"))
+            value = self._extract_power_value(row)
+            if device_id in requested and value is not None:
+                measurements[device_id] = self._build_measurement(device_id, value)
+
+        missing = [device_id for device_id in chunk if device_id not in measurements]
+        if missing:
+            logger.warning(
+                "Huawei getDevRealKpi returned no power value for some devices",
+                extra={**self._log_context(), "missing": missing, "requested": len(chunk)},
+            )
+        return measurements
+
+    def _measurement_device_id(self) -> str:
         logger.info("Huawei fetching measurement", extra=self._log_context())
         device_id = getattr(self, "provider_external_id", None)
         if not device_id:
@@ -353,8 +606,9 @@ class HuaweiProviderAdapter(BaseProviderAdapter):
                 message="Huawei adapter missing device identifier",
                 details={"vendor": self.vendor.value},
             )
+        return device_id
 
-        value = self.get_current_power(device_id)
+    def _build_measurement(self, device_id: str, value: float) -> NormalizedMeasurement:
         measured_at = datetime.now(timezone.utc)
 
         logger.info(
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Protocol, Tuple
+
+from smart_common.providers.exceptions import ProviderCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HttpCall:
+    """One logical adapter request, including all of its retries."""
+
+    vendor: str
+    endpoint: str
+    method: str
+    attempts: int = 0
+    status_code: int | None = None
+    response_bytes: int = 0
+    duration: float = 0.0
+    failure: str | None = None
+    # Transport error of the last attempt ("timeout" / "connection").
+    last_error: str | None = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+
+class HttpMetricsSink(Protocol):
+    def record(self, call: HttpCall) -> None:
+        ...
+
+
+def classify_failure(call: HttpCall, exc: BaseException | None) -> str | None:
+    if exc is not None:
+        if isinstance(exc, ProviderCircuitOpenError):
+            return "circuit_open"
+        return call.last_error or "error"
+    if call.status_code is None:
+        return None
+    if call.status_code >= 500:
+        return "http_5xx"
+    if call.status_code >= 400:
+        return "http_4xx"
+    return None
+
+
+class _TrackedCall:
+    def __init__(self, instrumentation: "HttpInstrumentation", call: HttpCall) -> None:
+        self.instrumentation = instrumentation
+        self.call = call
+
+    def __enter__(self) -> HttpCall:
+        return self.call
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        call = self.call
+        call.duration = time.perf_counter() - call._started
+        call.failure = classify_failure(call, exc)
+        self.instrumentation.emit(call)
+        return False
+
+
+class HttpInstrumentation:
+    """Fans finished adapter calls out to the registered sinks."""
+
+    def __init__(self, *sinks: HttpMetricsSink) -> None:
+        self._sinks: List[HttpMetricsSink] = list(sinks)
+
+    def add_sink(self, sink: HttpMetricsSink) -> None:
+        if sink not in self._sinks:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink: HttpMetricsSink) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+
+    def track(self, vendor: str, endpoint: str, method: str) -> _TrackedCall:
+        return _TrackedCall(self, HttpCall(vendor=vendor, endpoint=endpoint, method=method))
+
+    def emit(self, call: HttpCall) -> None:
+        for sink in list(self._sinks):
+            try:
+                sink.record(call)
+            except Exception:
+                # Metrics must never break a provider call.
+                logger.exception("HTTP metrics sink failed", extra={"sink": type(sink).__name__})
+
+
+# ----------------------------------------------------------------------
+# Sinks
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class _EndpointWindow:
+    durations: Deque[float]
+    count: int = 0
+    failures: Dict[str, int] = field(default_factory=dict)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    retries: int = 0
+    response_bytes: int = 0
+    total_seconds: float = 0.0
+
+
+class RollingHttpStats:
+    """Keeps the last `window` durations per (vendor, endpoint) plus
+    running counters, and summarizes them as percentiles."""
+
+    DEFAULT_WINDOW = 1024
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], _EndpointWindow] = {}
+
+    def record(self, call: HttpCall) -> None:
+        key = (call.vendor, call.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointWindow(deque(maxlen=self.window))
+            stats.durations.append(call.duration)
+            stats.count += 1
+            stats.retries += max(0, call.attempts - 1)
+            stats.response_bytes += call.response_bytes
+            stats.total_seconds += call.duration
+            if call.status_code is not None:
+                stats.statuses[call.status_code] = stats.statuses.get(call.status_code, 0) + 1
+            if call.failure:
+                stats.failures[call.failure] = stats.failures.get(call.failure, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """`{vendor: {endpoint: {...}}}` with p50/p90/p99 over the window
+        and totals since start (`total_seconds` is the poll budget used)."""
+        with self._lock:
+            items = [
+                (key, sorted(stats.durations), stats) for key, stats in self._endpoints.items()
+            ]
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (vendor, endpoint), durations, stats in items:
+                result.setdefault(vendor, {})[endpoint] = {
+                    "count": stats.count,
+                    "window": len(durations),
+                    "p50": _percentile(durations, 0.50),
+                    "p90": _percentile(durations, 0.90),
+                    "p99": _percentile(durations, 0.99),
+                    "max": durations[-1] if durations else 0.0,
+                    "total_seconds": round(stats.total_seconds, 6),
+                    "retries": stats.retries,
+                    "response_bytes": stats.response_bytes,
+                    "statuses": dict(stats.statuses),
+                    "failures": dict(stats.failures),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile.
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LabelledMetricsSink:
+    """Forwards calls to a registry with `inc`/`observe` and labels, e.g.
+    `smart_common.nats.metrics.nats_metrics` for Prometheus export."""
+
+    def __init__(self, registry: Any, *, prefix: str = "provider_http") -> None:
+        self.registry = registry
+        self.prefix = prefix
+
+    def record(self, call: HttpCall) -> None:
+        labels = {"vendor": call.vendor, "endpoint": call.endpoint}
+        self.registry.observe(f"{self.prefix}_duration_seconds", call.duration, **labels)
+        self.registry.inc(
+            f"{self.prefix}_requests_total",
+            status=str(call.status_code or "none"),
+            outcome=call.failure or "ok",
+            **labels,
+        )
+        if call.attempts > 1:
+            self.registry.inc(f"{self.prefix}_retries_total", call.attempts - 1, **labels)
+        if call.response_bytes:
+            self.registry.inc(f"{self.prefix}_response_bytes_total", call.response_bytes, **labels)
+
+
+http_stats = RollingHttpStats()
+http_instrumentation = HttpInstrumentation(http_stats)
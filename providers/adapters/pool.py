@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Mapping
+
+from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.provider_config.config import provider_settings
+
+logger = logging.getLogger(__name__)
+
+
+def credential_fingerprint(
+    credentials: Mapping[str, Any], settings: Mapping[str, Any] | None = None
+) -> str:
+    """Stable, non-reversible digest of the credentials (and settings) an
+    adapter was built with."""
+    digest = hashlib.sha256()
+    for source in (credentials, settings or {}):
+        for name in sorted(source):
+            digest.update(f"{name}={source[name]!r}\0".encode("utf-8"))
+        digest.update(b"\1")
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class _Entry:
+    adapter: BaseProviderAdapter
+    fingerprint: str
+    last_used: float
+
+
+class _Build:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.adapter: BaseProviderAdapter | None = None
+        self.error: BaseException | None = None
+
+
+class AdapterPool:
+    """Bounded LRU of provider adapters with idle expiry.
+
+    Entries are keyed by a caller-chosen slot (e.g. vendor + external id)
+    and the credential fingerprint; a new fingerprint for a slot replaces
+    the old adapter. Evicted adapters are closed. Concurrent misses on the
+    same key wait for a single build.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int | None = None,
+        idle_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max(1, max_size or provider_settings.ADAPTER_POOL_MAX_SIZE)
+        self.idle_ttl = idle_ttl or provider_settings.ADAPTER_POOL_IDLE_TTL
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._builds: dict[tuple[Hashable, str], _Build] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "builds": 0,
+            "build_errors": 0,
+            "evicted_lru": 0,
+            "evicted_idle": 0,
+            "evicted_credentials": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_or_create(
+        self,
+        slot: Hashable,
+        fingerprint: str,
+        build: Callable[[], BaseProviderAdapter],
+    ) -> BaseProviderAdapter:
+        evicted: list[tuple[Hashable, _Entry, str]] = []
+        with self._lock:
+            now = self._clock()
+            self._expire(now, evicted)
+
+            entry = self._entries.get(slot)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entry.last_used = now
+                self._entries.move_to_end(slot)
+                self._stats["hits"] += 1
+                adapter = entry.adapter
+            else:
+                self._stats["misses"] += 1
+                adapter = None
+                pending = self._builds.get((slot, fingerprint))
+                owner = pending is None
+                if owner:
+                    pending = self._builds[(slot, fingerprint)] = _Build()
+
+        self._close(evicted)
+        if adapter is not None:
+            return adapter
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.adapter
+
+        try:
+            adapter = build()
+        except BaseException as exc:
+            pending.error = exc
+            with self._lock:
+                self._stats["build_errors"] += 1
+                self._builds.pop((slot, fingerprint), None)
+            pending.done.set()
+            raise
+
+        evicted = []
+        with self._lock:
+            self._stats["builds"] += 1
+            previous = self._entries.pop(slot, None)
+            if previous is not None and previous.adapter is not adapter:
+                evicted.append((slot, previous, "credentials"))
+            self._entries[slot] = _Entry(adapter, fingerprint, self._clock())
+            while len(self._entries) > self.max_size:
+                old_slot, old_entry = self._entries.popitem(last=False)
+                evicted.append((old_slot, old_entry, "lru"))
+            self._builds.pop((slot, fingerprint), None)
+
+        pending.adapter = adapter
+        pending.done.set()
+        self._close(evicted)
+        return adapter
+
+    def discard(self, slot: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(slot, None)
+        if entry is not None:
+            self._close([(slot, entry, "discarded")])
+
+    def prune(self) -> int:
+        """Close adapters idle for longer than `idle_ttl`."""
+        evicted: list[tuple[Hashable, _Entry, str]] = []
+        with self._lock:
+            self._expire(self._clock(), evicted)
+        self._close(evicted)
+        return len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = [(slot, entry, "cleared") for slot, entry in self._entries.items()]
+            self._entries.clear()
+        self._close(evicted)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "building": len(self._builds)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _expire(self, now: float, evicted: list) -> None:
+        # Entries are ordered by last use, so expired ones sit at the front.
+        while self._entries:
+            slot, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.idle_ttl:
+                break
+            del self._entries[slot]
+            evicted.append((slot, entry, "idle"))
+
+    def _close(self, evicted: list[tuple[Hashable, _Entry, str]]) -> None:
+        for slot, entry, reason in evicted:
+            key = f"evicted_{reason}"
+            if key in self._stats:
+                with self._lock:
+                    self._stats[key] += 1
+            try:
+                entry.adapter.close()
+            except Exception:
+                logger.exception(
+                    "Failed to close evicted provider adapter",
+                    extra={"slot": str(slot), "reason": reason},
+                )
+            logger.info(
+                "Provider adapter evicted",
+                extra={
+                    "slot": str(slot),
+                    "reason": reason,
+                    "adapter": type(entry.adapter).__name__,
+                },
+            )
+
+
+adapter_pool = AdapterPool()
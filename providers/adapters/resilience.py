@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from smart_common.providers.exceptions import ProviderCircuitOpenError
+from smart_common.providers.provider_config.config import provider_settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Statuses that mean "try again later" rather than "your request is wrong".
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+def backoff_delay(attempt: int, *, base: float | None = None, cap: float | None = None) -> float:
+    """Exponential backoff with full jitter for the given (1-based) retry."""
+    base = provider_settings.HTTP_BACKOFF_BASE if base is None else base
+    cap = provider_settings.HTTP_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** max(0, attempt - 1)))
+
+
+def retry_after_seconds(response) -> float | None:
+    """Parse `Retry-After` (delta seconds or HTTP date) from a response."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class BreakerSnapshot:
+    key: str
+    state: str
+    consecutive_failures: int
+    total_failures: int
+    total_successes: int
+    rejected: int
+    opened_count: int
+    retry_in: float
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures; after
+    the open period one half-open probe decides between closed and open.
+
+    Each failed probe doubles the open period up to `max_reset_timeout`.
+    Thread-safe; holds no lock across I/O, so it serves sync and async
+    callers alike.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        failure_threshold: int | None = None,
+        reset_timeout: float | None = None,
+        max_reset_timeout: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.key = key
+        self.failure_threshold = failure_threshold or provider_settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or provider_settings.CIRCUIT_RESET_TIMEOUT
+        self.max_reset_timeout = max_reset_timeout or provider_settings.CIRCUIT_MAX_RESET_TIMEOUT
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._open_for = self.reset_timeout
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._total_failures = 0
+        self._total_successes = 0
+        self._rejected = 0
+        self._opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def before_request(self) -> None:
+        """Raise `ProviderCircuitOpenError` unless a request may go out now."""
+        with self._lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = self._clock()
+                return
+            self._rejected += 1
+            retry_in = max(0.0, self._open_until - self._clock())
+
+        raise ProviderCircuitOpenError(
+            "Provider endpoint temporarily unavailable",
+            retry_in=retry_in,
+            details={"endpoint": self.key},
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._total_successes += 1
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                logger.info("Provider circuit closed", extra={"endpoint": self.key})
+            self._state = CLOSED
+            self._open_for = self.reset_timeout
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self._total_failures += 1
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+                self._open(retry_after)
+            elif self._state == CLOSED and (
+                self._failures >= self.failure_threshold
+                or (retry_after or 0) > provider_settings.HTTP_RETRY_AFTER_MAX
+            ):
+                self._open(retry_after)
+
+    def snapshot(self) -> BreakerSnapshot:
+        with self._lock:
+            self._refresh_state()
+            return BreakerSnapshot(
+                key=self.key,
+                state=self._state,
+                consecutive_failures=self._failures,
+                total_failures=self._total_failures,
+                total_successes=self._total_successes,
+                rejected=self._rejected,
+                opened_count=self._opened_count,
+                retry_in=max(0.0, self._open_until - self._clock()) if self._state == OPEN else 0.0,
+            )
+
+    # Lock must be held by the caller.
+    def _open(self, retry_after: float | None) -> None:
+        open_for = max(self._open_for, retry_after or 0.0)
+        self._state = OPEN
+        self._probe_in_flight = False
+        self._open_until = self._clock() + open_for
+        self._opened_count += 1
+        logger.warning(
+            "Provider circuit opened",
+            extra={
+                "endpoint": self.key,
+                "failures": self._failures,
+                "open_for": round(open_for, 3),
+            },
+        )
+
+    def _refresh_state(self) -> None:
+        now = self._clock()
+        if self._state == OPEN and now >= self._open_until:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        elif (
+            self._state == HALF_OPEN
+            and self._probe_in_flight
+            and now - self._probe_started >= self.reset_timeout
+        ):
+            # The probe never reported back (e.g. its caller crashed).
+            self._probe_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Breakers keyed by `scheme://host/path`, shared by every adapter."""
+
+    def __init__(self, **breaker_options: Any) -> None:
+        self._options = breaker_options
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{parts.path or '/'}"
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        key = self.key_for(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(key, **self._options))
+        return breaker
+
+    def snapshot(self) -> dict[str, BreakerSnapshot]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.key: breaker.snapshot() for breaker in breakers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
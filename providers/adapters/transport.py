@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from urllib.parse import urlsplit
+
+from smart_common.providers.provider_config.config import provider_settings
+
+try:  # optional async HTTP client
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+try:  # HTTP/2 support for httpx
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Connection pools per event loop and host. Adapters get their own client
+# (own cookies) on top of these, so per-host limits apply across all of them.
+_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, object]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+_fallback_warned = False
+
+
+def async_transport_available() -> bool:
+    return httpx is not None
+
+
+def warn_sync_fallback() -> None:
+    """Log once per process that async requests run `requests` in threads."""
+    global _fallback_warned
+    if _fallback_warned:
+        return
+    _fallback_warned = True
+    logger.warning(
+        "httpx is not installed; async provider requests fall back to "
+        "blocking requests in worker threads"
+    )
+
+
+def _host_key(url) -> str:
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_host_pool(url):
+    """Return the shared connection pool for the host of `url`."""
+    if httpx is None:
+        raise RuntimeError("httpx is not installed")
+
+    loop = asyncio.get_running_loop()
+    pools = _POOLS.setdefault(loop, {})
+    key = _host_key(url)
+    pool = pools.get(key)
+    if pool is None:
+        pool = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE and provider_settings.HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=provider_settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=provider_settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+                keepalive_expiry=provider_settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        pools[key] = pool
+        logger.debug("Created HTTP connection pool", extra={"host": key})
+    return pool
+
+
+async def close_host_pools() -> None:
+    """Close every pool bound to the running event loop."""
+    pools = _POOLS.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.aclose()
+
+
+if httpx is not None:
+
+    class HostRoutingTransport(httpx.AsyncBaseTransport):
+        """Sends each request through the shared pool of its host.
+
+        Closing it does not close the shared pools.
+        """
+
+        async def handle_async_request(self, request):
+            return await get_host_pool(request.url).handle_async_request(request)
+
+        async def aclose(self) -> None:
+            return None
+
+else:  # pragma: no cover - optional dependency
+    HostRoutingTransport = None
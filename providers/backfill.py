@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+from smart_common.core.config import settings
+from smart_common.core.db import SessionLocal
+from smart_common.models.provider import Provider
+from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.adapters.factory import VendorAdapterFactory
+from smart_common.providers.batch import group_providers
+from smart_common.providers.enums import ProviderVendor
+from smart_common.providers.polling import VendorLimits, _VendorLimiter
+from smart_common.providers.provider_config.config import provider_settings
+from smart_common.repositories.backfill_checkpoint import BackfillCheckpointRepository
+from smart_common.repositories.measurement_bulk_loader import MeasurementBulkLoader
+from smart_common.repositories.measurement_partitions import MeasurementPartitionManager
+from smart_common.repositories.measurement_repository import MeasurementRepository
+from smart_common.repositories.measurement_rollup_repository import (
+    MeasurementRollupRepository,
+)
+from smart_common.schemas.normalized_measurement import NormalizedMeasurement
+
+logger = logging.getLogger(__name__)
+
+Window = tuple[datetime, datetime]
+
+
+def history_windows(start: datetime, end: datetime, size: timedelta) -> Iterator[Window]:
+    """Consecutive [start, end) windows of at most `size`, oldest first."""
+    while start < end:
+        window_end = min(end, start + size)
+        yield start, window_end
+        start = window_end
+
+
+@dataclass
+class _Job:
+    """Devices fetched together by one history request, window by window."""
+
+    adapter: BaseProviderAdapter
+    providers: list[Provider]
+    device_ids: list[str]
+    # Range start recorded in each provider's checkpoint.
+    starts: dict[int, datetime]
+    resume_at: datetime
+    # Rollups are only filled up to each provider's first stored sample:
+    # from there on live polling has already accumulated them.
+    rollups_until: dict[int, datetime] = field(default_factory=dict)
+
+    @property
+    def provider_ids(self) -> list[int]:
+        return [provider.id for provider in self.providers]
+
+
+@dataclass
+class BackfillStats:
+    windows: int = 0
+    failed_windows: int = 0
+    measurements: int = 0
+    inserted: int = 0
+    flushes: int = 0
+    skipped_providers: dict[int, str] = field(default_factory=dict)
+    completed: set[int] = field(default_factory=set)
+
+
+class MeasurementBackfill:
+    """Loads vendor history for providers, e.g. right after onboarding.
+
+    Providers are grouped per vendor account like for polling and split into
+    `history_batch_size` device groups. Each group walks [start, end) in
+    `history_window` steps with up to BACKFILL_WINDOWS_IN_FLIGHT requests
+    ahead, through the same per-vendor concurrency cap and token bucket as
+    the polling engine. Results are buffered and written with
+    `MeasurementBulkLoader` (COPY into a staging table, then merge); each
+    flush commits the checkpoints of the windows it contains, so a restarted
+    backfill continues after the last loaded window.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Any] = SessionLocal,
+        factory: VendorAdapterFactory | None = None,
+        limits: Mapping[ProviderVendor, VendorLimits] | None = None,
+        windows_in_flight: int | None = None,
+        flush_rows: int | None = None,
+        compact_rollups: bool | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.factory = factory
+        self.limits = dict(limits or {})
+        self.windows_in_flight = (
+            windows_in_flight or provider_settings.BACKFILL_WINDOWS_IN_FLIGHT
+        )
+        self.flush_rows = flush_rows or provider_settings.BACKFILL_FLUSH_ROWS
+        self.compact_rollups = (
+            settings.MEASUREMENT_ROLLUPS_ENABLED if compact_rollups is None else compact_rollups
+        )
+        self._limiters: dict[Any, _VendorLimiter] = {}
+
+    async def run(
+        self,
+        providers: Iterable[Provider],
+        start: datetime,
+        end: datetime,
+    ) -> BackfillStats:
+        """Backfill [start, end) for `providers`; returns what was done."""
+        start, end = _aware(start), _aware(end)
+        stats = BackfillStats()
+        jobs = await asyncio.to_thread(self._prepare, list(providers), start, end, stats)
+        logger.info(
+            "Measurement backfill started",
+            extra={
+                "jobs": len(jobs),
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "skipped": len(stats.skipped_providers),
+            },
+        )
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.windows_in_flight * max(1, len(jobs)))
+        loader = asyncio.ensure_future(self._load(queue, end, stats))
+        producers = asyncio.gather(*(self._produce(job, end, queue, stats) for job in jobs))
+        try:
+            done, _ = await asyncio.wait({loader, producers}, return_when=asyncio.FIRST_COMPLETED)
+            if loader in done:
+                loader.result()  # the loader only stops early on a failed flush
+            await producers
+            await queue.put(None)
+            await loader
+        finally:
+            producers.cancel()
+            loader.cancel()
+
+        if self.compact_rollups and stats.inserted:
+            await asyncio.to_thread(self._compact, jobs)
+
+        logger.info(
+            "Measurement backfill finished",
+            extra={
+                "windows": stats.windows,
+                "failed_windows": stats.failed_windows,
+                "measurements": stats.measurements,
+                "inserted": stats.inserted,
+                "completed": len(stats.completed),
+            },
+        )
+        return stats
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def _prepare(
+        self,
+        providers: list[Provider],
+        start: datetime,
+        end: datetime,
+        stats: BackfillStats,
+    ) -> list[_Job]:
+        batches, errors = group_providers(providers, factory=self.factory)
+        for provider_id, error in errors.items():
+            stats.skipped_providers[provider_id] = error.message
+
+        session = self.session_factory()
+        try:
+            checkpoints = BackfillCheckpointRepository(session)
+            existing = checkpoints.get_many([provider.id for provider in providers])
+            measurements = MeasurementRepository(session)
+            # (checkpoint range start, resume point, rollups until) per provider.
+            marks = {}
+            for provider in providers:
+                checkpoint = existing.get(provider.id)
+                resume_at = _aware(checkpoints.resume_from(checkpoint, start))
+                range_start = _aware(checkpoint.start_at) if resume_at > start else start
+                # Looked up before loading, so these are rows polling stored.
+                first_live = measurements.first_measured_at(provider.id, resume_at)
+                rollups_until = min(end, _aware(first_live)) if first_live else end
+                marks[provider.id] = (range_start, resume_at, rollups_until)
+            if session.get_bind().dialect.name == "postgresql":
+                # History would otherwise land in the default partition.
+                MeasurementPartitionManager(session).ensure_range(start, end)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        jobs = []
+        for batch in batches:
+            adapter = batch.adapter
+            if adapter.history_window is None:
+                for provider in batch.providers:
+                    stats.skipped_providers[provider.id] = "vendor has no history endpoint"
+                continue
+
+            by_device: dict[str, list[Provider]] = {}
+            for provider in batch.providers:
+                by_device.setdefault(str(provider.external_id), []).append(provider)
+            devices = list(by_device)
+            size = max(1, adapter.history_batch_size)
+            for index in range(0, len(devices), size):
+                chunk = devices[index : index + size]
+                chunk_providers = [p for device_id in chunk for p in by_device[device_id]]
+                # A group resumes from its least advanced provider; rows the
+                # others already have are skipped by the merge.
+                resume_at = min(marks[p.id][1] for p in chunk_providers)
+                if resume_at >= end:
+                    stats.completed.update(p.id for p in chunk_providers)
+                    continue
+                jobs.append(
+                    _Job(
+                        adapter=adapter,
+                        providers=chunk_providers,
+                        device_ids=chunk,
+                        starts={p.id: marks[p.id][0] for p in chunk_providers},
+                        resume_at=resume_at,
+                        rollups_until={p.id: marks[p.id][2] for p in chunk_providers},
+                    )
+                )
+        return jobs
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    async def _produce(
+        self,
+        job: _Job,
+        end: datetime,
+        queue: asyncio.Queue,
+        stats: BackfillStats,
+    ) -> None:
+        # Windows are fetched ahead but handed over in order, so the
+        # checkpoint of a group never skips a window.
+        windows = history_windows(job.resume_at, end, job.adapter.history_window)
+        pending: deque[tuple[Window, asyncio.Task]] = deque()
+
+        def schedule() -> None:
+            window = next(windows, None)
+            if window is not None:
+                pending.append((window, asyncio.ensure_future(self._fetch(job, window))))
+
+        for _ in range(self.windows_in_flight):
+            schedule()
+        try:
+            while pending:
+                window, task = pending.popleft()
+                try:
+                    measurements = await task
+                except Exception as exc:
+                    stats.failed_windows += 1
+                    logger.warning(
+                        "Backfill window failed, group stopped",
+                        extra={
+                            "providers": job.provider_ids,
+                            "start": window[0].isoformat(),
+                            "end": window[1].isoformat(),
+                            "error": str(exc),
+                        },
+                    )
+                    return
+                stats.windows += 1
+                schedule()
+                await queue.put((job, window[1], measurements))
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _fetch(self, job: _Job, window: Window) -> list[NormalizedMeasurement]:
+        limiter = self._limiter(job.adapter.vendor)
+        async with limiter.semaphore:
+            await limiter.bucket.acquire()
+            history = await job.adapter.afetch_history(job.device_ids, *window)
+
+        # Several providers may point at the same device.
+        return [
+            replace(measurement, provider_id=provider.id)
+            for provider in job.providers
+            for measurement in history.get(str(provider.external_id), ())
+        ]
+
+    def _limiter(self, vendor: Any) -> _VendorLimiter:
+        limiter = self._limiters.get(vendor)
+        if limiter is None:
+            limiter = self._limiters[vendor] = _VendorLimiter(
+                self.limits.get(vendor, VendorLimits())
+            )
+        return limiter
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def _load(self, queue: asyncio.Queue, end: datetime, stats: BackfillStats) -> None:
+        buffer: list[NormalizedMeasurement] = []
+        progress: dict[int, tuple[datetime, datetime]] = {}
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            job, completed_until, measurements = item
+            buffer.extend(measurements)
+            for provider in job.providers:
+                progress[provider.id] = (job.starts[provider.id], completed_until)
+            if len(buffer) >= self.flush_rows:
+                await asyncio.to_thread(self._flush, buffer, progress, end, stats)
+                buffer, progress = [], {}
+        if progress:
+            await asyncio.to_thread(self._flush, buffer, progress, end, stats)
+
+    def _flush(
+        self,
+        measurements: Sequence[NormalizedMeasurement],
+        progress: Mapping[int, tuple[datetime, datetime]],
+        end: datetime,
+        stats: BackfillStats,
+    ) -> None:
+        session = self.session_factory()
+        try:
+            inserted = MeasurementBulkLoader(session).load(measurements)
+            BackfillCheckpointRepository(session).advance(progress)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        stats.flushes += 1
+        stats.measurements += len(measurements)
+        stats.inserted += inserted
+        stats.completed.update(
+            provider_id
+            for provider_id, (_, completed_until) in progress.items()
+            if completed_until >= end
+        )
+
+    def _compact(self, jobs: Sequence[_Job]) -> None:
+        # Provider -> [resume point, first live sample) of this run.
+        ranges = {
+            provider_id: (job.resume_at, until)
+            for job in jobs
+            for provider_id, until in job.rollups_until.items()
+            if until > job.resume_at
+        }
+        if not ranges:
+            return
+        day = min(start for start, _ in ranges.values())
+        end = max(until for _, until in ranges.values())
+        session = self.session_factory()
+        try:
+            # One day per transaction, as in scripts/compact_measurement_rollups.py.
+            # compact() keeps existing base buckets, so the partial day of
+            # the first live sample is safe.
+            while day < end:
+                day_end = min(end, day + timedelta(days=1))
+                provider_ids = sorted(
+                    provider_id
+                    for provider_id, (start, until) in ranges.items()
+                    if start < day_end and day < until
+                )
+                if provider_ids:
+                    MeasurementRollupRepository(session).compact(
+                        day, day_end, provider_ids=provider_ids
+                    )
+                    session.commit()
+                day = day_end
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+def _aware(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+__all__ = [
+    "BackfillStats",
+    "MeasurementBackfill",
+    "history_windows",
+]
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Iterable
+
+from smart_common.models.provider import Provider
+from smart_common.providers.adapters.base import BaseProviderAdapter
+from smart_common.providers.adapters.pool import credential_fingerprint
+from smart_common.providers.adapters.factory import (
+    VendorAdapterFactory,
+    _resolve_provider_credentials,
+    create_adapter_for_provider,
+    get_vendor_adapter_factory,
+)
+from smart_common.providers.exceptions import ProviderConfigError, ProviderError
+from smart_common.schemas.normalized_measurement import NormalizedMeasurement
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderBatch:
+    """Providers served by one adapter and fetched together.
+
+    `batched` batches hold every provider of one vendor account; the
+    adapter splits them into `measurement_batch_size` requests. Other
+    batches hold a single provider.
+    """
+
+    adapter: BaseProviderAdapter
+    providers: list[Provider] = field(default_factory=list)
+    batched: bool = False
+
+    @property
+    def device_ids(self) -> list[str]:
+        return list(dict.fromkeys(str(p.external_id) for p in self.providers))
+
+
+def group_providers(
+    providers: Iterable[Provider],
+    *,
+    factory: VendorAdapterFactory | None = None,
+) -> tuple[list[ProviderBatch], dict[int, ProviderError]]:
+    """Group providers so each vendor account is polled with as few calls
+    as its API allows.
+
+    Returns the batches plus the providers that could not be set up, keyed
+    by provider id.
+    """
+    factory = factory or get_vendor_adapter_factory()
+    batches: list[ProviderBatch] = []
+    accounts: dict[tuple, ProviderBatch] = {}
+    errors: dict[int, ProviderError] = {}
+
+    for provider in providers:
+        try:
+            adapter_cls = factory.adapter_class(provider.vendor) if provider.vendor else None
+            if adapter_cls is None or adapter_cls.measurement_batch_size <= 1:
+                adapter = create_adapter_for_provider(provider, factory=factory)
+                batches.append(ProviderBatch(adapter=adapter, providers=[provider]))
+                continue
+
+            if not provider.external_id:
+                raise ProviderConfigError(
+                    "Provider external_id is required for polling",
+                    details={"provider_id": provider.id, "vendor": provider.vendor.value},
+                )
+            credentials = _resolve_provider_credentials(provider)
+            if not credentials:
+                raise ProviderConfigError(
+                    "Provider credentials are missing",
+                    details={"provider_id": provider.id, "vendor": provider.vendor.value},
+                )
+
+            key = (provider.vendor, credential_fingerprint(credentials))
+            batch = accounts.get(key)
+            if batch is None:
+                adapter = factory.create(
+                    provider.vendor,
+                    credentials=credentials,
+                    cache_key=f"{provider.vendor.value}:account:{key[1]}",
+                )
+                batch = accounts[key] = ProviderBatch(adapter=adapter, batched=True)
+                batches.append(batch)
+            batch.providers.append(provider)
+        except ProviderError as exc:
+            logger.warning(
+                "Provider skipped from polling batch",
+                extra={"provider_id": provider.id, "error": exc.message},
+            )
+            errors[provider.id] = exc
+
+    logger.debug(
+        "Providers grouped for polling",
+        extra={
+            "batches": len(batches),
+            "batched_accounts": len(accounts),
+            "skipped": len(errors),
+        },
+    )
+    return batches, errors
+
+
+def fetch_batch(batch: ProviderBatch) -> dict[int, NormalizedMeasurement]:
+    """Fetch one batch; returns measurements keyed by provider id."""
+    if not batch.batched:
+        measurement = batch.adapter.fetch_measurement()
+        return {batch.providers[0].id: measurement}
+    return _by_provider(batch, batch.adapter.fetch_measurements(batch.device_ids))
+
+
+async def afetch_batch(batch: ProviderBatch) -> dict[int, NormalizedMeasurement]:
+    if not batch.batched:
+        measurement = await batch.adapter.afetch_measurement()
+        return {batch.providers[0].id: measurement}
+    return _by_provider(batch, await batch.adapter.afetch_measurements(batch.device_ids))
+
+
+def _by_provider(
+    batch: ProviderBatch, by_device: dict[str, NormalizedMeasurement]
+) -> dict[int, NormalizedMeasurement]:
+    # Several providers may point at the same device.
+    return {
+        provider.id: replace(measurement, provider_id=provider.id)
+        for provider in batch.providers
+        if (measurement := by_device.get(str(provider.external_id))) is not None
+    }
+
+
+__all__ = [
+    "ProviderBatch",
+    "group_providers",
+    "fetch_batch",
+    "afetch_batch",
+]
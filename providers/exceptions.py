@@ -72,3 +72,22 @@ class ProviderNotSupportedError(ProviderError):
             status_code=404,
             code="PROVIDER_NOT_SUPPORTED",
         )
+
+
+# ------------------------------------------------------------------
+# Upstream marked unavailable by the circuit breaker
+# ------------------------------------------------------------------
+class ProviderCircuitOpenError(ProviderFetchError):
+    """Raised without calling the provider while its circuit is open."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        retry_in: float,
+        details: Mapping[str, Any] | None = None,
+    ) -> None:
+        super().__init__(message, details={**(details or {}), "retry_in": round(retry_in, 3)})
+        self.status_code = 503
+        self.code = "PROVIDER_CIRCUIT_OPEN"
+        self.retry_in = retry_in
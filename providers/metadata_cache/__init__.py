@@ -0,0 +1,19 @@
+from smart_common.providers.metadata_cache.base import (
+    BaseMetadataCache,
+    account_prefix,
+    metadata_cache_key,
+)
+from smart_common.providers.metadata_cache.in_memory import InMemoryMetadataCache
+from smart_common.providers.metadata_cache.provider import (
+    get_metadata_cache,
+    set_metadata_cache,
+)
+
+__all__ = [
+    "BaseMetadataCache",
+    "InMemoryMetadataCache",
+    "account_prefix",
+    "metadata_cache_key",
+    "get_metadata_cache",
+    "set_metadata_cache",
+]
@@ -0,0 +1,52 @@
+# smart_common/providers/metadata_cache/base.py
+from __future__ import annotations
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Mapping
+
+
+def metadata_cache_key(
+    vendor: str,
+    account: str,
+    endpoint: str,
+    params: Mapping[str, Any] | None = None,
+) -> str:
+    """`<vendor>:<account digest>:<endpoint>[:<params digest>]`.
+
+    The account is hashed so usernames never end up in cache keys.
+    """
+    account_digest = hashlib.sha256(account.encode("utf-8")).hexdigest()[:16]
+    key = f"{vendor}:{account_digest}:{endpoint}"
+    if params:
+        encoded = json.dumps(params, sort_keys=True, default=str)
+        key += ":" + hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+    return key
+
+
+def account_prefix(vendor: str, account: str) -> str:
+    return metadata_cache_key(vendor, account, "")
+
+
+class BaseMetadataCache(ABC):
+    """TTL cache for slowly-changing provider metadata (JSON values)."""
+
+    # True when calls do network I/O; async callers then use a thread.
+    blocking_io = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every key starting with `prefix`; returns how many."""
@@ -0,0 +1,49 @@
+# smart_common/providers/metadata_cache/in_memory.py
+from __future__ import annotations
+
+import copy
+import time
+from threading import Lock
+from typing import Any, Dict, Tuple
+
+from smart_common.providers.metadata_cache.base import BaseMetadataCache
+
+
+class InMemoryMetadataCache(BaseMetadataCache):
+    DEFAULT_MAX_ENTRIES = 10_000
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+        # Callers may mutate what they get back.
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order: drop the oldest entry.
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + ttl_seconds, copy.deepcopy(value))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
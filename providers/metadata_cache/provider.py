@@ -0,0 +1,40 @@
+# smart_common/providers/metadata_cache/provider.py
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from smart_common.providers.metadata_cache.base import BaseMetadataCache
+from smart_common.providers.metadata_cache.in_memory import InMemoryMetadataCache
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+_METADATA_CACHE: BaseMetadataCache | None = None
+
+
+def _create_cache(redis: "Redis | None" = None) -> BaseMetadataCache:
+    if redis is None:
+        return InMemoryMetadataCache()
+
+    # Deferred: adapters import this module and must not need app settings.
+    from smart_common.core.config import settings
+
+    if settings.ENV in {"test", "development"}:
+        return InMemoryMetadataCache()
+
+    from smart_common.providers.metadata_cache.redis_store import RedisMetadataCache
+
+    return RedisMetadataCache(redis)
+
+
+def get_metadata_cache(redis: "Redis | None" = None) -> BaseMetadataCache:
+    """Process-wide metadata cache; the first call decides the backend."""
+    global _METADATA_CACHE
+    if _METADATA_CACHE is None:
+        _METADATA_CACHE = _create_cache(redis)
+    return _METADATA_CACHE
+
+
+def set_metadata_cache(cache: BaseMetadataCache | None) -> None:
+    global _METADATA_CACHE
+    _METADATA_CACHE = cache
@@ -0,0 +1,40 @@
+# smart_common/providers/metadata_cache/redis_store.py
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from redis import Redis
+
+from smart_common.providers.metadata_cache.base import BaseMetadataCache
+
+
+class RedisMetadataCache(BaseMetadataCache):
+    """Shares cached metadata between every worker using the same Redis."""
+
+    blocking_io = True
+
+    def __init__(self, redis: Redis, namespace: str = "provider:metadata") -> None:
+        self.redis = redis
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Any | None:
+        raw = self.redis.get(self._key(key))
+        if not raw:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        self.redis.setex(self._key(key), ttl_seconds, json.dumps(value, default=str))
+
+    def delete(self, key: str) -> None:
+        self.redis.delete(self._key(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self.redis.scan_iter(match=f"{self._key(prefix)}*", count=500))
+        if keys:
+            self.redis.delete(*keys)
+        return len(keys)
@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping, Sequence
+from uuid import uuid4
+
+from smart_common.core.db import SessionLocal
+from smart_common.enums.event import EventType
+from smart_common.models.provider import Provider
+from smart_common.providers.adapters.factory import (
+    VendorAdapterFactory,
+    get_vendor_adapter_factory,
+)
+from smart_common.providers.batch import ProviderBatch, afetch_batch, group_providers
+from smart_common.providers.enums import ProviderVendor
+from smart_common.providers.provider_config.config import provider_settings
+from smart_common.repositories.measurement_repository import MeasurementRepository
+from smart_common.repositories.provider import ProviderRepository
+from smart_common.schemas.normalized_measurement import NormalizedMeasurement
+
+logger = logging.getLogger(__name__)
+
+MeasurementItem = tuple[Provider, NormalizedMeasurement]
+
+
+# ----------------------------------------------------------------------
+# Rate limiting
+# ----------------------------------------------------------------------
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `burst` stored."""
+
+    def __init__(
+        self, rate: float, burst: int, *, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 1) -> None:
+        # Large requests are capped to the bucket size so they can proceed.
+        tokens = min(max(1, tokens), self.burst)
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class VendorLimits:
+    concurrency: int = provider_settings.POLL_VENDOR_CONCURRENCY
+    rate_per_sec: float = provider_settings.POLL_VENDOR_RATE_PER_SEC
+    burst: int = provider_settings.POLL_VENDOR_BURST
+
+
+class _VendorLimiter:
+    def __init__(self, limits: VendorLimits) -> None:
+        self.semaphore = asyncio.Semaphore(max(1, limits.concurrency))
+        self.bucket = TokenBucket(limits.rate_per_sec, limits.burst)
+
+
+# ----------------------------------------------------------------------
+# Sinks
+# ----------------------------------------------------------------------
+
+
+class MeasurementSink(ABC):
+    """Destination for polled measurements."""
+
+    @abstractmethod
+    async def write(self, items: Sequence[MeasurementItem], *, poll_id: str | None = None) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class DatabaseSink(MeasurementSink):
+    """Stores measurements with `MeasurementRepository.save_measurements`,
+    one transaction per poll, in a worker thread."""
+
+    def __init__(self, session_factory: Callable[[], Any] = SessionLocal) -> None:
+        self.session_factory = session_factory
+
+    async def write(self, items: Sequence[MeasurementItem], *, poll_id: str | None = None) -> None:
+        if items:
+            await asyncio.to_thread(self._write, items, poll_id)
+
+    def _write(self, items: Sequence[MeasurementItem], poll_id: str | None) -> None:
+        session = self.session_factory()
+        try:
+            MeasurementRepository(session).save_measurements(items, poll_id=poll_id)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class NatsSink(MeasurementSink):
+    """Publishes each measurement as a POWER_READING event of its provider."""
+
+    ENTITY_TYPE = "provider"
+    DEFAULT_SOURCE = "provider-poller"
+
+    def __init__(self, publisher: Any = None, *, source: str = DEFAULT_SOURCE) -> None:
+        # Imported here so DB-only pollers do not need the NATS client.
+        from smart_common.events.event_dispatcher import EventDispatcher
+
+        if publisher is None:
+            from smart_common.nats.publisher import publisher as default_publisher
+
+            publisher = default_publisher
+        self.dispatcher = EventDispatcher(publisher, default_source=source)
+
+    async def write(self, items: Sequence[MeasurementItem], *, poll_id: str | None = None) -> None:
+        results = await asyncio.gather(
+            *(
+                self.dispatcher.publish_event(
+                    entity_type=self.ENTITY_TYPE,
+                    entity_id=str(provider.uuid),
+                    event_type=EventType.POWER_READING,
+                    data={
+                        "provider_id": provider.id,
+                        "value": measurement.value,
+                        "unit": measurement.unit,
+                        "measured_at": measurement.measured_at.isoformat(),
+                        "metadata": dict(measurement.metadata or {}),
+                    },
+                    context={"provider_id": provider.id, "poll_id": poll_id},
+                )
+                for provider, measurement in items
+            ),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
+
+
+class CompositeSink(MeasurementSink):
+    """Writes to every sink; one failing sink does not stop the others."""
+
+    def __init__(self, *sinks: MeasurementSink) -> None:
+        self.sinks = list(sinks)
+
+    async def write(self, items: Sequence[MeasurementItem], *, poll_id: str | None = None) -> None:
+        results = await asyncio.gather(
+            *(sink.write(items, poll_id=poll_id) for sink in self.sinks),
+            return_exceptions=True,
+        )
+        failed = [
+            (sink, result)
+            for sink, result in zip(self.sinks, results)
+            if isinstance(result, Exception)
+        ]
+        for sink, error in failed:
+            logger.error(
+                "Measurement sink failed",
+                extra={"sink": type(sink).__name__, "poll_id": poll_id, "error": str(error)},
+            )
+        if failed and len(failed) == len(self.sinks):
+            raise failed[0][1]
+
+    async def close(self) -> None:
+        for sink in self.sinks:
+            await sink.close()
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class _Scheduled:
+    batch: ProviderBatch
+    interval: float
+    due: float
+    running: bool = False
+
+    @property
+    def key(self) -> tuple[int, ...]:
+        return tuple(sorted(p.id for p in self.batch.providers))
+
+
+@dataclass
+class PollingStats:
+    polls: int = 0
+    failures: int = 0
+    sink_failures: int = 0
+    measurements: int = 0
+    skipped_overlap: int = 0
+    config_errors: int = 0
+    by_vendor: dict[str, int] = field(default_factory=dict)
+
+
+def _load_active_providers() -> list[Provider]:
+    session = SessionLocal()
+    try:
+        # Credentials are eager-loaded, so the detached rows stay usable.
+        return ProviderRepository(session).get_active_providers()
+    finally:
+        session.close()
+
+
+class PollingEngine:
+    """Polls every enabled provider on its own interval.
+
+    Providers of one vendor account are grouped into batches (see
+    `providers.batch`). Each batch is scheduled on the shortest
+    `expected_interval_sec` among its providers, with random jitter and a
+    random first offset so polls never line up. Fetches go through a
+    per-vendor concurrency cap and token bucket; results go to `sink`.
+    """
+
+    def __init__(
+        self,
+        sink: MeasurementSink,
+        *,
+        load_providers: Callable[[], Iterable[Provider]] = _load_active_providers,
+        factory: VendorAdapterFactory | None = None,
+        limits: Mapping[ProviderVendor, VendorLimits] | None = None,
+        jitter_ratio: float | None = None,
+        refresh_interval: float | None = None,
+    ) -> None:
+        self.sink = sink
+        self.load_providers = load_providers
+        self.factory = factory
+        self.limits = dict(limits or {})
+        self.jitter_ratio = (
+            provider_settings.POLL_JITTER_RATIO if jitter_ratio is None else jitter_ratio
+        )
+        self.refresh_interval = refresh_interval or provider_settings.POLL_REFRESH_INTERVAL_SEC
+        self.stats = PollingStats()
+
+        self._schedule: list[tuple[float, int, _Scheduled]] = []
+        self._entries: dict[tuple[int, ...], _Scheduled] = {}
+        self._limiters: dict[Any, _VendorLimiter] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._counter = 0
+        self._stop = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def run(self) -> None:
+        self._stop.clear()
+        next_refresh = 0.0
+        logger.info("Provider polling engine started")
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now >= next_refresh:
+                    await self.refresh()
+                    next_refresh = now + self.refresh_interval
+
+                due_in = self._schedule[0][0] - now if self._schedule else self.refresh_interval
+                if due_in > 0:
+                    await self._sleep(min(due_in, next_refresh - now))
+                    continue
+
+                _, _, entry = heapq.heappop(self._schedule)
+                if self._entries.get(entry.key) is not entry:
+                    continue  # dropped by a refresh
+                self._start(entry)
+                self._push(entry, self._next_due(entry.due, entry.interval))
+        finally:
+            await self._drain()
+            logger.info("Provider polling engine stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    async def refresh(self) -> None:
+        """Reload enabled providers and rebuild the schedule.
+
+        Providers keep their place in the schedule across refreshes.
+        """
+        try:
+            batches, errors = await asyncio.to_thread(self._group)
+        except Exception as exc:
+            logger.error("Provider refresh failed", extra={"error": str(exc)})
+            return
+
+        self.stats.config_errors = len(errors)
+        previous = self._entries
+        due_by_provider = {
+            provider.id: entry.due
+            for entry in previous.values()
+            for provider in entry.batch.providers
+        }
+
+        now = time.monotonic()
+        self._entries = {}
+        self._schedule = []
+        for batch in batches:
+            interval = self._interval(batch)
+            known = [due_by_provider[p.id] for p in batch.providers if p.id in due_by_provider]
+            # New providers start at a random point of their first interval.
+            due = min(known) if known else now + random.uniform(0, interval)
+
+            entry = _Scheduled(batch=batch, interval=interval, due=due)
+            existing = previous.get(entry.key)
+            if existing is not None:
+                # Same object, so a poll in flight still clears its flag.
+                existing.batch, existing.interval = batch, interval
+                entry = existing
+            self._entries[entry.key] = entry
+            self._push(entry, due)
+
+        logger.info(
+            "Provider polling schedule refreshed",
+            extra={"batches": len(batches), "config_errors": len(errors)},
+        )
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    def _start(self, entry: _Scheduled) -> None:
+        if entry.running:
+            # Never overlap polls of one batch; it catches up next time.
+            self.stats.skipped_overlap += 1
+            logger.debug("Poll still running, skipping", extra={"providers": list(entry.key)})
+            return
+
+        entry.running = True
+        task = asyncio.get_running_loop().create_task(self._poll(entry))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _poll(self, entry: _Scheduled) -> None:
+        batch = entry.batch
+        vendor = batch.adapter.vendor
+        poll_id = uuid4().hex[:12]
+        limiter = self._limiter(vendor)
+        try:
+            async with limiter.semaphore:
+                await limiter.bucket.acquire(self._request_cost(batch))
+                self.stats.polls += 1
+                vendor_name = vendor.value if vendor else "unknown"
+                self.stats.by_vendor[vendor_name] = self.stats.by_vendor.get(vendor_name, 0) + 1
+                setattr(batch.adapter, "poll_id", poll_id)
+                measurements = await afetch_batch(batch)
+        except Exception as exc:
+            self.stats.failures += 1
+            logger.warning(
+                "Provider poll failed",
+                extra={
+                    "poll_id": poll_id,
+                    "vendor": vendor.value if vendor else None,
+                    "providers": list(entry.key),
+                    "error": str(exc),
+                },
+            )
+            return
+        finally:
+            entry.running = False
+
+        providers = {p.id: p for p in batch.providers}
+        items = [(providers[pid], m) for pid, m in measurements.items() if pid in providers]
+        self.stats.measurements += len(items)
+        try:
+            await self.sink.write(items, poll_id=poll_id)
+        except Exception as exc:
+            self.stats.sink_failures += 1
+            logger.error(
+                "Measurement sink write failed",
+                extra={"poll_id": poll_id, "count": len(items), "error": str(exc)},
+            )
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _group(self) -> tuple[list[ProviderBatch], dict]:
+        providers = list(self.load_providers())
+        return group_providers(
+            providers, factory=self.factory or get_vendor_adapter_factory()
+        )
+
+    def _interval(self, batch: ProviderBatch) -> float:
+        intervals = [
+            p.expected_interval_sec for p in batch.providers if p.expected_interval_sec
+        ]
+        interval = min(intervals) if intervals else provider_settings.POLL_DEFAULT_INTERVAL_SEC
+        return float(max(interval, provider_settings.POLL_MIN_INTERVAL_SEC))
+
+    def _next_due(self, due: float, interval: float) -> float:
+        spread = interval * self.jitter_ratio
+        next_due = due + interval + random.uniform(-spread, spread)
+        # After a stall, resume from now instead of firing a burst of polls.
+        return max(next_due, time.monotonic() + random.uniform(0, spread))
+
+    def _push(self, entry: _Scheduled, due: float) -> None:
+        entry.due = due
+        self._counter += 1
+        heapq.heappush(self._schedule, (due, self._counter, entry))
+
+    def _limiter(self, vendor: Any) -> _VendorLimiter:
+        limiter = self._limiters.get(vendor)
+        if limiter is None:
+            limiter = self._limiters[vendor] = _VendorLimiter(
+                self.limits.get(vendor, VendorLimits())
+            )
+        return limiter
+
+    @staticmethod
+    def _request_cost(batch: ProviderBatch) -> int:
+        if not batch.batched:
+            return 1
+        return math.ceil(len(batch.device_ids) / batch.adapter.measurement_batch_size)
+
+    async def _sleep(self, timeout: float) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _drain(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self.sink.close()
+
+
+__all__ = [
+    "TokenBucket",
+    "VendorLimits",
+    "MeasurementSink",
+    "DatabaseSink",
+    "NatsSink",
+    "CompositeSink",
+    "PollingStats",
+    "PollingEngine",
+]
@@ -26,6 +26,154 @@ class ProviderIntegrationSettings(BaseSettings):
         description="Max retry attempts for Huawei API requests",
     )
 
+    # ------------------------------------------------------------------
+    # Async HTTP transport (shared per host)
+    # ------------------------------------------------------------------
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = Field(
+        default=20,
+        gt=0,
+        description="Max open connections per provider host across adapters",
+    )
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = Field(
+        default=10,
+        ge=0,
+        description="Idle keep-alive connections kept per provider host",
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,
+        description="Seconds an idle connection is kept open",
+    )
+    HTTP2_ENABLED: bool = Field(
+        default=True,
+        description="Use HTTP/2 when the h2 package is installed",
+    )
+
+    # ------------------------------------------------------------------
+    # Retries and circuit breaker (per host + endpoint)
+    # ------------------------------------------------------------------
+    HTTP_BACKOFF_BASE: float = Field(
+        default=0.5,
+        ge=0,
+        description="First retry delay in seconds; doubles per attempt (full jitter)",
+    )
+    HTTP_BACKOFF_MAX: float = Field(
+        default=10.0,
+        ge=0,
+        description="Upper bound for a single retry delay",
+    )
+    HTTP_RETRY_AFTER_MAX: float = Field(
+        default=30.0,
+        ge=0,
+        description="Longest Retry-After honoured inline; longer ones open the circuit",
+    )
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5,
+        gt=0,
+        description="Consecutive failures that open an endpoint circuit",
+    )
+    CIRCUIT_RESET_TIMEOUT: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds an open circuit waits before a half-open probe",
+    )
+    CIRCUIT_MAX_RESET_TIMEOUT: float = Field(
+        default=600.0,
+        gt=0,
+        description="Cap for the open period, which doubles after each failed probe",
+    )
+
+    # ------------------------------------------------------------------
+    # Metadata cache (station / device lists)
+    # ------------------------------------------------------------------
+    METADATA_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Cache slowly-changing provider metadata responses",
+    )
+    METADATA_CACHE_TTL_SECONDS: int = Field(
+        default=6 * 3600,
+        gt=0,
+        description="How long station/device lists are served from cache",
+    )
+
+    # ------------------------------------------------------------------
+    # Adapter pool
+    # ------------------------------------------------------------------
+    ADAPTER_POOL_MAX_SIZE: int = Field(
+        default=512,
+        gt=0,
+        description="Max provider adapters (open sessions) kept per process",
+    )
+    ADAPTER_POOL_IDLE_TTL: float = Field(
+        default=900.0,
+        gt=0,
+        description="Seconds an unused adapter is kept before it is closed",
+    )
+    ADAPTER_BODY_LOG_MAX_CHARS: int = Field(
+        default=2048,
+        gt=0,
+        description="Max characters of a request/response body written to logs",
+    )
+    ADAPTER_BODY_LOG_SAMPLE_RATE: float = Field(
+        default=0.0,
+        ge=0,
+        le=1,
+        description="Share of requests whose bodies are logged below DEBUG level",
+    )
+
+    # ------------------------------------------------------------------
+    # Polling engine
+    # ------------------------------------------------------------------
+    POLL_DEFAULT_INTERVAL_SEC: int = Field(
+        default=60,
+        gt=0,
+        description="Poll interval for providers without expected_interval_sec",
+    )
+    POLL_MIN_INTERVAL_SEC: int = Field(
+        default=10,
+        gt=0,
+        description="Lower bound for any provider poll interval",
+    )
+    POLL_JITTER_RATIO: float = Field(
+        default=0.1,
+        ge=0,
+        lt=1,
+        description="Random +/- share of the interval added to every schedule",
+    )
+    POLL_REFRESH_INTERVAL_SEC: float = Field(
+        default=300.0,
+        gt=0,
+        description="How often the set of enabled providers is reloaded",
+    )
+    POLL_VENDOR_CONCURRENCY: int = Field(
+        default=4,
+        gt=0,
+        description="Concurrent polls per vendor",
+    )
+    POLL_VENDOR_RATE_PER_SEC: float = Field(
+        default=2.0,
+        gt=0,
+        description="Sustained vendor API requests per second (token bucket rate)",
+    )
+    POLL_VENDOR_BURST: int = Field(
+        default=5,
+        gt=0,
+        description="Vendor API requests allowed in a burst (token bucket size)",
+    )
+
+    # ------------------------------------------------------------------
+    # History backfill
+    # ------------------------------------------------------------------
+    BACKFILL_WINDOWS_IN_FLIGHT: int = Field(
+        default=4,
+        gt=0,
+        description="History windows fetched ahead per device group during a backfill",
+    )
+    BACKFILL_FLUSH_ROWS: int = Field(
+        default=50_000,
+        gt=0,
+        description="Measurements buffered before a backfill COPY and checkpoint",
+    )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -15,5 +15,11 @@ class GoodWeProviderIntegrationSettings(ProviderIntegrationSettings):
         description="Max retry attempts for GoodWe API requests",
     )
 
+    GOODWE_TOKEN_TTL_SECONDS: int = Field(
+        default=3600,
+        gt=0,
+        description="How long a SEMS login token is reused before logging in again",
+    )
+
 
 goodwe_integration_settings = GoodWeProviderIntegrationSettings()
@@ -1,10 +1,13 @@
+from .backfill_checkpoint import BackfillCheckpointRepository
 from .base import BaseRepository
 from .device import DeviceRepository
 from .device_event import DeviceEventRepository
 from .device_schedule import DeviceScheduleRepository
 from .microcontroller import MicrocontrollerRepository
 from .provider import ProviderRepository
+from .measurement_bulk_loader import MeasurementBulkLoader
 from .measurement_repository import MeasurementRepository
+from .measurement_rollup_repository import MeasurementRollupRepository
 from .user import UserRepository
 
 __all__ = [
@@ -16,4 +19,7 @@ __all__ = [
     "MicrocontrollerRepository",
     "UserRepository",
     "MeasurementRepository",
+    "MeasurementRollupRepository",
+    "MeasurementBulkLoader",
+    "BackfillCheckpointRepository",
 ]
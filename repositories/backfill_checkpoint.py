@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Mapping, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from smart_common.models.provider_backfill_checkpoint import ProviderBackfillCheckpoint
+
+
+class BackfillCheckpointRepository:
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def get_many(self, provider_ids: Sequence[int]) -> dict[int, ProviderBackfillCheckpoint]:
+        if not provider_ids:
+            return {}
+        rows = self.session.execute(
+            select(ProviderBackfillCheckpoint).where(
+                ProviderBackfillCheckpoint.provider_id.in_(provider_ids)
+            )
+        ).scalars()
+        return {checkpoint.provider_id: checkpoint for checkpoint in rows}
+
+    def resume_from(
+        self, checkpoint: ProviderBackfillCheckpoint | None, start: datetime
+    ) -> datetime:
+        """Where a backfill from `start` continues: the checkpoint when it
+        covers `start` without a gap, otherwise `start` itself."""
+        if checkpoint is None:
+            return start
+        start_at, completed_until = _aware(checkpoint.start_at), _aware(checkpoint.completed_until)
+        if start_at <= _aware(start) <= completed_until:
+            return completed_until
+        return start
+
+    def advance(self, progress: Mapping[int, tuple[datetime, datetime]]) -> None:
+        """Record `(start_at, completed_until)` per provider id. A checkpoint
+        of the same range never moves backwards."""
+        existing = self.get_many(list(progress))
+        for provider_id, (start_at, completed_until) in progress.items():
+            checkpoint = existing.get(provider_id)
+            if checkpoint is None:
+                self.session.add(
+                    ProviderBackfillCheckpoint(
+                        provider_id=provider_id,
+                        start_at=start_at,
+                        completed_until=completed_until,
+                    )
+                )
+                continue
+            if _aware(checkpoint.start_at) == _aware(start_at):
+                completed_until = max(_aware(checkpoint.completed_until), _aware(completed_until))
+            checkpoint.start_at = start_at
+            checkpoint.completed_until = completed_until
+        self.session.flush()
+
+
+def _aware(moment: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are stored as UTC.
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
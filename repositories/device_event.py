@@ -1,17 +1,38 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Iterator, Sequence
 
-from sqlalchemy import and_
+from sqlalchemy import Select, and_, select
+from sqlalchemy.engine import Row
 
 from smart_common.enums.device_event import DeviceEventName, DeviceEventType
+from smart_common.models.device import Device
 from smart_common.models.device_event import DeviceEvent
+from smart_common.models.microcontroller import Microcontroller
 from smart_common.repositories.base import BaseRepository
 
+EXPORT_COLUMNS = (
+    "id",
+    "device_id",
+    "event_type",
+    "event_name",
+    "device_state",
+    "pin_state",
+    "measured_value",
+    "measured_unit",
+    "trigger_reason",
+    "source",
+    "created_at",
+)
+
 
 class DeviceEventRepository(BaseRepository[DeviceEvent]):
     model = DeviceEvent
 
+    # Rows fetched per round trip from the server-side cursor.
+    STREAM_CHUNK_SIZE = 10_000
+
     def create_state_event(
         self,
         device_id: int,
@@ -55,3 +76,45 @@ class DeviceEventRepository(BaseRepository[DeviceEvent]):
             .limit(limit)
             .all()
         )
+
+    def range_query(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        device_ids: Sequence[int] | None = None,
+        user_id: int | None = None,
+    ) -> Select:
+        """Plain-column select of events in [start, end), by device then time."""
+        stmt = select(*(getattr(self.model, name) for name in EXPORT_COLUMNS)).where(
+            self.model.created_at >= start,
+            self.model.created_at < end,
+        )
+        if device_ids is not None:
+            stmt = stmt.where(self.model.device_id.in_(device_ids))
+        if user_id is not None:
+            stmt = (
+                stmt.join(Device, Device.id == self.model.device_id)
+                .join(Microcontroller, Microcontroller.id == Device.microcontroller_id)
+                .where(Microcontroller.user_id == user_id)
+            )
+        return stmt.order_by(self.model.device_id, self.model.created_at, self.model.id)
+
+    def iter_range(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        device_ids: Sequence[int] | None = None,
+        user_id: int | None = None,
+        chunk_size: int | None = None,
+    ) -> Iterator[Row]:
+        """Stream `range_query` rows through a server-side cursor."""
+        stmt = self.range_query(start, end, device_ids=device_ids, user_id=user_id)
+        result = self.session.execute(
+            stmt.execution_options(yield_per=chunk_size or self.STREAM_CHUNK_SIZE)
+        )
+        try:
+            yield from result
+        finally:
+            result.close()
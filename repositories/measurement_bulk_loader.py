@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Sequence
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+from smart_common.models.provider_measurement import ProviderMeasurement
+from smart_common.schemas.normalized_measurement import NormalizedMeasurement
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "provider_measurements_staging"
+COPY_COLUMNS = ("provider_id", "measured_at", "measured_value", "measured_unit", "metadata")
+
+
+class MeasurementBulkLoader:
+    """Loads large sets of measurements, e.g. a historical backfill.
+
+    On PostgreSQL rows are streamed with `COPY ... FROM STDIN` into a
+    session-local staging table and merged into `provider_measurements` by
+    one INSERT ... SELECT that skips (provider_id, measured_at) pairs already
+    stored. Rows go in as they are: no latest-value dedup and no rollup
+    updates, unlike `MeasurementRepository.save_measurements`.
+    """
+
+    # Rows per multi-row INSERT on databases without COPY.
+    INSERT_CHUNK_SIZE = 1000
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def load(self, measurements: Iterable[NormalizedMeasurement]) -> int:
+        """Store `measurements`; returns the number of rows inserted."""
+        measurements = list(measurements)
+        if not measurements:
+            return 0
+        if self.session.get_bind().dialect.name == "postgresql":
+            inserted = self._copy_merge(measurements)
+        else:
+            inserted = self._insert_missing(measurements)
+
+        logger.info(
+            "Measurements bulk loaded",
+            extra={
+                "rows": len(measurements),
+                "inserted": inserted,
+                "skipped": len(measurements) - inserted,
+            },
+        )
+        return inserted
+
+    # ------------------------------------------------------------------
+    # PostgreSQL
+    # ------------------------------------------------------------------
+
+    def _copy_merge(self, measurements: Sequence[NormalizedMeasurement]) -> int:
+        # Kept per connection; ON COMMIT DELETE ROWS empties it between loads.
+        self.session.execute(
+            text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ("
+                "provider_id INTEGER NOT NULL, "
+                "measured_at TIMESTAMP WITH TIME ZONE NOT NULL, "
+                "measured_value DOUBLE PRECISION, "
+                "measured_unit VARCHAR(16), "
+                "metadata JSON NOT NULL"
+                ") ON COMMIT DELETE ROWS"
+            )
+        )
+        self.session.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+
+        dbapi_connection = self.session.connection().connection
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                _csv_buffer(measurements),
+                size=1 << 16,
+            )
+        finally:
+            cursor.close()
+
+        # Temp tables get no autovacuum statistics; without them the
+        # anti-join below is planned for a handful of rows.
+        self.session.execute(text(f"ANALYZE {STAGING_TABLE}"))
+        columns = ", ".join(COPY_COLUMNS)
+        result = self.session.execute(
+            text(
+                f"INSERT INTO {ProviderMeasurement.__tablename__} ({columns}) "
+                f"SELECT DISTINCT ON (s.provider_id, s.measured_at) "
+                f"{', '.join(f's.{name}' for name in COPY_COLUMNS)} "
+                f"FROM {STAGING_TABLE} s "
+                f"WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {ProviderMeasurement.__tablename__} m "
+                "WHERE m.provider_id = s.provider_id AND m.measured_at = s.measured_at"
+                ") "
+                "ORDER BY s.provider_id, s.measured_at"
+            )
+        )
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Other databases
+    # ------------------------------------------------------------------
+
+    def _insert_missing(self, measurements: Sequence[NormalizedMeasurement]) -> int:
+        by_provider: dict[int, dict[datetime, NormalizedMeasurement]] = {}
+        for measurement in measurements:
+            by_provider.setdefault(measurement.provider_id, {}).setdefault(
+                _utc(measurement.measured_at), measurement
+            )
+
+        rows = []
+        for provider_id, samples in by_provider.items():
+            existing = {
+                _utc(measured_at)
+                for measured_at in self.session.execute(
+                    select(ProviderMeasurement.measured_at).where(
+                        ProviderMeasurement.provider_id == provider_id,
+                        ProviderMeasurement.measured_at >= min(samples),
+                        ProviderMeasurement.measured_at <= max(samples),
+                    )
+                ).scalars()
+            }
+            rows.extend(
+                {
+                    "provider_id": provider_id,
+                    "measured_at": measured_at,
+                    "measured_value": measurement.value,
+                    "measured_unit": measurement.unit,
+                    "metadata_payload": dict(measurement.metadata or {}),
+                }
+                for measured_at, measurement in sorted(samples.items())
+                if measured_at not in existing
+            )
+
+        stmt = insert(ProviderMeasurement).execution_options(render_nulls=True)
+        for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+            self.session.execute(stmt, rows[start : start + self.INSERT_CHUNK_SIZE])
+        return len(rows)
+
+
+def _utc(moment: datetime) -> datetime:
+    # Naive values are taken as UTC, as everywhere else in the repository.
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _csv_buffer(measurements: Iterable[NormalizedMeasurement]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for measurement in measurements:
+        # An unquoted empty field is NULL in COPY's CSV format.
+        writer.writerow(
+            (
+                measurement.provider_id,
+                _utc(measurement.measured_at).isoformat(),
+                "" if measurement.value is None else repr(float(measurement.value)),
+                measurement.unit or "",
+                json.dumps(measurement.metadata or {}, default=str),
+            )
+        )
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from smart_common.models.provider_measurement import ProviderMeasurement
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = ProviderMeasurement.__tablename__
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_COLUMNS = "id, provider_id, measured_at, measured_value, measured_unit, metadata"
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(value: date | datetime) -> date:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partition_table(name: str | None) -> bool:
+    """True for partitions of provider_measurements (not in the ORM metadata)."""
+    return bool(name) and (name == DEFAULT_PARTITION or bool(_PARTITION_NAME.match(name)))
+
+
+def include_name(name: str | None, type_: str, parent_names: dict) -> bool:
+    """Alembic `include_name` hook keeping partitions out of autogenerate."""
+    return not (type_ == "table" and is_partition_table(name))
+
+
+@dataclass(frozen=True)
+class MeasurementPartition:
+    name: str
+    month: date
+
+    @property
+    def upper_bound(self) -> date:
+        return add_months(self.month, 1)
+
+
+class MeasurementPartitionManager:
+    """Creates monthly partitions ahead of time and drops expired ones.
+
+    Partitions are named `provider_measurements_yYYYYmMM` and cover one UTC
+    calendar month; rows outside every partition land in
+    `provider_measurements_default`, which should stay empty.
+    """
+
+    DEFAULT_AHEAD_MONTHS = 3
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def list_partitions(self) -> list[MeasurementPartition]:
+        rows = self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent"
+            ),
+            {"parent": PARENT_TABLE},
+        ).scalars()
+        partitions = []
+        for name in rows:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                partitions.append(
+                    MeasurementPartition(name, date(int(match[1]), int(match[2]), 1))
+                )
+        return sorted(partitions, key=lambda partition: partition.month)
+
+    def ensure_partitions(
+        self,
+        *,
+        ahead: int = DEFAULT_AHEAD_MONTHS,
+        today: date | None = None,
+    ) -> list[str]:
+        """Create partitions from the current month to `ahead` months out."""
+        current = month_start(today or datetime.now(timezone.utc))
+        return self._ensure_months(add_months(current, offset) for offset in range(ahead + 1))
+
+    def ensure_range(self, start: datetime, end: datetime) -> list[str]:
+        """Create partitions for every month touching [start, end), e.g.
+        before a historical backfill."""
+        first, last = month_start(start), month_start(end - timedelta(microseconds=1))
+        months = []
+        while first <= last:
+            months.append(first)
+            first = add_months(first, 1)
+        return self._ensure_months(months)
+
+    def drop_partitions_before(self, cutoff: date) -> list[str]:
+        """Detach and drop partitions whose whole month is before `cutoff`."""
+        cutoff = month_start(cutoff)
+        dropped = []
+        for partition in self.list_partitions():
+            if partition.upper_bound > cutoff:
+                continue
+            self.session.execute(
+                text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"')
+            )
+            self.session.execute(text(f'DROP TABLE "{partition.name}"'))
+            dropped.append(partition.name)
+
+        if dropped:
+            logger.info(
+                "Measurement partitions dropped",
+                extra={"partitions": dropped, "cutoff": cutoff.isoformat()},
+            )
+        return dropped
+
+    def apply_retention(self, months: int, *, today: date | None = None) -> list[str]:
+        """Keep the current month plus `months` full months; 0 keeps all."""
+        if months <= 0:
+            return []
+        current = month_start(today or datetime.now(timezone.utc))
+        return self.drop_partitions_before(add_months(current, -months))
+
+    def rehome_default_rows(self) -> list[str]:
+        """Create the partitions of months that have rows in the default
+        partition (late, future-dated or written while maintenance lapsed);
+        their rows are moved in."""
+        months = self.session.execute(
+            text(
+                "SELECT DISTINCT date_trunc('month', measured_at AT TIME ZONE 'UTC')::date "
+                f'FROM "{DEFAULT_PARTITION}"'
+            )
+        ).scalars()
+        return self._ensure_months(sorted(months))
+
+    def default_partition_rows(self) -> int:
+        """Rows that fell outside every monthly partition."""
+        return self.session.execute(
+            text(f'SELECT count(*) FROM "{DEFAULT_PARTITION}"')
+        ).scalar_one()
+
+    def _ensure_months(self, months: Iterable[date]) -> list[str]:
+        existing = {partition.month for partition in self.list_partitions()}
+        created = []
+        for month in months:
+            if month in existing:
+                continue
+            self._create_partition(month)
+            created.append(partition_name(month))
+
+        if created:
+            logger.info(
+                "Measurement partitions created",
+                extra={"partitions": created},
+            )
+        return created
+
+    def _create_partition(self, month: date) -> None:
+        name = partition_name(month)
+        bounds = {
+            "lower": f"{month.isoformat()} 00:00:00+00",
+            "upper": f"{add_months(month, 1).isoformat()} 00:00:00+00",
+        }
+        create = text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" '
+            f"PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+        )
+        in_month = (
+            "measured_at >= CAST(:lower AS timestamptz) "
+            "AND measured_at < CAST(:upper AS timestamptz)"
+        )
+        stray = self.session.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_month})'),
+            bounds,
+        ).scalar_one()
+        if not stray:
+            self.session.execute(create)
+            return
+
+        # The new bounds would overlap rows already in the default
+        # partition, so it is detached while they move (same transaction).
+        self.session.execute(
+            text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{DEFAULT_PARTITION}"')
+        )
+        self.session.execute(create)
+        moved = self.session.execute(
+            text(
+                f"WITH moved AS ("
+                f'DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month} '
+                f"RETURNING {_COLUMNS}) "
+                f'INSERT INTO "{name}" ({_COLUMNS}) SELECT {_COLUMNS} FROM moved'
+            ),
+            bounds,
+        ).rowcount
+        self.session.execute(
+            text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+        )
+        logger.warning(
+            "Measurement rows moved out of the default partition",
+            extra={"partition": name, "rows": moved},
+        )
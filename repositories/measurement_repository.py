@@ -1,21 +1,72 @@
 from __future__ import annotations
 
+import base64
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence, Tuple
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from typing import Iterable
+from sqlalchemy import bindparam, insert, select, true, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from smart_common.core.config import settings
 from smart_common.models.provider import Provider
 from smart_common.models.provider_measurement import ProviderMeasurement
+from smart_common.repositories.measurement_rollup_repository import (
+    MeasurementRollupRepository,
+    RollupSample,
+    trapezoid_energy,
+)
 from smart_common.schemas.normalized_measurement import NormalizedMeasurement
 
 logger = logging.getLogger(__name__)
 
+MeasurementPair = Tuple[Provider, NormalizedMeasurement]
+
+
+@dataclass
+class BulkSaveResult:
+    inserted: int = 0
+    refreshed: int = 0
+
+
+class MeasurementArrays(NamedTuple):
+    """One chunk of history as NumPy arrays; NULL values become NaN."""
+
+    measured_at: Any  # datetime64[us], UTC
+    measured_value: Any  # float64
+
+
+def encode_cursor(measured_at: datetime, measurement_id: int) -> str:
+    raw = f"{measured_at.isoformat()}|{measurement_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        measured_at, measurement_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(measured_at), int(measurement_id)
+    except ValueError as exc:
+        raise ValueError("invalid measurement cursor") from exc
+
 
 class MeasurementRepository:
-    def __init__(self, session: Session) -> None:
+    # Rows per multi-row INSERT; keeps bind parameters well below driver limits.
+    INSERT_CHUNK_SIZE = 1000
+    # Rows fetched per round trip from the server-side cursor.
+    STREAM_CHUNK_SIZE = 10_000
+    MAX_PAGE_SIZE = 1000
+
+    def __init__(self, session: Session, *, rollups: bool | None = None) -> None:
         self.session = session
+        self.rollups = settings.MEASUREMENT_ROLLUPS_ENABLED if rollups is None else rollups
 
     def save_measurement(
         self,
@@ -28,6 +79,15 @@ class MeasurementRepository:
             raise ValueError("provider must be persisted before saving measurements")
 
         last_entry = self._fetch_last_measurement(provider.id)
+        self._apply_rollups(
+            [
+                self._rollup_sample(
+                    provider.id,
+                    measurement,
+                    (last_entry.measured_at, last_entry.measured_value) if last_entry else None,
+                )
+            ]
+        )
         if last_entry and self._is_equivalent(last_entry, measurement):
             self._update_last_measurement(
                 last_entry,
@@ -59,6 +119,201 @@ class MeasurementRepository:
 
         return entry
 
+    def save_measurements(
+        self,
+        batch: Sequence[MeasurementPair],
+        *,
+        poll_id: str | None = None,
+    ) -> BulkSaveResult:
+        """Set-based `save_measurement` for many providers.
+
+        Same dedup rule: a sample equal to the provider's latest one only
+        refreshes that row. Pairs are applied in order, so repeated samples
+        of one provider within the batch collapse the same way. Issues one
+        query for the previous rows, one executemany UPDATE, chunked
+        multi-row INSERTs and, with rollups on, one rollup upsert per chunk.
+        """
+        result = BulkSaveResult()
+        if not batch:
+            return result
+
+        for provider, _ in batch:
+            if provider.id is None:
+                raise ValueError("provider must be persisted before saving measurements")
+
+        latest = self._fetch_latest_rows({provider.id for provider, _ in batch})
+        # provider_id -> row dict that the next sample is compared against;
+        # either a pending insert or a pending update of an existing row.
+        current: dict[int, dict[str, Any]] = {}
+        updates: dict[int, dict[str, Any]] = {}
+        inserts: list[dict[str, Any]] = []
+        # Every sample feeds the rollups, including ones that only refresh.
+        previous_sample = {
+            provider_id: (row["_prev_measured_at"], row["measured_value"])
+            for provider_id, row in latest.items()
+        }
+        rollup_samples: list[RollupSample | None] = []
+
+        for provider, measurement in batch:
+            rollup_samples.append(
+                self._rollup_sample(provider.id, measurement, previous_sample.get(provider.id))
+            )
+            previous_sample[provider.id] = (measurement.measured_at, measurement.value)
+
+            previous = current.get(provider.id)
+            if previous is None and provider.id in latest:
+                previous = latest[provider.id]
+
+            if previous is not None and self._matches(
+                previous["measured_value"], previous["measured_unit"], measurement
+            ):
+                previous.update(self._measurement_values(measurement))
+                if "_id" in previous:
+                    updates[previous["_id"]] = previous
+                current[provider.id] = previous
+                continue
+
+            row = {"provider_id": provider.id, **self._measurement_values(measurement)}
+            inserts.append(row)
+            current[provider.id] = row
+
+        if updates:
+            self._bulk_update(list(updates.values()))
+        for start in range(0, len(inserts), self.INSERT_CHUNK_SIZE):
+            self.session.execute(
+                # render_nulls keeps rows with a NULL value in the same VALUES batch.
+                insert(ProviderMeasurement).execution_options(render_nulls=True),
+                inserts[start : start + self.INSERT_CHUNK_SIZE],
+            )
+        self._apply_rollups(rollup_samples)
+
+        result.inserted = len(inserts)
+        result.refreshed = len(updates)
+        logger.info(
+            "Measurement batch persisted",
+            extra={
+                "poll_id": poll_id,
+                "samples": len(batch),
+                "inserted": result.inserted,
+                "refreshed": result.refreshed,
+            },
+        )
+        return result
+
+    def _apply_rollups(self, samples: Iterable[RollupSample | None]) -> None:
+        if not self.rollups:
+            return
+        samples = [sample for sample in samples if sample is not None]
+        if samples:
+            MeasurementRollupRepository(self.session).apply_samples(samples)
+
+    @staticmethod
+    def _rollup_sample(
+        provider_id: int,
+        measurement: NormalizedMeasurement,
+        previous: tuple[Any, Any] | None,
+    ) -> RollupSample | None:
+        if measurement.value is None:
+            return None
+        previous_at, previous_value = previous or (None, None)
+        return RollupSample(
+            provider_id=provider_id,
+            measured_at=measurement.measured_at,
+            value=float(measurement.value),
+            unit=measurement.unit,
+            energy=trapezoid_energy(
+                previous_at, previous_value, measurement.measured_at, measurement.value
+            ),
+        )
+
+    def _fetch_latest_rows(self, provider_ids: set[int]) -> dict[int, dict[str, Any]]:
+        """Latest row per provider as update-ready dicts, in one query."""
+        stmt = self._latest_per_provider(
+            provider_ids,
+            "id",
+            "provider_id",
+            "measured_at",
+            "measured_value",
+            "measured_unit",
+        )
+        return {
+            row.provider_id: {
+                "_id": row.id,
+                "_prev_measured_at": row.measured_at,
+                "measured_value": row.measured_value,
+                "measured_unit": row.measured_unit,
+            }
+            for row in self.session.execute(stmt)
+        }
+
+    @staticmethod
+    def _latest_per_provider(provider_ids: Iterable[int], *columns: str):
+        """Newest measurement of each provider via `JOIN LATERAL (... LIMIT 1)`.
+
+        Each lateral probe reads one entry of
+        ix_provider_measurements_provider_measured_at, so the cost depends on
+        the number of providers, not on their history. Selects the whole
+        entity unless column names are given.
+        """
+        latest = (
+            select(ProviderMeasurement)
+            .where(ProviderMeasurement.provider_id == Provider.id)
+            .order_by(ProviderMeasurement.measured_at.desc())
+            .limit(1)
+            .lateral("latest_measurement")
+        )
+        entity = aliased(ProviderMeasurement, latest)
+        selected = [getattr(entity, name) for name in columns] if columns else [entity]
+        return (
+            select(*selected)
+            .select_from(Provider)
+            .join(latest, true())
+            .where(Provider.id.in_(provider_ids))
+        )
+
+    def _bulk_update(self, rows: list[dict[str, Any]]) -> None:
+        # Core executemany; bind names must not clash with the SET columns.
+        # measured_at is part of the key and lets Postgres prune partitions.
+        table = ProviderMeasurement.__table__
+        stmt = (
+            update(table)
+            .where(
+                table.c.id == bindparam("_id"),
+                table.c.measured_at == bindparam("_prev_measured_at"),
+            )
+            .values(
+                {
+                    table.c.measured_at: bindparam("_measured_at"),
+                    table.c.measured_value: bindparam("_value"),
+                    table.c.measured_unit: bindparam("_unit"),
+                    ProviderMeasurement.metadata_payload: bindparam("_metadata"),
+                }
+            )
+        )
+        self.session.execute(
+            stmt,
+            [
+                {
+                    "_id": row["_id"],
+                    "_prev_measured_at": row["_prev_measured_at"],
+                    "_measured_at": row["measured_at"],
+                    "_value": row["measured_value"],
+                    "_unit": row["measured_unit"],
+                    "_metadata": row["metadata_payload"],
+                }
+                for row in rows
+            ],
+        )
+
+    @staticmethod
+    def _measurement_values(measurement: NormalizedMeasurement) -> dict[str, Any]:
+        return {
+            "measured_at": measurement.measured_at,
+            "measured_value": measurement.value,
+            "measured_unit": measurement.unit,
+            "metadata_payload": dict(measurement.metadata or {}),
+        }
+
     def _update_last_measurement(
         self,
         entry: ProviderMeasurement,
@@ -94,27 +349,164 @@ class MeasurementRepository:
             .first()
         )
 
+    # ------------------------------------------------------------------
+    # History reads
+    # ------------------------------------------------------------------
+
+    def iter_range(
+        self,
+        provider_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        chunk_size: int | None = None,
+        with_metadata: bool = False,
+    ) -> Iterator[Row]:
+        """Stream `(measured_at, measured_value, measured_unit[, metadata_payload])`
+        rows of [start, end) in time order.
+
+        Uses a server-side cursor, so memory stays at one chunk regardless of
+        the range. The session's connection is busy until the generator is
+        exhausted or closed.
+        """
+        columns = [
+            ProviderMeasurement.measured_at,
+            ProviderMeasurement.measured_value,
+            ProviderMeasurement.measured_unit,
+        ]
+        if with_metadata:
+            columns.append(ProviderMeasurement.metadata_payload)
+        stmt = (
+            select(*columns)
+            .where(
+                ProviderMeasurement.provider_id == provider_id,
+                ProviderMeasurement.measured_at >= start,
+                ProviderMeasurement.measured_at < end,
+            )
+            .order_by(ProviderMeasurement.measured_at)
+            .execution_options(yield_per=chunk_size or self.STREAM_CHUNK_SIZE)
+        )
+        result = self.session.execute(stmt)
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    def iter_range_arrays(
+        self,
+        provider_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        chunk_size: int | None = None,
+    ) -> Iterator[MeasurementArrays]:
+        """Like `iter_range`, but one `MeasurementArrays` per fetched chunk."""
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        stmt = (
+            select(ProviderMeasurement.measured_at, ProviderMeasurement.measured_value)
+            .where(
+                ProviderMeasurement.provider_id == provider_id,
+                ProviderMeasurement.measured_at >= start,
+                ProviderMeasurement.measured_at < end,
+            )
+            .order_by(ProviderMeasurement.measured_at)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = self.session.execute(stmt)
+        try:
+            for rows in result.partitions():
+                yield MeasurementArrays(
+                    measured_at=np.array(
+                        [_utc_naive(row[0]) for row in rows], dtype="datetime64[us]"
+                    ),
+                    measured_value=np.fromiter(
+                        (np.nan if row[1] is None else row[1] for row in rows),
+                        dtype=np.float64,
+                        count=len(rows),
+                    ),
+                )
+        finally:
+            result.close()
+
+    def page_range(
+        self,
+        provider_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        limit: int = 500,
+        cursor: str | None = None,
+    ) -> tuple[list[Row], str | None]:
+        """Keyset page of [start, end) ordered by (measured_at, id).
+
+        Returns rows shaped like `ProviderMeasurementResponse` and the cursor
+        of the next page (None on the last one). Each page is an index range
+        scan, however deep the client pages.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        stmt = (
+            select(
+                ProviderMeasurement.id,
+                ProviderMeasurement.measured_at,
+                ProviderMeasurement.measured_value,
+                ProviderMeasurement.measured_unit,
+                ProviderMeasurement.metadata_payload,
+            )
+            .where(
+                ProviderMeasurement.provider_id == provider_id,
+                ProviderMeasurement.measured_at >= start,
+                ProviderMeasurement.measured_at < end,
+            )
+            .order_by(ProviderMeasurement.measured_at, ProviderMeasurement.id)
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            stmt = stmt.where(
+                tuple_(ProviderMeasurement.measured_at, ProviderMeasurement.id)
+                > tuple_(*decode_cursor(cursor))
+            )
+
+        rows = list(self.session.execute(stmt))
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].measured_at, rows[-1].id)
+
     def get_last_measurements(
         self,
         provider_ids: Iterable[int],
     ) -> dict[int, ProviderMeasurement]:
+        provider_ids = set(provider_ids)
         if not provider_ids:
             return {}
 
-        stmt = (
-            select(ProviderMeasurement)
-            .where(ProviderMeasurement.provider_id.in_(provider_ids))
-            .order_by(
-                ProviderMeasurement.provider_id, ProviderMeasurement.measured_at.desc()
+        stmt = self._latest_per_provider(provider_ids)
+        return {
+            measurement.provider_id: measurement
+            for measurement in self.session.execute(stmt).scalars()
+        }
+
+    def first_measured_at(self, provider_id: int, since: datetime) -> datetime | None:
+        """Time of the provider's first measurement at or after `since`."""
+        return self.session.execute(
+            select(ProviderMeasurement.measured_at)
+            .where(
+                ProviderMeasurement.provider_id == provider_id,
+                ProviderMeasurement.measured_at >= since,
             )
-        )
-        results = self.session.execute(stmt).scalars()
-        last_by_provider: dict[int, ProviderMeasurement] = {}
-        for measurement in results:
-            provider_id = measurement.provider_id
-            if provider_id not in last_by_provider:
-                last_by_provider[provider_id] = measurement
-        return last_by_provider
+            .order_by(ProviderMeasurement.measured_at)
+            .limit(1)
+        ).scalar_one_or_none()
+
+    def preload_last_values(self, providers: Iterable[Provider]) -> None:
+        """Fill `Provider.last_value` for all providers with one query."""
+        providers = [provider for provider in providers if provider.id is not None]
+        last = self.get_last_measurements(provider.id for provider in providers)
+        for provider in providers:
+            provider.set_last_value(last.get(provider.id))
 
     def _is_equivalent(
         self,
@@ -123,10 +515,24 @@ class MeasurementRepository:
     ) -> bool:
         if last_entry is None:
             return False
+        return self._matches(last_entry.measured_value, last_entry.measured_unit, measurement)
 
-        if last_entry.measured_unit != measurement.unit:
+    @staticmethod
+    def _matches(
+        value: Any,
+        unit: str | None,
+        measurement: NormalizedMeasurement,
+    ) -> bool:
+        if unit != measurement.unit:
             return False
 
-        if last_entry.measured_value is None or measurement.value is None:
-            return last_entry.measured_value is None and measurement.value is None
-        return float(last_entry.measured_value) == measurement.value
+        if value is None or measurement.value is None:
+            return value is None and measurement.value is None
+        return float(value) == measurement.value
+
+
+def _utc_naive(moment: datetime) -> datetime:
+    # numpy datetime64 has no timezone; normalise to naive UTC.
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
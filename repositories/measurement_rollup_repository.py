@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import bindparam, case, delete, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from smart_common.core.config import settings
+from smart_common.enums.rollup import RollupResolution
+from smart_common.models.provider import Provider
+from smart_common.models.provider_measurement_rollup import ProviderMeasurementRollup
+
+logger = logging.getLogger(__name__)
+
+# Finest first.
+RESOLUTIONS: tuple[RollupResolution, ...] = tuple(
+    sorted(RollupResolution, key=lambda resolution: resolution.seconds)
+)
+BASE_RESOLUTION = RESOLUTIONS[0]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bucket_start(moment: datetime, resolution: RollupResolution) -> datetime:
+    """Start of the UTC-aligned bucket containing `moment`."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    elapsed = (moment - _EPOCH).total_seconds()
+    return _EPOCH + timedelta(seconds=elapsed // resolution.seconds * resolution.seconds)
+
+
+def trapezoid_energy(
+    previous_at: datetime | None,
+    previous_value: Any,
+    measured_at: datetime,
+    value: Any,
+    *,
+    max_gap: float | None = None,
+) -> float:
+    """Integral between two samples in value-hours; 0 across gaps."""
+    if previous_at is None or previous_value is None or value is None:
+        return 0.0
+    max_gap = settings.MEASUREMENT_ROLLUP_MAX_GAP_SECONDS if max_gap is None else max_gap
+    seconds = (measured_at - previous_at).total_seconds()
+    if seconds <= 0 or seconds > max_gap:
+        return 0.0
+    return (float(previous_value) + float(value)) / 2 * seconds / 3600
+
+
+def retention_days() -> dict[RollupResolution, int]:
+    """Days of buckets kept per resolution; resolutions missing here or
+    set to 0 are kept forever."""
+    return {
+        RollupResolution.MINUTE: settings.MEASUREMENT_ROLLUP_1M_RETENTION_DAYS,
+        RollupResolution.QUARTER_HOUR: settings.MEASUREMENT_ROLLUP_15M_RETENTION_DAYS,
+    }
+
+
+def retention_cutoff(
+    resolution: RollupResolution,
+    *,
+    now: datetime | None = None,
+) -> datetime | None:
+    """Start of the oldest UTC day still kept at `resolution`, or None."""
+    days = retention_days().get(resolution, 0)
+    if days <= 0:
+        return None
+    now = now or datetime.now(timezone.utc)
+    return bucket_start(now - timedelta(days=days), RESOLUTIONS[-1])
+
+
+def pick_resolution(
+    start: datetime,
+    end: datetime,
+    max_points: int,
+) -> RollupResolution:
+    """Finest resolution whose bucket count over [start, end) fits
+    `max_points`; the coarsest one when none does."""
+    span = max(0.0, (end - start).total_seconds())
+    for resolution in RESOLUTIONS:
+        if span / resolution.seconds <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+@dataclass(frozen=True)
+class RollupSample:
+    provider_id: int
+    measured_at: datetime
+    value: float
+    unit: str | None
+    # Integral since the provider's previous sample (see trapezoid_energy).
+    energy: float = 0.0
+
+
+@dataclass
+class _Bucket:
+    min_value: float
+    max_value: float
+    sum_value: float
+    sample_count: int
+    last_value: float
+    first_at: datetime
+    last_at: datetime
+    energy: float
+    unit: str | None
+
+    @classmethod
+    def of(cls, sample: RollupSample) -> "_Bucket":
+        return cls(
+            min_value=sample.value,
+            max_value=sample.value,
+            sum_value=sample.value,
+            sample_count=1,
+            last_value=sample.value,
+            first_at=sample.measured_at,
+            last_at=sample.measured_at,
+            energy=sample.energy,
+            unit=sample.unit,
+        )
+
+    def add(self, sample: RollupSample) -> None:
+        self.min_value = min(self.min_value, sample.value)
+        self.max_value = max(self.max_value, sample.value)
+        self.sum_value += sample.value
+        self.sample_count += 1
+        self.energy += sample.energy
+        self.first_at = min(self.first_at, sample.measured_at)
+        if sample.measured_at >= self.last_at:
+            self.last_at = sample.measured_at
+            self.last_value = sample.value
+            self.unit = sample.unit
+
+
+# NULL readings stay in the lag() window so that, as for live samples
+# (see trapezoid_energy), no energy is integrated across them.
+_COMPACT_BASE_SQL = """
+INSERT INTO provider_measurement_rollups (
+    provider_id, resolution, bucket_start, min_value, max_value, sum_value,
+    sample_count, last_value, first_at, last_at, energy, unit
+)
+SELECT
+    provider_id,
+    CAST(:resolution AS rollup_resolution_enum),
+    to_timestamp(floor(extract(epoch FROM measured_at) / :bucket) * :bucket) AS bucket,
+    min(measured_value),
+    max(measured_value),
+    sum(measured_value),
+    count(*),
+    (array_agg(measured_value ORDER BY measured_at DESC))[1],
+    min(measured_at),
+    max(measured_at),
+    sum(energy),
+    (array_agg(measured_unit ORDER BY measured_at DESC))[1]
+FROM (
+    SELECT
+        provider_id, measured_at, measured_value, measured_unit,
+        CASE
+            WHEN previous_value IS NOT NULL
+             AND measured_at > previous_at
+             AND measured_at - previous_at <= make_interval(secs => :max_gap)
+            THEN (measured_value + previous_value) / 2
+                 * extract(epoch FROM measured_at - previous_at) / 3600
+            ELSE 0
+        END AS energy
+    FROM (
+        SELECT
+            provider_id, measured_at, measured_value, measured_unit,
+            lag(measured_at) OVER samples AS previous_at,
+            lag(measured_value) OVER samples AS previous_value
+        FROM provider_measurements
+        WHERE measured_at >= CAST(:start AS timestamptz) - make_interval(secs => :max_gap)
+          AND measured_at < :end
+          {provider_filter}
+        WINDOW samples AS (PARTITION BY provider_id ORDER BY measured_at)
+    ) AS ordered
+    WHERE measured_at >= :start
+      AND measured_value IS NOT NULL
+) AS integrated
+GROUP BY provider_id, bucket
+{on_conflict}
+"""
+
+_COMPACT_COARSE_SQL = """
+INSERT INTO provider_measurement_rollups (
+    provider_id, resolution, bucket_start, min_value, max_value, sum_value,
+    sample_count, last_value, first_at, last_at, energy, unit
+)
+SELECT
+    provider_id,
+    CAST(:resolution AS rollup_resolution_enum),
+    to_timestamp(floor(extract(epoch FROM bucket_start) / :bucket) * :bucket) AS bucket,
+    min(min_value),
+    max(max_value),
+    sum(sum_value),
+    sum(sample_count),
+    (array_agg(last_value ORDER BY last_at DESC NULLS LAST))[1],
+    min(first_at),
+    max(last_at),
+    sum(energy),
+    (array_agg(unit ORDER BY last_at DESC NULLS LAST))[1]
+FROM provider_measurement_rollups
+WHERE resolution = CAST(:source AS rollup_resolution_enum)
+  AND bucket_start >= :start
+  AND bucket_start < :end
+  {provider_filter}
+GROUP BY provider_id, bucket
+{on_conflict}
+"""
+
+# Base buckets that already exist were accumulated from live samples. The
+# raw table holds those deduplicated (equal samples only move the latest
+# row's measured_at), so recomputing them would lose samples and energy.
+_ON_CONFLICT_KEEP = """
+ON CONFLICT (provider_id, resolution, bucket_start) DO NOTHING
+"""
+
+# Coarser buckets are sums of base buckets, so they are always recomputed.
+_ON_CONFLICT_REPLACE = """
+ON CONFLICT (provider_id, resolution, bucket_start) DO UPDATE SET
+    min_value = excluded.min_value,
+    max_value = excluded.max_value,
+    sum_value = excluded.sum_value,
+    sample_count = excluded.sample_count,
+    last_value = excluded.last_value,
+    first_at = excluded.first_at,
+    last_at = excluded.last_at,
+    energy = excluded.energy,
+    unit = excluded.unit
+"""
+
+
+class MeasurementRollupRepository:
+    """Maintains and reads `provider_measurement_rollups`.
+
+    Rollups are accumulated incrementally from saved samples
+    (`apply_samples`). Ranges that never went through that path, e.g. a
+    historical backfill or time with rollups disabled, are filled from the
+    raw table by `compact`. Fine resolutions are pruned after their
+    retention (`apply_retention`).
+    """
+
+    UPSERT_CHUNK_SIZE = 1000
+    # Providers per retention DELETE, so each one walks the primary key.
+    RETENTION_PROVIDER_CHUNK = 500
+    DEFAULT_MAX_POINTS = 500
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def apply_samples(self, samples: Iterable[RollupSample]) -> int:
+        """Fold samples into every resolution with one upsert per chunk.
+
+        Samples are pre-aggregated per bucket first, since a single
+        ON CONFLICT statement may not touch the same row twice.
+        """
+        buckets: dict[tuple[int, RollupResolution, datetime], _Bucket] = {}
+        for sample in samples:
+            for resolution in RESOLUTIONS:
+                key = (sample.provider_id, resolution, bucket_start(sample.measured_at, resolution))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = _Bucket.of(sample)
+                else:
+                    bucket.add(sample)
+
+        rows = [
+            {
+                "provider_id": provider_id,
+                "resolution": resolution,
+                "bucket_start": start,
+                **vars(bucket),
+            }
+            for (provider_id, resolution, start), bucket in buckets.items()
+        ]
+        for offset in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            self.session.execute(self._accumulate_stmt(), rows[offset : offset + self.UPSERT_CHUNK_SIZE])
+        return len(rows)
+
+    def compact(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        provider_ids: Sequence[int] | None = None,
+        max_gap: float | None = None,
+    ) -> dict[str, int]:
+        """Fill rollups for whole UTC days covering [start, end).
+
+        Only base buckets without a rollup are computed from
+        `provider_measurements`; existing ones came from live samples and
+        are kept. The coarser resolutions are then recomputed from the base
+        rollups, so running this over live-ingested days is safe.
+        """
+        day = RESOLUTIONS[-1]
+        start = bucket_start(start, day)
+        aligned_end = bucket_start(end, day)
+        end = aligned_end if aligned_end == end else aligned_end + timedelta(seconds=day.seconds)
+        max_gap = settings.MEASUREMENT_ROLLUP_MAX_GAP_SECONDS if max_gap is None else max_gap
+
+        params: dict[str, Any] = {"start": start, "end": end}
+        provider_filter = ""
+        bind = []
+        if provider_ids is not None:
+            if not provider_ids:
+                return {}
+            provider_filter = "AND provider_id IN :provider_ids"
+            params["provider_ids"] = list(provider_ids)
+            bind = [bindparam("provider_ids", expanding=True)]
+
+        counts: dict[str, int] = {}
+        stmt = text(
+            _COMPACT_BASE_SQL.format(
+                provider_filter=provider_filter, on_conflict=_ON_CONFLICT_KEEP
+            )
+        ).bindparams(*bind)
+        counts[BASE_RESOLUTION.value] = self.session.execute(
+            stmt,
+            {
+                **params,
+                "resolution": BASE_RESOLUTION.value,
+                "bucket": BASE_RESOLUTION.seconds,
+                "max_gap": max_gap,
+            },
+        ).rowcount
+
+        coarse = text(
+            _COMPACT_COARSE_SQL.format(
+                provider_filter=provider_filter, on_conflict=_ON_CONFLICT_REPLACE
+            )
+        ).bindparams(*bind)
+        for resolution in RESOLUTIONS[1:]:
+            counts[resolution.value] = self.session.execute(
+                coarse,
+                {
+                    **params,
+                    "resolution": resolution.value,
+                    "source": BASE_RESOLUTION.value,
+                    "bucket": resolution.seconds,
+                },
+            ).rowcount
+
+        logger.info(
+            "Measurement rollups compacted",
+            extra={
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "providers": len(provider_ids) if provider_ids is not None else None,
+                "buckets": counts,
+            },
+        )
+        return counts
+
+    def apply_retention(self, *, now: datetime | None = None) -> dict[str, int]:
+        """Delete buckets older than their resolution's retention, in whole
+        UTC days; returns the deleted row count per resolution."""
+        provider_ids = list(self.session.execute(select(Provider.id)).scalars())
+        table = ProviderMeasurementRollup
+        deleted: dict[str, int] = {}
+        for resolution in RESOLUTIONS:
+            cutoff = retention_cutoff(resolution, now=now)
+            if cutoff is None:
+                continue
+            count = 0
+            for offset in range(0, len(provider_ids), self.RETENTION_PROVIDER_CHUNK):
+                count += self.session.execute(
+                    delete(table).where(
+                        table.provider_id.in_(
+                            provider_ids[offset : offset + self.RETENTION_PROVIDER_CHUNK]
+                        ),
+                        table.resolution == resolution,
+                        table.bucket_start < cutoff,
+                    )
+                ).rowcount
+            deleted[resolution.value] = count
+
+        if deleted:
+            logger.info("Measurement rollups pruned", extra={"deleted": deleted})
+        return deleted
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_series(
+        self,
+        provider_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        max_points: int = DEFAULT_MAX_POINTS,
+        resolution: RollupResolution | None = None,
+    ) -> tuple[RollupResolution, list[ProviderMeasurementRollup]]:
+        """Buckets of one provider over [start, end) at `resolution`, or at
+        the finest resolution that keeps the series within `max_points` and
+        is still retained at `start`."""
+        if resolution is None:
+            picked = pick_resolution(start, end, max_points)
+            for resolution in RESOLUTIONS[RESOLUTIONS.index(picked) :]:
+                cutoff = retention_cutoff(resolution)
+                if cutoff is None or bucket_start(start, resolution) >= cutoff:
+                    break
+        stmt = (
+            select(ProviderMeasurementRollup)
+            .where(
+                ProviderMeasurementRollup.provider_id == provider_id,
+                ProviderMeasurementRollup.resolution == resolution,
+                ProviderMeasurementRollup.bucket_start >= bucket_start(start, resolution),
+                ProviderMeasurementRollup.bucket_start < end,
+            )
+            .order_by(ProviderMeasurementRollup.bucket_start)
+        )
+        return resolution, list(self.session.execute(stmt).scalars())
+
+    @staticmethod
+    def _accumulate_stmt():
+        table = ProviderMeasurementRollup.__table__
+        stmt = pg_insert(table)
+        excluded = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.provider_id, table.c.resolution, table.c.bucket_start],
+            set_={
+                "min_value": func.least(table.c.min_value, excluded.min_value),
+                "max_value": func.greatest(table.c.max_value, excluded.max_value),
+                "sum_value": table.c.sum_value + excluded.sum_value,
+                "sample_count": table.c.sample_count + excluded.sample_count,
+                "last_value": case(
+                    (
+                        or_(table.c.last_at.is_(None), excluded.last_at >= table.c.last_at),
+                        excluded.last_value,
+                    ),
+                    else_=table.c.last_value,
+                ),
+                "unit": case(
+                    (
+                        or_(table.c.last_at.is_(None), excluded.last_at >= table.c.last_at),
+                        excluded.unit,
+                    ),
+                    else_=table.c.unit,
+                ),
+                "first_at": func.least(table.c.first_at, excluded.first_at),
+                "last_at": func.greatest(table.c.last_at, excluded.last_at),
+                "energy": table.c.energy + excluded.energy,
+            },
+        )
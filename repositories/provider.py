@@ -8,13 +8,17 @@ from sqlalchemy.orm import joinedload
 from smart_common.models.provider import Provider
 from smart_common.providers.enums import ProviderVendor
 from smart_common.repositories.base import BaseRepository
+from smart_common.repositories.measurement_repository import MeasurementRepository
 
 
 class ProviderRepository(BaseRepository[Provider]):
     model = Provider
 
     def list_for_user(self, user_id: int) -> list[Provider]:
-        return self.list(filters={"user_id": user_id})
+        providers = self.list(filters={"user_id": user_id})
+        # One lateral query instead of a last_value query per provider.
+        MeasurementRepository(self.session).preload_last_values(providers)
+        return providers
 
     def get_active_providers(self) -> list[Provider]:
         query = (
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 from pydantic import BaseModel, ConfigDict
@@ -12,3 +12,8 @@ class ProviderMeasurementResponse(BaseModel):
     metadata_payload: Dict[str, Any]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ProviderMeasurementPage(BaseModel):
+    items: List[ProviderMeasurementResponse]
+    next_cursor: Optional[str] = None
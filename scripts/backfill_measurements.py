@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+# ======================================================
+# BOOTSTRAP PYTHONPATH (SUBMODULE SAFE)
+# ======================================================
+import sys
+from pathlib import Path
+
+# script: smart_common/scripts/backfill_measurements.py
+BASE_DIR = Path(__file__).resolve().parents[1]  # smart_common
+sys.path.insert(0, str(BASE_DIR))
+
+# ======================================================
+# STANDARD IMPORTS
+# ======================================================
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+# ======================================================
+# PATHS
+# ======================================================
+ENV_PATH = BASE_DIR / ".env"
+
+# ======================================================
+# ENV
+# ======================================================
+load_dotenv(ENV_PATH, encoding="utf-8")
+
+# ======================================================
+# PROJECT IMPORTS
+# ======================================================
+import smart_common.models  # noqa
+from smart_common.core.db import SessionLocal
+from smart_common.providers.backfill import MeasurementBackfill
+from smart_common.providers.enums import ProviderVendor
+from smart_common.repositories.provider import ProviderRepository
+
+
+def parse_datetime(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Load vendor measurement history into provider_measurements. "
+        "Interrupted runs resume from their checkpoints.",
+    )
+    parser.add_argument("--start", type=parse_datetime, help="ISO datetime (UTC if naive)")
+    parser.add_argument("--end", type=parse_datetime, help="ISO datetime, default now")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=365,
+        help="Days back from --end when --start is not given",
+    )
+    parser.add_argument("--provider-id", type=int, action="append", dest="provider_ids")
+    parser.add_argument("--vendor", type=ProviderVendor, help="Only providers of this vendor")
+    parser.add_argument(
+        "--no-rollups",
+        action="store_true",
+        help="Skip filling rollups for the loaded range",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    end = args.end or datetime.now(timezone.utc)
+    start = args.start or end - timedelta(days=args.days)
+
+    session = SessionLocal()
+    try:
+        # Credentials are eager-loaded, so the detached rows stay usable.
+        providers = [
+            provider
+            for provider in ProviderRepository(session).get_active_providers()
+            if (args.provider_ids is None or provider.id in args.provider_ids)
+            and (args.vendor is None or provider.vendor == args.vendor)
+        ]
+    finally:
+        session.close()
+
+    backfill = MeasurementBackfill(compact_rollups=False if args.no_rollups else None)
+    stats = asyncio.run(backfill.run(providers, start, end))
+
+    logging.info(
+        "Backfill done: %s windows, %s measurements, %s inserted, %s failed windows",
+        stats.windows,
+        stats.measurements,
+        stats.inserted,
+        stats.failed_windows,
+    )
+    for provider_id, reason in sorted(stats.skipped_providers.items()):
+        logging.warning("Provider %s skipped: %s", provider_id, reason)
+
+    return 1 if stats.failed_windows else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
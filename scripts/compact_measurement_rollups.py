@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+# ======================================================
+# BOOTSTRAP PYTHONPATH (SUBMODULE SAFE)
+# ======================================================
+import sys
+from pathlib import Path
+
+# script: smart_common/scripts/compact_measurement_rollups.py
+BASE_DIR = Path(__file__).resolve().parents[1]  # smart_common
+sys.path.insert(0, str(BASE_DIR))
+
+# ======================================================
+# STANDARD IMPORTS
+# ======================================================
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+# ======================================================
+# PATHS
+# ======================================================
+ENV_PATH = BASE_DIR / ".env"
+
+# ======================================================
+# ENV
+# ======================================================
+load_dotenv(ENV_PATH, encoding="utf-8")
+
+# ======================================================
+# PROJECT IMPORTS
+# ======================================================
+import smart_common.models  # noqa
+from smart_common.core.db import SessionLocal
+from smart_common.repositories.measurement_rollup_repository import (
+    MeasurementRollupRepository,
+)
+
+
+def parse_datetime(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Fill missing provider measurement rollups from raw measurements.",
+    )
+    parser.add_argument("--start", type=parse_datetime, help="ISO datetime (UTC if naive)")
+    parser.add_argument("--end", type=parse_datetime, help="ISO datetime, default now")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=2,
+        help="Days back from --end when --start is not given",
+    )
+    parser.add_argument("--provider-id", type=int, action="append", dest="provider_ids")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    end = args.end or datetime.now(timezone.utc)
+    start = (args.start or end - timedelta(days=args.days)).astimezone(timezone.utc)
+    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    session = SessionLocal()
+    try:
+        # One day per transaction keeps locks and WAL bursts short.
+        day = start
+        while day < end:
+            day_end = min(end, day + timedelta(days=1))
+            counts = MeasurementRollupRepository(session).compact(
+                day, day_end, provider_ids=args.provider_ids
+            )
+            session.commit()
+            logging.info("Compacted %s: %s", day.date().isoformat(), counts)
+            day = day_end
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
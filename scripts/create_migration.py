@@ -40,6 +40,7 @@ load_dotenv(ENV_PATH)
 import smart_common.models  # noqa
 from smart_common.core.config import settings
 from smart_common.core.db import Base
+from smart_common.repositories.measurement_partitions import include_name
 
 
 # ======================================================
@@ -49,7 +50,11 @@ def has_schema_changes(engine) -> bool:
     with engine.connect() as conn:
         ctx = MigrationContext.configure(
             connection=conn,
-            opts={"compare_type": True, "compare_server_default": True},
+            opts={
+                "compare_type": True,
+                "compare_server_default": True,
+                "include_name": include_name,
+            },
         )
         return bool(compare_metadata(ctx, Base.metadata))
 
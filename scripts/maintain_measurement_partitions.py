@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+# ======================================================
+# BOOTSTRAP PYTHONPATH (SUBMODULE SAFE)
+# ======================================================
+import sys
+from pathlib import Path
+
+# script: smart_common/scripts/maintain_measurement_partitions.py
+BASE_DIR = Path(__file__).resolve().parents[1]  # smart_common
+sys.path.insert(0, str(BASE_DIR))
+
+# ======================================================
+# STANDARD IMPORTS
+# ======================================================
+import argparse
+import logging
+
+from dotenv import load_dotenv
+
+# ======================================================
+# PATHS
+# ======================================================
+ENV_PATH = BASE_DIR / ".env"
+
+# ======================================================
+# ENV
+# ======================================================
+load_dotenv(ENV_PATH, encoding="utf-8")
+
+# ======================================================
+# PROJECT IMPORTS
+# ======================================================
+import smart_common.models  # noqa
+from smart_common.core.config import settings
+from smart_common.core.db import SessionLocal
+from smart_common.repositories.measurement_partitions import MeasurementPartitionManager
+from smart_common.repositories.measurement_rollup_repository import (
+    MeasurementRollupRepository,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Create upcoming and drop expired provider_measurements partitions, "
+            "and prune expired fine-grained rollups."
+        ),
+    )
+    parser.add_argument("--ahead", type=int, default=settings.MEASUREMENT_PARTITIONS_AHEAD)
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.MEASUREMENT_RETENTION_MONTHS,
+        help="Full months kept before the current one (0 = keep everything)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    session = SessionLocal()
+    try:
+        manager = MeasurementPartitionManager(session)
+        created = manager.ensure_partitions(ahead=args.ahead)
+        created += manager.rehome_default_rows()
+        dropped = manager.apply_retention(args.retention_months)
+        pruned = MeasurementRollupRepository(session).apply_retention()
+        session.commit()
+
+        logging.info("Partitions created: %s", ", ".join(created) or "none")
+        logging.info("Partitions dropped: %s", ", ".join(dropped) or "none")
+        logging.info("Rollups pruned: %s", pruned or "none")
+
+        stray = manager.default_partition_rows()
+        if stray:
+            logging.warning("%d rows are still in the default partition", stray)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
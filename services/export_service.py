@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import csv
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import IO, Any, Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import Select, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from smart_common.models.provider import Provider
+from smart_common.models.provider_measurement import ProviderMeasurement
+from smart_common.repositories.device_event import EXPORT_COLUMNS as DEVICE_EVENT_COLUMNS
+from smart_common.repositories.device_event import DeviceEventRepository
+from smart_common.repositories.measurement_repository import MeasurementRepository
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+MEASUREMENT_COLUMNS = ("provider_id", "measured_at", "measured_value", "measured_unit")
+
+
+class ExportFormat(str, Enum):
+    PARQUET = "parquet"
+    CSV = "csv"
+
+
+def measurement_schema():
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("provider_id", pa.int64()),
+            ("measured_at", pa.timestamp("us", tz="UTC")),
+            ("measured_value", pa.float64()),
+            ("measured_unit", pa.string()),
+        ]
+    )
+
+
+def device_event_schema():
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("device_id", pa.int64()),
+            ("event_type", pa.string()),
+            ("event_name", pa.string()),
+            ("device_state", pa.string()),
+            ("pin_state", pa.bool_()),
+            ("measured_value", pa.float64()),
+            ("measured_unit", pa.string()),
+            ("trigger_reason", pa.string()),
+            ("source", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+class ExportService:
+    """Streams provider measurements and device events for reporting.
+
+    Rows are read through server-side cursors and written batch by batch,
+    so memory is bounded by `batch_size` rather than by the time range.
+    CSV on PostgreSQL is produced by the server with `COPY ... TO STDOUT`.
+    Pass a session from a dedicated reporting engine to keep long exports
+    off the API's connection pool.
+    """
+
+    DEFAULT_BATCH_SIZE = 50_000
+    PARQUET_COMPRESSION = "zstd"
+
+    def __init__(self, session: Session, *, batch_size: int | None = None) -> None:
+        self.session = session
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+
+    # ------------------------------------------------------------------
+    # Arrow record batches
+    # ------------------------------------------------------------------
+
+    def measurement_batches(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        user_id: int | None = None,
+        provider_ids: Sequence[int] | None = None,
+    ) -> Iterator[Any]:
+        """`pyarrow.RecordBatch`es of measurements, provider by provider."""
+        schema = measurement_schema()
+        ids = self._provider_ids(user_id, provider_ids)
+        yield from _batched(schema, self._measurement_rows(ids, start, end), self.batch_size)
+
+    def device_event_batches(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        user_id: int | None = None,
+        device_ids: Sequence[int] | None = None,
+    ) -> Iterator[Any]:
+        """`pyarrow.RecordBatch`es of device events, device by device."""
+        schema = device_event_schema()
+        rows = DeviceEventRepository(self.session).iter_range(
+            start,
+            end,
+            device_ids=device_ids,
+            user_id=user_id,
+            chunk_size=self.batch_size,
+        )
+        yield from _batched(schema, rows, self.batch_size)
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def export_measurements(
+        self,
+        target: IO,
+        start: datetime,
+        end: datetime,
+        *,
+        fmt: ExportFormat = ExportFormat.PARQUET,
+        user_id: int | None = None,
+        provider_ids: Sequence[int] | None = None,
+    ) -> int:
+        """Write measurements to `target` (binary for Parquet, text for
+        CSV); returns the number of rows."""
+        if fmt == ExportFormat.PARQUET:
+            rows = self.write_parquet(
+                target,
+                measurement_schema(),
+                self.measurement_batches(
+                    start, end, user_id=user_id, provider_ids=provider_ids
+                ),
+            )
+        else:
+            ids = self._provider_ids(user_id, provider_ids)
+            stmt = (
+                select(*(getattr(ProviderMeasurement, name) for name in MEASUREMENT_COLUMNS))
+                .where(
+                    ProviderMeasurement.provider_id.in_(ids),
+                    ProviderMeasurement.measured_at >= start,
+                    ProviderMeasurement.measured_at < end,
+                )
+                .order_by(ProviderMeasurement.provider_id, ProviderMeasurement.measured_at)
+            )
+            rows = self.write_csv(
+                target,
+                stmt,
+                MEASUREMENT_COLUMNS,
+                lambda: self._measurement_rows(ids, start, end),
+            )
+
+        self._log_export("provider_measurements", fmt, rows, start, end)
+        return rows
+
+    def export_device_events(
+        self,
+        target: IO,
+        start: datetime,
+        end: datetime,
+        *,
+        fmt: ExportFormat = ExportFormat.PARQUET,
+        user_id: int | None = None,
+        device_ids: Sequence[int] | None = None,
+    ) -> int:
+        """Write device events to `target`; returns the number of rows."""
+        if fmt == ExportFormat.PARQUET:
+            rows = self.write_parquet(
+                target,
+                device_event_schema(),
+                self.device_event_batches(start, end, user_id=user_id, device_ids=device_ids),
+            )
+        else:
+            repository = DeviceEventRepository(self.session)
+            rows = self.write_csv(
+                target,
+                repository.range_query(start, end, device_ids=device_ids, user_id=user_id),
+                DEVICE_EVENT_COLUMNS,
+                lambda: repository.iter_range(
+                    start,
+                    end,
+                    device_ids=device_ids,
+                    user_id=user_id,
+                    chunk_size=self.batch_size,
+                ),
+            )
+
+        self._log_export("device_events", fmt, rows, start, end)
+        return rows
+
+    def write_parquet(self, target: IO, schema: Any, batches: Iterable[Any]) -> int:
+        """One row group per batch; only the current batch is in memory."""
+        _require_pyarrow()
+        rows = 0
+        with pq.ParquetWriter(target, schema, compression=self.PARQUET_COMPRESSION) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+
+    def write_csv(
+        self,
+        target: IO[str],
+        stmt: Select,
+        header: Sequence[str],
+        rows: Callable[[], Iterable[Sequence[Any]]],
+    ) -> int:
+        """CSV via `COPY (stmt) TO STDOUT` on PostgreSQL, otherwise written
+        row by row from the streaming `rows` factory."""
+        if self.session.get_bind().dialect.name == "postgresql":
+            return self._copy_to(target, stmt)
+
+        writer = csv.writer(target)
+        writer.writerow(header)
+        count = 0
+        for row in rows():
+            writer.writerow(_csv_value(value) for value in row)
+            count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _copy_to(self, target: IO[str], stmt: Select) -> int:
+        compiled = stmt.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"render_postcompile": True},
+        )
+        dbapi_connection = self.session.connection().connection
+        cursor = dbapi_connection.cursor()
+        try:
+            query = cursor.mogrify(str(compiled), compiled.params).decode()
+            cursor.copy_expert(
+                f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                target,
+                size=1 << 16,
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def _measurement_rows(
+        self,
+        provider_ids: Sequence[int],
+        start: datetime,
+        end: datetime,
+    ) -> Iterator[tuple]:
+        # One partition-pruned index range scan per provider.
+        repository = MeasurementRepository(self.session)
+        for provider_id in provider_ids:
+            for row in repository.iter_range(
+                provider_id, start, end, chunk_size=self.batch_size
+            ):
+                yield (provider_id, *row)
+
+    def _provider_ids(
+        self,
+        user_id: int | None,
+        provider_ids: Sequence[int] | None,
+    ) -> list[int]:
+        stmt = select(Provider.id).order_by(Provider.id)
+        if user_id is not None:
+            stmt = stmt.where(Provider.user_id == user_id)
+        if provider_ids is not None:
+            stmt = stmt.where(Provider.id.in_(provider_ids))
+        return list(self.session.execute(stmt).scalars())
+
+    @staticmethod
+    def _log_export(
+        table: str,
+        fmt: ExportFormat,
+        rows: int,
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        logger.info(
+            "Export finished",
+            extra={
+                "table": table,
+                "format": fmt.value,
+                "rows": rows,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+            },
+        )
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+
+def _arrow_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    value = _arrow_value(value)
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _record_batch(schema: Any, rows: Sequence[Sequence[Any]]) -> Any:
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([_arrow_value(value) for value in column], type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+def _batched(schema: Any, rows: Iterable[Sequence[Any]], size: int) -> Iterator[Any]:
+    chunk: list[Sequence[Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield _record_batch(schema, chunk)
+            chunk = []
+    if chunk:
+        yield _record_batch(schema, chunk)
@@ -11,6 +11,7 @@ from smart_common.providers.enums import ProviderType, ProviderVendor
 from smart_common.enums.unit import PowerUnit
 
 # ---- provider config schemas ----
+from smart_common.repositories.measurement_repository import MeasurementRepository
 from smart_common.repositories.microcontroller import MicrocontrollerRepository
 from smart_common.repositories.provider import ProviderRepository
 from smart_common.core.security import encrypt_secret
@@ -295,7 +296,7 @@ class ProviderService:
         mc_uuid: UUID,
     ) -> list[Provider]:
         microcontroller = self._ensure_microcontroller(db, user_id, mc_uuid)
-        return (
+        providers = (
             db.query(Provider)
             .filter(
                 Provider.microcontroller_id == microcontroller.id,
@@ -303,9 +304,11 @@ class ProviderService:
             )
             .all()
         )
+        MeasurementRepository(db).preload_last_values(providers)
+        return providers
 
     def list_api_for_user(self, db: Session, user_id: int) -> list[Provider]:
-        return (
+        providers = (
             db.query(Provider)
             .filter(
                 Provider.user_id == user_id,
@@ -313,6 +316,8 @@ class ProviderService:
             )
             .all()
         )
+        MeasurementRepository(db).preload_last_values(providers)
+        return providers
 
     # ---------- commands ----------
 
@@ -38,7 +38,8 @@ class ExtraFormatter(logging.Formatter):
             return base
 
         try:
-            extras_str = json.dumps(extras, ensure_ascii=False)
+            # default=str renders lazy values (e.g. adapter bodies) only here.
+            extras_str = json.dumps(extras, ensure_ascii=False, default=str)
         except Exception:
             extras_str = str(extras)
 